@@ -0,0 +1,140 @@
+"""
+In-memory completion index over the platform's own keyword corpus.
+
+Keywords are kept in one sorted array, so a prefix lookup is two bisections
+plus a top-k selection over the counts of the matching slice. Infix completions
+("... {query} ...") use a second sorted array of word-suffixes (every keyword
+tail that starts at a word boundary) mapped back to keyword ids. The whole
+matching range is ranked, so short prefixes ("s") return the corpus's most
+frequent matches, not the alphabetically first ones; the selection is one
+vectorised pass over the range's counts, so even those stay in the low
+milliseconds, with no network round trip.
+
+Corpus file: one keyword per line, optionally ``keyword<TAB>count``; ``.gz``
+files are read transparently. Higher counts rank first among matches.
+"""
+from __future__ import annotations
+
+import bisect
+import gzip
+import heapq
+import logging
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_RANGE_END = "\U0010ffff"
+
+
+def _normalize(s: str) -> str:
+    return re.sub(r"\s+", " ", s.strip().lower())
+
+
+class KeywordIndex:
+    def __init__(self, entries: Iterable[Tuple[str, float]]) -> None:
+        best: dict = {}
+        for keyword, count in entries:
+            k = _normalize(keyword)
+            if k and count >= best.get(k, float("-inf")):
+                best[k] = float(count)
+        self._keys: List[str] = sorted(best)
+        self._counts = np.asarray([best[k] for k in self._keys], dtype=np.float32)
+
+        suffixes: List[Tuple[str, int]] = []
+        for i, k in enumerate(self._keys):
+            pos = k.find(" ")
+            while pos != -1:
+                suffixes.append((k[pos + 1 :], i))
+                pos = k.find(" ", pos + 1)
+        suffixes.sort()
+        self._suffixes: List[str] = [s for s, _ in suffixes]
+        self._suffix_ids = np.asarray([i for _, i in suffixes], dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordIndex":
+        opener = gzip.open if path.endswith(".gz") else open
+
+        def entries():
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    keyword, _, count = line.rstrip("\n").partition("\t")
+                    try:
+                        yield keyword, float(count) if count else 1.0
+                    except ValueError:
+                        yield keyword, 1.0
+
+        return cls(entries())
+
+    @staticmethod
+    def _span(arr: List[str], prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(arr, prefix)
+        hi = bisect.bisect_left(arr, prefix + _RANGE_END, lo)
+        return lo, hi
+
+    def _top(self, ids: np.ndarray, limit: int, exclude: str) -> List[int]:
+        """Best ``limit`` of ascending ``ids`` by count, then keyword, skipping ``exclude``."""
+        k = limit + 1
+        if len(ids) > k:
+            # Keep the k highest counts; ids are in key order, so ties at the
+            # cut keep the alphabetically first.
+            counts = self._counts[ids]
+            kth = np.partition(counts, len(counts) - k)[len(counts) - k]
+            above = ids[counts > kth]
+            ids = np.concatenate([above, ids[counts == kth][: k - len(above)]])
+        ranked = heapq.nsmallest(
+            k, ids.tolist(), key=lambda i: (-self._counts[i], self._keys[i])
+        )
+        return [i for i in ranked if self._keys[i] != exclude][:limit]
+
+    def prefix(self, q: str, limit: int = 10) -> List[str]:
+        """Keywords starting with ``q``, most frequent first."""
+        q = _normalize(q)
+        if not q:
+            return []
+        lo, hi = self._span(self._keys, q)
+        return [self._keys[i] for i in self._top(np.arange(lo, hi), limit, q)]
+
+    def infix(self, q: str, limit: int = 10) -> List[str]:
+        """Keywords containing ``q`` at a word boundary after their first word."""
+        q = _normalize(q)
+        if not q:
+            return []
+        lo, hi = self._span(self._suffixes, q)
+        ids = np.unique(self._suffix_ids[lo:hi])
+        return [self._keys[i] for i in self._top(ids, limit, q)]
+
+    def complete(self, q: str, limit: int = 10) -> List[str]:
+        """Prefix completions, padded with infix ones when there are too few."""
+        out = self.prefix(q, limit)
+        if len(out) < limit:
+            seen = set(out)
+            out.extend(k for k in self.infix(q, limit) if k not in seen)
+        return out[:limit]
+
+
+_keyword_index: Optional[KeywordIndex] = None
+_keyword_index_loaded = False
+
+
+def get_keyword_index() -> Optional[KeywordIndex]:
+    """Return the worker-wide index from ``CLUSTER_TREE_LOCAL_CORPUS``, loading it once."""
+    global _keyword_index, _keyword_index_loaded
+    if not _keyword_index_loaded:
+        _keyword_index_loaded = True
+        path = os.getenv("CLUSTER_TREE_LOCAL_CORPUS")
+        if path and os.path.exists(path):
+            try:
+                _keyword_index = KeywordIndex.from_file(path)
+                logger.info("Local keyword index loaded: %d keywords", len(_keyword_index))
+            except Exception as e:
+                logger.warning("Failed to load local keyword corpus %s: %s", path, e)
+        elif path:
+            logger.warning("Local keyword corpus not found: %s", path)
+    return _keyword_index
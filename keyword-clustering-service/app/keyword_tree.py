@@ -4,24 +4,38 @@ Keyword expansion (Google Suggest), MiniLM deduplication, intent, and hierarchic
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import heapq
+import json
 import logging
 import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 import httpx
 import numpy as np
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sentence_transformers import SentenceTransformer
 
+from app.keyword_index import KeywordIndex, get_keyword_index
+from app.suggest_limiter import AdaptiveSuggestLimiter, get_suggest_limiter
+from app.tree_cache import get_tree_cache, tree_cache_key
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 tree_embedding_model: Optional[SentenceTransformer] = None
 
-SUGGEST_URL = "https://suggestqueries.google.com/complete/search"
+# Overridable so benchmarks and tests can point trees at a local Suggest stand-in
+# (scripts/suggest_stub.py) instead of Google.
+SUGGEST_URL = os.getenv(
+    "CLUSTER_TREE_SUGGEST_URL", "https://suggestqueries.google.com/complete/search"
+)
 
 
 def load_tree_embedding_model() -> None:
@@ -37,6 +51,30 @@ class KeywordClusterRequest(BaseModel):
     location_code: int = Field(2840, ge=1)
     gl: str = Field("us", min_length=2, max_length=8)
     schema_version: int = Field(1, ge=1, le=99)
+    time_budget_ms: Optional[int] = Field(
+        None,
+        ge=100,
+        le=120000,
+        description="Total latency budget; stragglers are cancelled and a partial tree returned",
+    )
+    max_depth: int = Field(
+        2,
+        ge=2,
+        le=6,
+        description="Levels below the root; above 2 the budgeted best-first builder is used",
+    )
+
+
+MAX_BATCH_SEEDS = int(os.getenv("CLUSTER_TREE_BATCH_MAX_SEEDS", "50"))
+
+
+class KeywordClusterBatchRequest(BaseModel):
+    seeds: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SEEDS)
+    language_code: str = Field("en", min_length=2, max_length=8)
+    location_code: int = Field(2840, ge=1)
+    gl: str = Field("us", min_length=2, max_length=8)
+    schema_version: int = Field(1, ge=1, le=99)
+    time_budget_ms: Optional[int] = Field(None, ge=100, le=120000)
 
 
 def _normalize_phrase(s: str) -> str:
@@ -56,14 +94,19 @@ def _unique_preserve_order(items: List[str]) -> List[str]:
 
 
 async def fetch_suggestions(
-    client: httpx.AsyncClient, q: str, hl: str, gl: str
+    client: httpx.AsyncClient,
+    q: str,
+    hl: str,
+    gl: str,
+    limiter: Optional[AdaptiveSuggestLimiter] = None,
 ) -> Tuple[List[str], Optional[str]]:
     if not q.strip():
         return [], None
     params = {"client": "firefox", "q": q, "hl": hl, "gl": gl}
     try:
-        r = await client.get(SUGGEST_URL, params=params)
-        r.raise_for_status()
+        async with (limiter.slot() if limiter is not None else contextlib.nullcontext()):
+            r = await client.get(SUGGEST_URL, params=params)
+            r.raise_for_status()
         data = r.json()
         if isinstance(data, list) and len(data) > 1 and isinstance(data[1], list):
             return [str(x) for x in data[1] if x], None
@@ -73,38 +116,41 @@ async def fetch_suggestions(
         return [], str(e)
 
 
+_NAVIGATIONAL_RE = r"\.(?:com|org|net|io|co\.uk)\b|/login|sign in|sign-in|official site|www\."
+_TRANSACTIONAL_RE = (
+    r"\bbuy\b|\bprice\b|\border\b|\bcoupon\b|\bdiscount\b|\bcheap\b|"
+    r"subscribe|free trial|download now|book now|for sale"
+)
+_COMMERCIAL_RE = r"\bbest\b|\btop \d+\b|\breview\b|\bvs\b|versus|alternative|pricing|compare"
+
+# One match per line of "\n".join(labels). Each optional lookahead scans only its
+# own line (``.`` stops at newlines) and records whether that category's cue
+# appears anywhere in it; the first group set wins, giving the
+# navigational > transactional > commercial priority. Anything else is
+# informational (how/what/guide cues and no cue at all alike).
+_INTENT_LINE_RE = re.compile(
+    rf"^(?:(?=.*?(?P<navigational>{_NAVIGATIONAL_RE}))|)"
+    rf"(?:(?=.*?(?P<transactional>{_TRANSACTIONAL_RE}))|)"
+    rf"(?:(?=.*?(?P<commercial>{_COMMERCIAL_RE}))|)"
+    r".*$",
+    re.MULTILINE,
+)
+_INTENT_GROUPS = ("navigational", "transactional", "commercial")
+
+
+def classify_intents(texts: List[str]) -> List[str]:
+    """Rule-based intent for many phrases in one regex pass over their joined text."""
+    if not texts:
+        return []
+    joined = "\n".join(t.lower().replace("\n", " ") for t in texts)
+    out: List[str] = []
+    for m in _INTENT_LINE_RE.finditer(joined):
+        out.append(next((g for g in _INTENT_GROUPS if m.group(g) is not None), "informational"))
+    return out
+
+
 def classify_intent(text: str) -> str:
-    t = text.lower()
-    if re.search(
-        r"\.(com|org|net|io|co\.uk)\b|/login|sign in|sign-in|official site|www\.",
-        t,
-    ):
-        return "navigational"
-    if re.search(
-        r"\bbuy\b|\bprice\b|\border\b|\bcoupon\b|\bdiscount\b|\bcheap\b|"
-        r"subscribe|free trial|download now|book now|for sale",
-        t,
-    ):
-        return "transactional"
-    if re.search(
-        r"\bbest\b|\btop \d+\b|\breview\b|\bvs\b|versus|alternative|pricing|compare",
-        t,
-    ):
-        return "commercial"
-    if re.search(
-        r"^how\b|^what\b|^why\b|^when\b|^where\b|^who\b|guide|tutorial|meaning|learn|ideas",
-        t,
-    ):
-        return "informational"
-    return "informational"
-
-
-def _embedding_fallback_intent(
-    text: str, emb: np.ndarray, proto_embs: np.ndarray, labels: List[str]
-) -> str:
-    sims = np.dot(proto_embs, emb)
-    idx = int(np.argmax(sims))
-    return labels[idx]
+    return classify_intents([text])[0]
 
 
 def encode_normalized(model: SentenceTransformer, texts: List[str]) -> np.ndarray:
@@ -237,17 +283,313 @@ def _build_l3_suggest_queries(term: str, max_sub: int) -> List[str]:
     return _unique_preserve_order(out)[:max_sub]
 
 
+def _tree_settings() -> Dict[str, Any]:
+    return {
+        "dedupe_threshold": float(os.getenv("CLUSTER_TREE_DEDUPE_THRESHOLD", "0.92")),
+        "max_l3_each": int(os.getenv("CLUSTER_TREE_MAX_L3_EACH", "10")),
+        "l2_branches": int(os.getenv("CLUSTER_TREE_L2_BRANCHES", "6")),
+        "l3_branches": int(os.getenv("CLUSTER_TREE_L3_BRANCHES", "6")),
+        "max_seed_queries": int(os.getenv("CLUSTER_TREE_MAX_L2_SUGGEST_QUERIES", "18")),
+        "max_l2_candidates": int(os.getenv("CLUSTER_TREE_MAX_L2_CANDIDATES", "30")),
+        "max_l3_subqueries": int(os.getenv("CLUSTER_TREE_MAX_L3_SUBQUERIES", "3")),
+        "suggest_timeout": float(os.getenv("CLUSTER_TREE_SUGGEST_TIMEOUT", "10")),
+        "suggest_provider": os.getenv("CLUSTER_TREE_SUGGEST_PROVIDER", "google").lower(),
+        "suggest_merge": os.getenv("CLUSTER_TREE_SUGGEST_MERGE", "pad").lower(),
+        "remote_budget_ms": int(os.getenv("CLUSTER_TREE_REMOTE_SUGGEST_BUDGET_MS", "0")) or None,
+        "local_limit": int(os.getenv("CLUSTER_TREE_LOCAL_SUGGEST_LIMIT", "10")),
+    }
+
+
+def _suggest_client(timeout: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
+
+
+class SuggestionProvider(ABC):
+    """Source of query completions for tree expansion.
+
+    ``suggest`` returns ``(suggestions, error)`` like fetch_suggestions: failures
+    are reported as an error string, never raised.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def suggest(self, q: str, hl: str, gl: str) -> Tuple[List[str], Optional[str]]:
+        ...
+
+
+class GoogleSuggestProvider(SuggestionProvider):
+    name = "google"
+
+    def __init__(
+        self, client: httpx.AsyncClient, limiter: Optional[AdaptiveSuggestLimiter] = None
+    ) -> None:
+        self._client = client
+        self._limiter = limiter
+
+    async def suggest(self, q: str, hl: str, gl: str) -> Tuple[List[str], Optional[str]]:
+        return await fetch_suggestions(self._client, q, hl, gl, self._limiter)
+
+
+class LocalSuggestProvider(SuggestionProvider):
+    """Completions from the in-process keyword corpus index (no network)."""
+
+    name = "local"
+
+    def __init__(self, index: KeywordIndex, limit: int = 10) -> None:
+        self._index = index
+        self.limit = max(1, int(limit))
+
+    async def suggest(self, q: str, hl: str, gl: str) -> Tuple[List[str], Optional[str]]:
+        if not q.strip():
+            return [], None
+        return self._index.complete(q, self.limit), None
+
+
+MERGE_STRATEGIES = ("pad", "replace", "fallback")
+
+
+class MergedSuggestProvider(SuggestionProvider):
+    """
+    Combine a remote and a local provider.
+
+    - ``pad``: remote results first, topped up with local ones to ``limit``
+    - ``replace``: local results alone when the corpus has ``limit`` of them,
+      otherwise as ``pad`` (Google is only asked about what we lack)
+    - ``fallback``: remote results; local ones only when remote fails or is empty
+
+    With ``remote_budget_ms`` set, a remote call still running after the budget
+    is cancelled and treated as a failure, so local results stand in for it.
+    """
+
+    name = "merged"
+
+    def __init__(
+        self,
+        remote: SuggestionProvider,
+        local: SuggestionProvider,
+        strategy: str = "pad",
+        remote_budget_ms: Optional[int] = None,
+        limit: int = 10,
+    ) -> None:
+        if strategy not in MERGE_STRATEGIES:
+            raise ValueError(f"Unknown suggest merge strategy: {strategy!r}")
+        self._remote = remote
+        self._local = local
+        self.strategy = strategy
+        self.remote_budget_ms = remote_budget_ms
+        self.limit = max(1, int(limit))
+
+    async def _remote_suggest(self, q: str, hl: str, gl: str) -> Tuple[List[str], Optional[str]]:
+        if self.remote_budget_ms is None:
+            return await self._remote.suggest(q, hl, gl)
+        try:
+            return await asyncio.wait_for(
+                self._remote.suggest(q, hl, gl), self.remote_budget_ms / 1000.0
+            )
+        except asyncio.TimeoutError:
+            return [], f"remote suggest exceeded {self.remote_budget_ms}ms"
+
+    async def suggest(self, q: str, hl: str, gl: str) -> Tuple[List[str], Optional[str]]:
+        local, _ = await self._local.suggest(q, hl, gl)
+        if self.strategy == "replace" and len(local) >= self.limit:
+            return local, None
+        remote, err = await self._remote_suggest(q, hl, gl)
+        if self.strategy == "fallback" and remote:
+            return remote, None
+        merged = _unique_preserve_order(remote + local)
+        if self.strategy != "fallback":
+            merged = merged[: max(self.limit, len(remote))]
+        # A remote failure the corpus covered for is not an error for the tree.
+        return merged, (err if not merged else None)
+
+
+@contextlib.asynccontextmanager
+async def _suggest_provider(cfg: Dict[str, Any]) -> AsyncIterator[SuggestionProvider]:
+    """Provider for one tree build, per ``CLUSTER_TREE_SUGGEST_PROVIDER``."""
+    kind = cfg["suggest_provider"]
+    index = get_keyword_index() if kind in ("local", "merged") else None
+    if kind in ("local", "merged") and index is None:
+        logger.warning("Suggest provider %r needs CLUSTER_TREE_LOCAL_CORPUS; using Google", kind)
+    if kind == "local" and index is not None:
+        yield LocalSuggestProvider(index, cfg["local_limit"])
+        return
+    async with _suggest_client(cfg["suggest_timeout"]) as client:
+        remote = GoogleSuggestProvider(client, get_suggest_limiter())
+        if kind == "merged" and index is not None:
+            yield MergedSuggestProvider(
+                remote,
+                LocalSuggestProvider(index, cfg["local_limit"]),
+                cfg["suggest_merge"],
+                cfg["remote_budget_ms"],
+                cfg["local_limit"],
+            )
+        else:
+            yield remote
+
+
+INTENT_PROTO_LABELS = ["informational", "commercial", "transactional", "navigational"]
+INTENT_PROTO_TEXTS = [
+    "how to learn what is guide tutorial",
+    "best top reviews compare vs pricing",
+    "buy price order cheap discount sale",
+    "official website login homepage brand com",
+]
+
+_proto_cache: Dict[int, np.ndarray] = {}
+
+
+def _intent_prototype_embeddings(model: SentenceTransformer) -> np.ndarray:
+    """Prototype matrix for the embedding intent fallback, encoded once per model."""
+    key = id(model)
+    if key not in _proto_cache:
+        _proto_cache.clear()
+        _proto_cache[key] = encode_normalized(model, INTENT_PROTO_TEXTS)
+    return _proto_cache[key]
+
+
+def label_intents(labels: List[str], vecs: np.ndarray, proto_emb: np.ndarray) -> List[str]:
+    """
+    Intent for every label at once: the combined regex pass, then one matrix
+    product against the prototypes for the short labels the rules left as
+    informational. ``vecs`` holds the unit embedding of each label, row-aligned.
+    """
+    intents = classify_intents(labels)
+    short = [
+        i
+        for i, (t, intent) in enumerate(zip(labels, intents))
+        if intent == "informational" and len(t.split()) <= 2
+    ]
+    if short:
+        best = np.argmax(vecs[short] @ proto_emb.T, axis=1)
+        for i, b in zip(short, best):
+            intents[i] = INTENT_PROTO_LABELS[int(b)]
+    return intents
+
+
+def _label_tree_intents(
+    root: Dict[str, Any], vec_of: Dict[str, np.ndarray], proto_emb: np.ndarray
+) -> None:
+    """Fill in ``intent`` for every node of a finished tree in one batch."""
+    nodes: List[Dict[str, Any]] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node["children"])
+    labels = [n["label"] for n in nodes]
+    intents = label_intents(labels, np.stack([vec_of[t] for t in labels]), proto_emb)
+    for node, intent in zip(nodes, intents):
+        node["intent"] = intent
+
+
+def _select_ranked_diverse(
+    candidates: List[str], vecs: np.ndarray, anchor_vec: np.ndarray, branches: int
+) -> List[str]:
+    """Rank candidates by similarity to the anchor, then keep a diverse top slice."""
+    sims = np.dot(vecs, anchor_vec)
+    order = np.argsort(-sims)
+    ranked = [candidates[int(i)] for i in order]
+    take_k = max(4, min(branches, len(ranked)))
+    div_idx = pick_diverse_indices(vecs[order], take_k)
+    return [ranked[i] for i in div_idx][:take_k]
+
+
+def _tree_node(
+    node_id: str, label: str, intent: str, children: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    return {"id": node_id, "label": label, "intent": intent, "children": children or []}
+
+
+class TreeDeadline:
+    """
+    Absolute per-stage deadlines (event-loop clock) for one tree build.
+
+    The L2 pool fetch may use ``CLUSTER_TREE_L2_BUDGET_SHARE`` of the budget; L3
+    fetches run until the budget minus ``CLUSTER_TREE_ENCODE_RESERVE`` (kept for
+    encoding and ranking). Deadlines are absolute, so time L2 does not use rolls
+    over to L3. With no budget every stage waits for all of its fetches.
+    """
+
+    def __init__(self, budget_ms: Optional[int]) -> None:
+        self.budget_ms = budget_ms if budget_ms and budget_ms > 0 else None
+        self.l2: Optional[float] = None
+        self.l3: Optional[float] = None
+        if self.budget_ms is not None:
+            start = asyncio.get_running_loop().time()
+            budget = self.budget_ms / 1000.0
+            l2_share = float(os.getenv("CLUSTER_TREE_L2_BUDGET_SHARE", "0.4"))
+            reserve = float(os.getenv("CLUSTER_TREE_ENCODE_RESERVE", "0.15"))
+            self.l2 = start + budget * min(1.0, max(0.0, l2_share))
+            self.l3 = start + budget * min(1.0, max(0.0, 1.0 - reserve))
+        self.stages: Dict[str, Dict[str, int]] = {
+            "l2": {"total": 0, "completed": 0},
+            "l3": {"total": 0, "completed": 0},
+        }
+
+    @property
+    def hit(self) -> bool:
+        return any(st["completed"] < st["total"] for st in self.stages.values())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                **st,
+                "ratio": round(st["completed"] / st["total"], 3) if st["total"] else 1.0,
+            }
+            for name, st in self.stages.items()
+        }
+
+
+async def _gather_until(
+    coros: List[Any],
+    deadline: Optional[float],
+    progress: Optional[Dict[str, int]] = None,
+) -> List[Any]:
+    """
+    Run ``coros`` concurrently and return their results in order.
+
+    At ``deadline`` unfinished ones are cancelled and come back as None; with no
+    deadline this behaves like asyncio.gather.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    if progress is not None:
+        progress["total"] += len(tasks)
+    if not tasks:
+        return []
+    timeout = None
+    if deadline is not None:
+        timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for t in pending:
+        t.cancel()
+    if pending:
+        # Let cancelled fetches unwind so they hand their limiter slot back.
+        await asyncio.gather(*pending, return_exceptions=True)
+    if progress is not None:
+        progress["completed"] += len(done)
+    return [t.result() if t in done else None for t in tasks]
+
+
 async def _collect_l2_pool(
     bounded_suggest,
     seed: str,
     max_seed_queries: int,
     max_l2_candidates: int,
     suggest_errors: List[str],
+    deadline: Optional[TreeDeadline] = None,
 ) -> List[str]:
     queries = _build_seed_suggest_queries(seed, max_seed_queries)
-    results = await asyncio.gather(*[bounded_suggest(q) for q in queries])
+    results = await _gather_until(
+        [bounded_suggest(q) for q in queries],
+        deadline.l2 if deadline else None,
+        deadline.stages["l2"] if deadline else None,
+    )
     pool: List[str] = []
-    for sug, err in results:
+    for res in results:
+        if res is None:
+            continue
+        sug, err = res
         if err:
             suggest_errors.append(err)
         pool.extend(sug)
@@ -261,15 +603,28 @@ async def _collect_l3_map(
     max_l3_each: int,
     max_l3_subqueries: int,
     suggest_errors: List[str],
+    deadline: Optional[TreeDeadline] = None,
 ) -> Dict[str, List[str]]:
-    """For each L2 term, merge suggestions from term + question-prefixed variants."""
+    """For each L2 term, merge suggestions from term + question-prefixed variants.
+
+    Sub-queries of every term fan out at once; the shared Suggest limiter is what
+    bounds concurrency, not the shape of this loop. Sub-queries still running at
+    the L3 deadline are dropped and the term keeps whatever already arrived.
+    """
     l3_map: Dict[str, List[str]] = {}
 
     async def one_term(term: str) -> Tuple[str, List[str]]:
         subs = _build_l3_suggest_queries(term, max_l3_subqueries)
+        results = await _gather_until(
+            [bounded_suggest(sq) for sq in subs],
+            deadline.l3 if deadline else None,
+            deadline.stages["l3"] if deadline else None,
+        )
         merged: List[str] = []
-        for sq in subs:
-            sug, err = await bounded_suggest(sq)
+        for res in results:
+            if res is None:
+                continue
+            sug, err = res
             if err:
                 suggest_errors.append(err)
             merged.extend(sug)
@@ -282,6 +637,30 @@ async def _collect_l3_map(
     return l3_map
 
 
+def _tree_meta(
+    suggest_errors: List[str],
+    deduped_count: int,
+    raw_count: int,
+    deadline: TreeDeadline,
+    partial: bool = False,
+) -> Dict[str, Any]:
+    return {
+        "partial": partial or bool(suggest_errors) or deadline.hit,
+        "suggest_errors": suggest_errors[:20],
+        "deduped_count": deduped_count,
+        "raw_count": raw_count,
+        "deadline_hit": deadline.hit,
+        "time_budget_ms": deadline.budget_ms,
+        "stages": deadline.report(),
+    }
+
+
+def _time_budget_ms(req: BaseModel) -> Optional[int]:
+    if req.time_budget_ms is not None:
+        return req.time_budget_ms
+    return int(os.getenv("CLUSTER_TREE_TIME_BUDGET_MS", "0")) or None
+
+
 @router.post("/keyword-cluster")
 async def keyword_cluster(req: KeywordClusterRequest) -> Dict[str, Any]:
     if tree_embedding_model is None:
@@ -290,82 +669,103 @@ async def keyword_cluster(req: KeywordClusterRequest) -> Dict[str, Any]:
     hl = req.language_code.lower()
     gl = req.gl.lower()
     seed = _normalize_phrase(req.seed)
-    dedupe_threshold = float(os.getenv("CLUSTER_TREE_DEDUPE_THRESHOLD", "0.92"))
-    max_l3_each = int(os.getenv("CLUSTER_TREE_MAX_L3_EACH", "10"))
-    max_concurrent = int(os.getenv("CLUSTER_TREE_MAX_CONCURRENT", "5"))
-    l2_branches = int(os.getenv("CLUSTER_TREE_L2_BRANCHES", "6"))
-    l3_branches = int(os.getenv("CLUSTER_TREE_L3_BRANCHES", "6"))
-    max_seed_queries = int(os.getenv("CLUSTER_TREE_MAX_L2_SUGGEST_QUERIES", "18"))
-    max_l2_candidates = int(os.getenv("CLUSTER_TREE_MAX_L2_CANDIDATES", "30"))
-    max_l3_subqueries = int(os.getenv("CLUSTER_TREE_MAX_L3_SUBQUERIES", "3"))
-
-    suggest_errors: List[str] = []
-    timeout = float(os.getenv("CLUSTER_TREE_SUGGEST_TIMEOUT", "10"))
+    budget = _time_budget_ms(req)
+    if req.max_depth > 2:
+        return await get_tree_cache().get_or_build(
+            tree_cache_key(seed, hl, gl, req.schema_version, max_depth=req.max_depth),
+            lambda: build_keyword_tree_best_first(
+                seed,
+                hl,
+                gl,
+                req.schema_version,
+                req.max_depth,
+                time_budget_ms=budget,
+            ),
+            time_budget_ms=budget,
+        )
+    cache = get_tree_cache()
+    await cache.record_request(seed, hl, gl, req.schema_version)
+    return await cache.get_or_build(
+        tree_cache_key(seed, hl, gl, req.schema_version),
+        lambda: build_keyword_tree(seed, hl, gl, req.schema_version, time_budget_ms=budget),
+        time_budget_ms=budget,
+    )
 
-    async with httpx.AsyncClient(timeout=timeout, headers={"User-Agent": "Mozilla/5.0"}) as client:
-        sem = asyncio.Semaphore(max_concurrent)
 
-        async def bounded_suggest(q: str) -> Tuple[List[str], Optional[str]]:
-            async with sem:
-                return await fetch_suggestions(client, q, hl, gl)
-
-        l2_raw = await _collect_l2_pool(
-            bounded_suggest,
-            seed,
-            max_seed_queries,
-            max_l2_candidates,
-            suggest_errors,
-        )
+async def _fetch_tree_inputs(
+    bounded_suggest,
+    seed: str,
+    cfg: Dict[str, Any],
+    suggest_errors: List[str],
+    deadline: TreeDeadline,
+) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Suggest fan-out for one seed: the raw L2 pool and each term's L3 lines."""
+    l2_raw = await _collect_l2_pool(
+        bounded_suggest,
+        seed,
+        cfg["max_seed_queries"],
+        cfg["max_l2_candidates"],
+        suggest_errors,
+        deadline,
+    )
+    l3_map = await _collect_l3_map(
+        bounded_suggest,
+        l2_raw,
+        cfg["max_l3_each"],
+        cfg["max_l3_subqueries"],
+        suggest_errors,
+        deadline,
+    )
+    return l2_raw, l3_map
 
-        l3_map = await _collect_l3_map(
-            bounded_suggest,
-            l2_raw,
-            max_l3_each,
-            max_l3_subqueries,
-            suggest_errors,
-        )
 
-    # Flatten for embedding (unique strings)
+def _tree_texts(seed: str, l2_raw: List[str], l3_map: Dict[str, List[str]]) -> List[str]:
+    """Every unique phrase a tree for ``seed`` may need an embedding for."""
     all_texts = _unique_preserve_order(
         [seed] + list(l2_raw) + [s for v in l3_map.values() for s in v]
     )
     if seed not in all_texts:
         all_texts.insert(0, seed)
+    return all_texts
+
+
+def _assemble_tree(
+    seed: str,
+    schema_version: int,
+    l2_raw: List[str],
+    l3_map: Dict[str, List[str]],
+    suggest_errors: List[str],
+    deadline: TreeDeadline,
+    cfg: Dict[str, Any],
+    vec_of: Dict[str, np.ndarray],
+) -> Dict[str, Any]:
+    """
+    Dedupe, rank and label the fetched phrases into the root→L2→L3 tree.
+
+    ``vec_of`` must hold a unit embedding for every phrase in _tree_texts(); the
+    caller decides how those are encoded (per tree, or once for a whole batch).
+    """
+    all_texts = _tree_texts(seed, l2_raw, l3_map)
 
     if len(all_texts) == 1:
-        tree = {
-            "id": "root",
-            "label": seed,
-            "intent": classify_intent(seed),
-            "children": [],
-        }
+        tree = _tree_node("root", seed, classify_intent(seed))
         return {
-            "schema_version": req.schema_version,
+            "schema_version": schema_version,
             "seed": seed,
             "tree": tree,
-            "meta": {
-                "partial": bool(suggest_errors),
-                "suggest_errors": suggest_errors[:20],
-                "deduped_count": 1,
-                "raw_count": 1,
-            },
+            "meta": _tree_meta(suggest_errors, 1, 1, deadline),
         }
 
-    emb = encode_normalized(tree_embedding_model, all_texts)
-    mapping = dedupe_cosine_union_find(all_texts, emb, dedupe_threshold)
+    emb = np.stack([vec_of[t] for t in all_texts])
+    mapping = dedupe_cosine_union_find(all_texts, emb, cfg["dedupe_threshold"])
 
+    # Canonical phrases are members of all_texts, so their vectors are already known.
     deduped_list = _unique_preserve_order(list(dict.fromkeys(mapping[t] for t in all_texts)))
-    emb_d = encode_normalized(tree_embedding_model, deduped_list)
+    emb_d = np.stack([vec_of[t] for t in deduped_list])
     d_idx = {t: i for i, t in enumerate(deduped_list)}
 
     seed_canon = mapping.get(seed, seed)
-    if seed_canon not in d_idx:
-        deduped_list.insert(0, seed_canon)
-        emb_d = encode_normalized(tree_embedding_model, deduped_list)
-        d_idx = {t: i for i, t in enumerate(deduped_list)}
-
-    seed_i = d_idx[seed_canon]
-    seed_vec = emb_d[seed_i]
+    seed_vec = emb_d[d_idx[seed_canon]]
 
     # L2 candidates: direct children from suggest, canonicalized
     l2_candidates = _unique_preserve_order(
@@ -373,52 +773,23 @@ async def keyword_cluster(req: KeywordClusterRequest) -> Dict[str, Any]:
     )
     l2_candidates = [t for t in l2_candidates if t in d_idx]
 
-    proto_labels = ["informational", "commercial", "transactional", "navigational"]
-    proto_texts = [
-        "how to learn what is guide tutorial",
-        "best top reviews compare vs pricing",
-        "buy price order cheap discount sale",
-        "official website login homepage brand com",
-    ]
-    proto_emb = encode_normalized(tree_embedding_model, proto_texts)
-
-    def intent_for(t: str, vec: np.ndarray) -> str:
-        base = classify_intent(t)
-        if base == "informational" and len(t.split()) <= 2:
-            fb = _embedding_fallback_intent(t, vec, proto_emb, proto_labels)
-            return fb
-        return base
+    proto_emb = _intent_prototype_embeddings(tree_embedding_model)
 
     if not l2_candidates:
-        tree = {
-            "id": "root",
-            "label": seed_canon,
-            "intent": intent_for(seed_canon, seed_vec),
-            "children": [],
-        }
+        tree = _tree_node("root", seed_canon, "")
+        _label_tree_intents(tree, vec_of, proto_emb)
         return {
-            "schema_version": req.schema_version,
+            "schema_version": schema_version,
             "seed": seed,
             "tree": tree,
-            "meta": {
-                "partial": True,
-                "suggest_errors": suggest_errors[:20],
-                "deduped_count": len(deduped_list),
-                "raw_count": len(all_texts),
-            },
+            "meta": _tree_meta(
+                suggest_errors, len(deduped_list), len(all_texts), deadline, partial=True
+            ),
         }
 
-    l2_emb_idx = [d_idx[t] for t in l2_candidates]
-    l2_emb = emb_d[l2_emb_idx]
-    sim_to_seed = np.dot(l2_emb, seed_vec)
-    order = np.argsort(-sim_to_seed)
-    ranked_l2 = [l2_candidates[int(i)] for i in order]
-
-    diverse_k = max(4, min(l2_branches, len(ranked_l2)))
-    div_idx_in_ranked = pick_diverse_indices(
-        emb_d[[d_idx[t] for t in ranked_l2]], diverse_k
+    selected_l2 = _select_ranked_diverse(
+        l2_candidates, emb_d[[d_idx[t] for t in l2_candidates]], seed_vec, cfg["l2_branches"]
     )
-    selected_l2 = [ranked_l2[i] for i in div_idx_in_ranked][:diverse_k]
 
     children_nodes: List[Dict[str, Any]] = []
     nid = 0
@@ -440,64 +811,588 @@ async def keyword_cluster(req: KeywordClusterRequest) -> Dict[str, Any]:
         ]
 
         if not raw_l3:
-            children_nodes.append(
-                {
-                    "id": parent_id,
-                    "label": l2,
-                    "intent": intent_for(l2, parent_vec),
-                    "children": [],
-                }
-            )
+            children_nodes.append(_tree_node(parent_id, l2, ""))
             continue
 
-        l3_emb = emb_d[[d_idx[t] for t in raw_l3]]
-        sims = np.dot(l3_emb, parent_vec)
-        order3 = np.argsort(-sims)
-        ranked_l3 = [raw_l3[int(i)] for i in order3]
-
-        take_k = max(4, min(l3_branches, len(ranked_l3)))
-        div_l3 = pick_diverse_indices(
-            emb_d[[d_idx[t] for t in ranked_l3]], take_k
+        chosen_l3 = _select_ranked_diverse(
+            raw_l3, emb_d[[d_idx[t] for t in raw_l3]], parent_vec, cfg["l3_branches"]
         )
-        chosen_l3 = [ranked_l3[i] for i in div_l3][:take_k]
 
         leaf_nodes = []
         for c in chosen_l3:
             nid += 1
-            cv = emb_d[d_idx[c]]
-            leaf_nodes.append(
-                {
-                    "id": f"n{nid}",
-                    "label": c,
-                    "intent": intent_for(c, cv),
-                    "children": [],
-                }
+            leaf_nodes.append(_tree_node(f"n{nid}", c, ""))
+
+        children_nodes.append(_tree_node(parent_id, l2, "", leaf_nodes))
+
+    tree = _tree_node("root", seed_canon, "", children_nodes)
+    _label_tree_intents(tree, vec_of, proto_emb)
+
+    return {
+        "schema_version": schema_version,
+        "seed": seed,
+        "tree": tree,
+        "meta": _tree_meta(suggest_errors, len(deduped_list), len(all_texts), deadline),
+    }
+
+
+async def build_keyword_tree(
+    seed: str,
+    hl: str,
+    gl: str,
+    schema_version: int,
+    time_budget_ms: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch Suggest expansions for ``seed`` and assemble the ranked root→L2→L3 tree.
+
+    With ``time_budget_ms`` set, fetches still running at their stage deadline are
+    cancelled and the tree is built from what arrived (``meta.partial``).
+    """
+    cfg = _tree_settings()
+    deadline = TreeDeadline(time_budget_ms)
+    suggest_errors: List[str] = []
+    suggest_calls = 0
+
+    async with _suggest_provider(cfg) as provider:
+
+        async def bounded_suggest(q: str) -> Tuple[List[str], Optional[str]]:
+            nonlocal suggest_calls
+            suggest_calls += 1
+            return await provider.suggest(q, hl, gl)
+
+        l2_raw, l3_map = await _fetch_tree_inputs(
+            bounded_suggest, seed, cfg, suggest_errors, deadline
+        )
+
+    all_texts = _tree_texts(seed, l2_raw, l3_map)
+    vec_of: Dict[str, np.ndarray] = {}
+    encode_start = time.perf_counter()
+    if len(all_texts) > 1:
+        vec_of = dict(zip(all_texts, encode_normalized(tree_embedding_model, all_texts)))
+    encode_ms = (time.perf_counter() - encode_start) * 1000.0
+    result = _assemble_tree(
+        seed, schema_version, l2_raw, l3_map, suggest_errors, deadline, cfg, vec_of
+    )
+    result["meta"]["suggest_calls"] = suggest_calls
+    result["meta"]["encode_ms"] = round(encode_ms, 1)
+    return result
+
+
+class SharedSuggest:
+    """
+    Memoizes Suggest calls by query for one batch, so related seeds that expand
+    into the same sub-queries fetch each of them once.
+
+    Callers await a shielded task: one seed's deadline cancelling its wait does
+    not cancel a fetch another seed is still waiting on.
+    """
+
+    def __init__(self, bounded_suggest) -> None:
+        self._bounded_suggest = bounded_suggest
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.requested = 0
+
+    @property
+    def unique(self) -> int:
+        return len(self._tasks)
+
+    async def __call__(self, q: str) -> Tuple[List[str], Optional[str]]:
+        self.requested += 1
+        key = _normalize_phrase(q).lower()
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._bounded_suggest(q))
+            self._tasks[key] = task
+        return await asyncio.shield(task)
+
+    async def close(self) -> None:
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def build_keyword_trees_batch(
+    seeds: List[str],
+    hl: str,
+    gl: str,
+    schema_version: int,
+    time_budget_ms: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build trees for several seeds at once.
+
+    Suggest queries are deduplicated across seeds and the union of every tree's
+    phrases is embedded in one encode call; per-seed dedupe, ranking and intent
+    labelling then run against that shared embedding table. Returns the per-seed
+    results (in ``seeds`` order) and batch-level meta.
+    """
+    cfg = _tree_settings()
+    deadlines = {seed: TreeDeadline(time_budget_ms) for seed in seeds}
+    errors: Dict[str, List[str]] = {seed: [] for seed in seeds}
+
+    async with _suggest_provider(cfg) as provider:
+
+        async def bounded_suggest(q: str) -> Tuple[List[str], Optional[str]]:
+            return await provider.suggest(q, hl, gl)
+
+        shared = SharedSuggest(bounded_suggest)
+        try:
+            fetched = await asyncio.gather(
+                *[
+                    _fetch_tree_inputs(shared, seed, cfg, errors[seed], deadlines[seed])
+                    for seed in seeds
+                ]
             )
+        finally:
+            await shared.close()
 
-        children_nodes.append(
-            {
-                "id": parent_id,
-                "label": l2,
-                "intent": intent_for(l2, parent_vec),
-                "children": leaf_nodes,
-            }
+    texts_by_seed = {
+        seed: _tree_texts(seed, l2_raw, l3_map)
+        for seed, (l2_raw, l3_map) in zip(seeds, fetched)
+    }
+    union = list(dict.fromkeys(t for texts in texts_by_seed.values() for t in texts))
+    vec_of = dict(zip(union, encode_normalized(tree_embedding_model, union)))
+
+    results = [
+        _assemble_tree(
+            seed, schema_version, l2_raw, l3_map, errors[seed], deadlines[seed], cfg, vec_of
         )
+        for seed, (l2_raw, l3_map) in zip(seeds, fetched)
+    ]
+    meta = {
+        "seeds": len(seeds),
+        "suggest_requested": shared.requested,
+        "suggest_unique": shared.unique,
+        "encoded_texts": len(union),
+        "partial": any(r["meta"]["partial"] for r in results),
+    }
+    return results, meta
 
-    tree = {
-        "id": "root",
-        "label": seed_canon,
-        "intent": intent_for(seed_canon, seed_vec),
-        "children": children_nodes,
+
+def _deep_tree_settings() -> Dict[str, Any]:
+    return {
+        "suggest_budget": int(os.getenv("CLUSTER_TREE_DEEP_SUGGEST_BUDGET", "60")),
+        "max_nodes": int(os.getenv("CLUSTER_TREE_DEEP_MAX_NODES", "60")),
+        "branches": int(os.getenv("CLUSTER_TREE_DEEP_BRANCHES", "5")),
+        "parallel": int(os.getenv("CLUSTER_TREE_DEEP_PARALLEL_EXPANSIONS", "4")),
+        "relevance_weight": float(os.getenv("CLUSTER_TREE_DEEP_RELEVANCE_WEIGHT", "0.6")),
+        "novelty_weight": float(os.getenv("CLUSTER_TREE_DEEP_NOVELTY_WEIGHT", "0.4")),
+        "depth_decay": float(os.getenv("CLUSTER_TREE_DEEP_DEPTH_DECAY", "0.85")),
     }
 
+
+async def build_keyword_tree_best_first(
+    seed: str,
+    hl: str,
+    gl: str,
+    schema_version: int,
+    max_depth: int,
+    time_budget_ms: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Grow a tree up to ``max_depth`` levels below the root, best node first.
+
+    Every accepted node gets a priority from its relevance to the seed and its
+    novelty against the tree built so far (1 - max cosine to accepted nodes),
+    decayed by depth. The frontier is a max-heap on that priority; each round
+    expands the top ``CLUSTER_TREE_DEEP_PARALLEL_EXPANSIONS`` nodes concurrently.
+    Growth stops when the Suggest-call budget or the node budget is spent, so a
+    request gets the most informative tree for a fixed fetch and encode cost
+    instead of a fixed fan-out per level.
+    """
+    cfg = _tree_settings()
+    deep = _deep_tree_settings()
+    deadline = TreeDeadline(time_budget_ms)
+    suggest_errors: List[str] = []
+    vec_of: Dict[str, np.ndarray] = {}
+    encode_ms = 0.0
+
+    def embed(texts: List[str]) -> None:
+        nonlocal encode_ms
+        missing = [t for t in texts if t not in vec_of]
+        if missing:
+            start = time.perf_counter()
+            for t, v in zip(missing, encode_normalized(tree_embedding_model, missing)):
+                vec_of[t] = v
+            encode_ms += (time.perf_counter() - start) * 1000.0
+
+    embed([seed])
+    seed_vec = vec_of[seed]
+    root = _tree_node("root", seed, "")
+    accepted_labels: List[str] = [seed]
+    accepted_vecs: List[np.ndarray] = [seed_vec]
+    frontier: List[Tuple[float, int, Dict[str, Any], int]] = []
+    heapq.heappush(frontier, (-1.0, 0, root, 0))
+    seq = 0
+    nid = 0
+    calls_used = 0
+    expansions = 0
+
+    async with _suggest_provider(cfg) as provider:
+
+        async def bounded_suggest(q: str) -> Tuple[List[str], Optional[str]]:
+            return await provider.suggest(q, hl, gl)
+
+        while frontier and calls_used < deep["suggest_budget"] and nid < deep["max_nodes"]:
+            if deadline.l3 is not None and asyncio.get_running_loop().time() >= deadline.l3:
+                break
+            round_nodes: List[Tuple[Dict[str, Any], int, List[str]]] = []
+            while frontier and len(round_nodes) < max(1, deep["parallel"]):
+                _, _, node, depth = heapq.heappop(frontier)
+                if depth == 0:
+                    queries = _build_seed_suggest_queries(seed, cfg["max_seed_queries"])
+                else:
+                    queries = _build_l3_suggest_queries(node["label"], cfg["max_l3_subqueries"])
+                queries = queries[: deep["suggest_budget"] - calls_used]
+                if not queries:
+                    break
+                calls_used += len(queries)
+                round_nodes.append((node, depth, queries))
+            if not round_nodes:
+                break
+
+            async def expand(queries: List[str], depth: int) -> List[str]:
+                results = await _gather_until(
+                    [bounded_suggest(q) for q in queries],
+                    deadline.l2 if depth == 0 else deadline.l3,
+                    deadline.stages["l2" if depth == 0 else "l3"],
+                )
+                merged: List[str] = []
+                for res in results:
+                    if res is None:
+                        continue
+                    sug, err = res
+                    if err:
+                        suggest_errors.append(err)
+                    merged.extend(sug)
+                return _unique_preserve_order(merged)[: cfg["max_l2_candidates"]]
+
+            fetched = await asyncio.gather(*[expand(q, d) for _, d, q in round_nodes])
+            expansions += len(round_nodes)
+
+            embed([t for cands in fetched for t in cands])
+            for (node, depth, _), cands in zip(round_nodes, fetched):
+                if not cands or nid >= deep["max_nodes"]:
+                    continue
+                tree_mat = np.stack(accepted_vecs)
+                cand_mat = np.stack([vec_of[t] for t in cands])
+                # Drop near-duplicates of anything already in the tree, then of each other.
+                fresh = np.max(cand_mat @ tree_mat.T, axis=1) < cfg["dedupe_threshold"]
+                cands = [t for t, keep in zip(cands, fresh) if keep]
+                if not cands:
+                    continue
+                local = dedupe_cosine_union_find(
+                    cands, np.stack([vec_of[t] for t in cands]), cfg["dedupe_threshold"]
+                )
+                cands = _unique_preserve_order([local[t] for t in cands])
+                chosen = _select_ranked_diverse(
+                    cands,
+                    np.stack([vec_of[t] for t in cands]),
+                    vec_of[node["label"]],
+                    deep["branches"],
+                )
+                child_depth = depth + 1
+                for c in chosen:
+                    if nid >= deep["max_nodes"]:
+                        break
+                    vec = vec_of[c]
+                    novelty = 1.0 - float(np.max(np.stack(accepted_vecs) @ vec))
+                    relevance = float(np.dot(seed_vec, vec))
+                    priority = (
+                        deep["relevance_weight"] * relevance + deep["novelty_weight"] * novelty
+                    ) * (deep["depth_decay"] ** child_depth)
+                    nid += 1
+                    child = _tree_node(f"n{nid}", c, "")
+                    node["children"].append(child)
+                    accepted_labels.append(c)
+                    accepted_vecs.append(vec)
+                    if child_depth < max_depth:
+                        seq += 1
+                        heapq.heappush(frontier, (-priority, seq, child, child_depth))
+
+    _label_tree_intents(root, vec_of, _intent_prototype_embeddings(tree_embedding_model))
+    meta = _tree_meta(
+        suggest_errors, len(accepted_labels), len(vec_of), deadline, partial=not root["children"]
+    )
+    meta.update(
+        {
+            "strategy": "best_first",
+            "max_depth": max_depth,
+            "node_count": nid,
+            "suggest_calls": calls_used,
+            "expansions": expansions,
+            "encode_ms": round(encode_ms, 1),
+        }
+    )
+    return {"schema_version": schema_version, "seed": seed, "tree": root, "meta": meta}
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _node_summary(node: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": node["id"], "label": node["label"], "intent": node["intent"]}
+
+
+def _tree_events(result: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Replay a finished tree as the event sequence the streaming builder emits."""
+    tree = result["tree"]
+    yield "root", _node_summary(tree)
+    for node in tree["children"]:
+        yield "l2", {**_node_summary(node), "parent_id": tree["id"]}
+    for node in tree["children"]:
+        yield "l3", {"parent_id": node["id"], "children": node["children"]}
+    yield "done", result
+
+
+async def stream_keyword_tree(
+    seed: str,
+    hl: str,
+    gl: str,
+    schema_version: int,
+    time_budget_ms: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Build the tree stage by stage, yielding ``(event, payload)`` as parts are ready:
+    ``root``, one ``l2`` per selected branch, one ``l3`` per branch, then ``done``
+    carrying the assembled result.
+
+    Unlike build_keyword_tree there is no global gather: L3 suggestions are fetched
+    only for the selected L2 branches, and each branch is deduped, ranked and
+    emitted as soon as its own Suggest calls return.
+    """
+    cfg = _tree_settings()
+    deadline = TreeDeadline(time_budget_ms)
+    model = tree_embedding_model
+    proto_emb = _intent_prototype_embeddings(model)
+
+    def intents_of(labels: List[str]) -> List[str]:
+        return label_intents(labels, np.stack([vec_of[t] for t in labels]), proto_emb)
+    suggest_errors: List[str] = []
+    vec_of: Dict[str, np.ndarray] = {}
+
+    def embed(texts: List[str]) -> None:
+        missing = [t for t in texts if t not in vec_of]
+        if missing:
+            for t, v in zip(missing, encode_normalized(model, missing)):
+                vec_of[t] = v
+
+    async with _suggest_provider(cfg) as provider:
+
+        async def bounded_suggest(q: str) -> Tuple[List[str], Optional[str]]:
+            return await provider.suggest(q, hl, gl)
+
+        l2_task = asyncio.ensure_future(
+            _collect_l2_pool(
+                bounded_suggest,
+                seed,
+                cfg["max_seed_queries"],
+                cfg["max_l2_candidates"],
+                suggest_errors,
+                deadline,
+            )
+        )
+        branch_tasks: List[asyncio.Future] = []
+        try:
+            embed([seed])
+            root = _tree_node("root", seed, intents_of([seed])[0])
+            yield "root", _node_summary(root)
+
+            l2_raw = await l2_task
+            texts = _unique_preserve_order([seed] + l2_raw)
+            embed(texts)
+            mapping = dedupe_cosine_union_find(
+                texts, np.stack([vec_of[t] for t in texts]), cfg["dedupe_threshold"]
+            )
+            canon_seen = set(mapping.values())
+            seed_canon = mapping.get(seed, seed)
+            l2_candidates = _unique_preserve_order(
+                [mapping[t] for t in l2_raw if mapping.get(t, t) != seed_canon]
+            )
+            selected_l2: List[str] = []
+            if l2_candidates:
+                selected_l2 = _select_ranked_diverse(
+                    l2_candidates,
+                    np.stack([vec_of[t] for t in l2_candidates]),
+                    vec_of[seed_canon],
+                    cfg["l2_branches"],
+                )
+
+            branches: Dict[str, Dict[str, Any]] = {}
+            l2_intents = intents_of(selected_l2) if selected_l2 else []
+            for i, (l2, intent) in enumerate(zip(selected_l2, l2_intents), start=1):
+                node = _tree_node(f"n{i}", l2, intent)
+                branches[node["id"]] = node
+                root["children"].append(node)
+                yield "l2", {**_node_summary(node), "parent_id": "root"}
+
+            async def fetch_branch(node_id: str, l2: str) -> Tuple[str, List[str]]:
+                terms = [t for t in l2_raw if mapping.get(t, t) == l2]
+                l3_map = await _collect_l3_map(
+                    bounded_suggest,
+                    terms,
+                    cfg["max_l3_each"],
+                    cfg["max_l3_subqueries"],
+                    suggest_errors,
+                    deadline,
+                )
+                return node_id, _unique_preserve_order(
+                    [x for t in terms for x in l3_map.get(t, [])]
+                )
+
+            branch_tasks = [
+                asyncio.ensure_future(fetch_branch(node_id, node["label"]))
+                for node_id, node in branches.items()
+            ]
+            nid = len(branches)
+            for next_done in asyncio.as_completed(branch_tasks):
+                node_id, raw_l3 = await next_done
+                parent = branches[node_id]
+                l2 = parent["label"]
+                branch_texts = _unique_preserve_order([seed_canon, l2] + raw_l3)
+                embed(branch_texts)
+                local = dedupe_cosine_union_find(
+                    branch_texts,
+                    np.stack([vec_of[t] for t in branch_texts]),
+                    cfg["dedupe_threshold"],
+                )
+                excluded = {local[seed_canon], local[l2], seed_canon, l2}
+                candidates = [
+                    x
+                    for x in _unique_preserve_order([local[x] for x in raw_l3 if x in local])
+                    if x not in excluded
+                ]
+                canon_seen.update(candidates)
+                if candidates:
+                    chosen = _select_ranked_diverse(
+                        candidates,
+                        np.stack([vec_of[t] for t in candidates]),
+                        vec_of[l2],
+                        cfg["l3_branches"],
+                    )
+                    for c, intent in zip(chosen, intents_of(chosen)):
+                        nid += 1
+                        parent["children"].append(_tree_node(f"n{nid}", c, intent))
+                yield "l3", {"parent_id": node_id, "children": parent["children"]}
+        finally:
+            for task in [l2_task] + branch_tasks:
+                if not task.done():
+                    task.cancel()
+
+    yield "done", {
+        "schema_version": schema_version,
+        "seed": seed,
+        "tree": root,
+        "meta": _tree_meta(
+            suggest_errors,
+            len(canon_seen),
+            len(vec_of),
+            deadline,
+            partial=not root["children"],
+        ),
+    }
+
+
+@router.post("/keyword-cluster/stream")
+async def keyword_cluster_stream(req: KeywordClusterRequest) -> StreamingResponse:
+    """
+    Server-sent-events variant of /keyword-cluster.
+
+    Emits ``root``, ``l2`` and ``l3`` events as stages complete and a final ``done``
+    event shaped like the /keyword-cluster body. The streamed build dedupes per
+    branch rather than globally, so its trees are cached under their own key
+    and replayed from there as the same event sequence; it is never served
+    from, or written to, /keyword-cluster's cache entry. Streams are not
+    coalesced: each request that misses the cache builds its own tree.
+    """
+    if tree_embedding_model is None:
+        raise HTTPException(status_code=503, detail="Tree embedding model not loaded")
+
+    if req.max_depth > 2:
+        raise HTTPException(
+            status_code=422, detail="max_depth > 2 is not supported for streamed trees"
+        )
+
+    hl = req.language_code.lower()
+    gl = req.gl.lower()
+    seed = _normalize_phrase(req.seed)
+    key = tree_cache_key(seed, hl, gl, req.schema_version, streamed=True)
+
+    async def events() -> AsyncIterator[str]:
+        cache = get_tree_cache()
+        try:
+            cached = await cache.get(key)
+            if cached is not None:
+                cached["meta"] = {**cached.get("meta", {}), "cached": True, "coalesced": False}
+                for event, data in _tree_events(cached):
+                    yield _sse_event(event, data)
+                return
+            async for event, data in stream_keyword_tree(
+                seed, hl, gl, req.schema_version, time_budget_ms=_time_budget_ms(req)
+            ):
+                if event == "done":
+                    await cache.set(key, data)
+                    data = {**data, "meta": {**data["meta"], "cached": False, "coalesced": False}}
+                yield _sse_event(event, data)
+        except Exception as e:
+            logger.error("Keyword tree stream failed for %r: %s", seed, e, exc_info=True)
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/keyword-cluster/batch")
+async def keyword_cluster_batch(req: KeywordClusterBatchRequest) -> Dict[str, Any]:
+    """
+    Trees for many seeds in one call. Seeds already in the tree cache are served
+    from it; the rest are built together by build_keyword_trees_batch and cached.
+    """
+    if tree_embedding_model is None:
+        raise HTTPException(status_code=503, detail="Tree embedding model not loaded")
+
+    hl = req.language_code.lower()
+    gl = req.gl.lower()
+    seeds = [s for s in _unique_preserve_order(req.seeds) if s]
+    if not seeds:
+        raise HTTPException(status_code=422, detail="No non-empty seeds supplied")
+
+    cache = get_tree_cache()
+    keys = {seed: tree_cache_key(seed, hl, gl, req.schema_version) for seed in seeds}
+    by_seed: Dict[str, Dict[str, Any]] = {}
+    for seed in seeds:
+        await cache.record_request(seed, hl, gl, req.schema_version)
+        cached = await cache.get(keys[seed])
+        if cached is not None:
+            cached["meta"] = {**cached.get("meta", {}), "cached": True, "coalesced": False}
+            by_seed[seed] = cached
+
+    misses = [seed for seed in seeds if seed not in by_seed]
+    batch_meta: Dict[str, Any] = {
+        "seeds": 0,
+        "suggest_requested": 0,
+        "suggest_unique": 0,
+        "encoded_texts": 0,
+        "partial": False,
+    }
+    if misses:
+        built, batch_meta = await build_keyword_trees_batch(
+            misses, hl, gl, req.schema_version, time_budget_ms=_time_budget_ms(req)
+        )
+        for seed, result in zip(misses, built):
+            await cache.set(keys[seed], result)
+            result["meta"] = {**result["meta"], "cached": False, "coalesced": False}
+            by_seed[seed] = result
+
     return {
         "schema_version": req.schema_version,
-        "seed": seed,
-        "tree": tree,
-        "meta": {
-            "partial": bool(suggest_errors),
-            "suggest_errors": suggest_errors[:20],
-            "deduped_count": len(deduped_list),
-            "raw_count": len(all_texts),
-        },
+        "results": [by_seed[seed] for seed in seeds],
+        "meta": {**batch_meta, "seeds": len(seeds), "cache_hits": len(seeds) - len(misses)},
     }
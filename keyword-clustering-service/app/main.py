@@ -12,7 +12,11 @@ from collections import Counter
 import re
 from difflib import SequenceMatcher
 
+from app.keyword_index import get_keyword_index
 from app.keyword_tree import load_tree_embedding_model, router as keyword_tree_router
+from app.suggest_limiter import get_suggest_limiter
+from app.tree_cache import get_tree_cache
+from app.tree_prewarm import get_tree_prewarmer, prewarm_enabled
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -71,7 +75,10 @@ async def health_check():
         "service": "keyword-clustering",
         "model_loaded": model is not None,
         "tree_model_loaded": _tree_m is not None,
-        "redis_available": redis_client is not None
+        "redis_available": redis_client is not None,
+        "suggest_limiter": get_suggest_limiter().snapshot(),
+        "tree_cache": get_tree_cache().snapshot(),
+        "tree_prewarm": get_tree_prewarmer().snapshot(),
     }
 
 @app.on_event("startup")
@@ -99,6 +106,17 @@ async def load_model():
         logger.error(f"Failed to load tree embedding model: {e}")
         raise
 
+    if os.getenv("CLUSTER_TREE_SUGGEST_PROVIDER", "google").lower() != "google":
+        # Build the corpus index now rather than inside the first request.
+        get_keyword_index()
+
+    if prewarm_enabled():
+        get_tree_prewarmer().start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await get_tree_prewarmer().stop()
+
 def generate_embeddings(keywords: List[str]) -> np.ndarray:
     if model is None:
         raise RuntimeError("Model not loaded")
@@ -0,0 +1,205 @@
+"""
+Process-wide rate limiting for Google Suggest calls.
+
+Every keyword tree build in a worker shares one limiter, so concurrent requests
+cannot jointly exceed what Suggest tolerates. Admission is gated by a token
+bucket (sustained rate + burst) and an AIMD concurrency window: the window grows
+by roughly one slot per window of successful calls and is cut multiplicatively
+on HTTP 429/503 or timeouts.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_STATUS_CODES = frozenset({429, 503})
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_BACKOFF = "backoff"
+OUTCOME_ERROR = "error"
+OUTCOME_CANCELLED = "cancelled"
+
+
+def is_backoff_error(exc: BaseException) -> bool:
+    """True for failures that mean "slow down" rather than "this query is bad"."""
+    if isinstance(exc, httpx.TimeoutException):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in BACKOFF_STATUS_CODES
+    return False
+
+
+class AdaptiveSuggestLimiter:
+    """Token bucket + AIMD concurrency window shared by all tree builds."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        initial_concurrency: int,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        decrease_factor: float = 0.5,
+        backoff_cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = max(0.001, float(rate))
+        self.burst = max(1, int(burst))
+        self.min_concurrency = max(1, int(min_concurrency))
+        self.max_concurrency = max(self.min_concurrency, int(max_concurrency))
+        self.decrease_factor = min(0.95, max(0.05, float(decrease_factor)))
+        self.backoff_cooldown = max(0.0, float(backoff_cooldown))
+        self._clock = clock
+
+        self._window = float(
+            min(self.max_concurrency, max(self.min_concurrency, int(initial_concurrency)))
+        )
+        self._tokens = float(self.burst)
+        self._last_refill = clock()
+        self._last_backoff: Optional[float] = None
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.successes = 0
+        self.backoffs = 0
+        self.errors = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(self.min_concurrency, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _wake(self) -> None:
+        free = self.concurrency_limit - self._in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    async def _take_token(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._in_flight >= self.concurrency_limit:
+            fut = loop.create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # We were handed a slot but will not use it; pass it on.
+                    self._wake()
+                else:
+                    try:
+                        self._waiters.remove(fut)
+                    except ValueError:
+                        pass
+                raise
+        self._in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            self._in_flight -= 1
+            self._wake()
+            raise
+
+    def release(self, outcome: str) -> None:
+        if outcome == OUTCOME_SUCCESS:
+            self.successes += 1
+            self._window = min(float(self.max_concurrency), self._window + 1.0 / self._window)
+        elif outcome == OUTCOME_BACKOFF:
+            self.backoffs += 1
+            now = self._clock()
+            # One cut per burst of failures: calls already in flight when the
+            # first 429 arrived would otherwise collapse the window to the floor.
+            if self._last_backoff is None or now - self._last_backoff >= self.backoff_cooldown:
+                self._window = max(float(self.min_concurrency), self._window * self.decrease_factor)
+                self._tokens = min(self._tokens, 0.0)
+                self._last_backoff = now
+                logger.info(
+                    "Suggest backoff: concurrency window cut to %d", self.concurrency_limit
+                )
+        elif outcome == OUTCOME_ERROR:
+            self.errors += 1
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one admission for the duration of a Suggest call.
+
+        The outcome fed back into AIMD is derived from the exception (if any)
+        raised inside the block; the exception itself is re-raised.
+        """
+        await self.acquire()
+        outcome = OUTCOME_ERROR
+        try:
+            yield
+            outcome = OUTCOME_SUCCESS
+        except asyncio.CancelledError:
+            # Deadline cancellations say nothing about Suggest's health.
+            outcome = OUTCOME_CANCELLED
+            raise
+        except Exception as exc:
+            outcome = OUTCOME_BACKOFF if is_backoff_error(exc) else OUTCOME_ERROR
+            raise
+        finally:
+            self.release(outcome)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "tokens": round(self._tokens, 2),
+            "rate": self.rate,
+            "successes": self.successes,
+            "backoffs": self.backoffs,
+            "errors": self.errors,
+        }
+
+
+_suggest_limiter: Optional[AdaptiveSuggestLimiter] = None
+
+
+def get_suggest_limiter() -> AdaptiveSuggestLimiter:
+    """Return the worker-wide limiter, creating it from env on first use."""
+    global _suggest_limiter
+    if _suggest_limiter is None:
+        _suggest_limiter = AdaptiveSuggestLimiter(
+            rate=float(os.getenv("CLUSTER_TREE_SUGGEST_RATE", "20")),
+            burst=int(os.getenv("CLUSTER_TREE_SUGGEST_BURST", "20")),
+            initial_concurrency=int(os.getenv("CLUSTER_TREE_MAX_CONCURRENT", "5")),
+            min_concurrency=int(os.getenv("CLUSTER_TREE_SUGGEST_MIN_CONCURRENT", "1")),
+            max_concurrency=int(os.getenv("CLUSTER_TREE_SUGGEST_MAX_CONCURRENT", "32")),
+            decrease_factor=float(os.getenv("CLUSTER_TREE_SUGGEST_BACKOFF_FACTOR", "0.5")),
+            backoff_cooldown=float(os.getenv("CLUSTER_TREE_SUGGEST_BACKOFF_COOLDOWN", "1.0")),
+        )
+    return _suggest_limiter
@@ -0,0 +1,229 @@
+"""
+Single-flight coalescing and Redis result cache for keyword trees.
+
+Identical ``(seed, language_code, gl, schema_version)`` requests that arrive while
+a tree is being built await that one build instead of starting their own.
+Finished trees are stored in Redis; partial trees (some Suggest calls failed)
+get a shorter TTL so a transient throttle does not stick for hours. Trees cut
+short by a caller's ``time_budget_ms`` are never cached, and builds only
+coalesce with requests that have the same effective budget, so a truncated tree
+never reaches a caller whose own budget did not produce it.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "clustering:tree:v1:"
+POPULARITY_KEY = "clustering:tree:popular"
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional for this service
+    aioredis = None
+
+
+def tree_cache_key(
+    seed: str, hl: str, gl: str, schema_version: int, max_depth: int = 2, streamed: bool = False
+) -> str:
+    parts: list = [seed, hl, gl, int(schema_version)]
+    if max_depth != 2:
+        parts.append(int(max_depth))
+    if streamed:
+        # Streamed trees dedupe per branch and label the root with the seed as
+        # given, so they are cached apart from /keyword-cluster's trees.
+        parts.append("stream")
+    raw = json.dumps(parts, ensure_ascii=False)
+    return CACHE_PREFIX + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def tree_flight_key(key: str, time_budget_ms: Optional[int] = None) -> str:
+    """In-flight coalescing key: the cache key plus the effective time budget, if any."""
+    return key if not time_budget_ms else f"{key}:budget={int(time_budget_ms)}"
+
+
+def tree_popularity_member(seed: str, hl: str, gl: str, schema_version: int) -> str:
+    return json.dumps([seed, hl, gl, int(schema_version)], ensure_ascii=False)
+
+
+def _redis_from_env():
+    if aioredis is None:
+        return None
+    redis_url = os.getenv("REDIS_URL", os.getenv("REDIS_HOST"))
+    if not redis_url:
+        return None
+    if redis_url.startswith("redis://"):
+        return aioredis.from_url(redis_url, decode_responses=False)
+    return aioredis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0)),
+        password=os.getenv("REDIS_PASSWORD"),
+        decode_responses=False,
+    )
+
+
+def _with_cache_meta(result: Dict[str, Any], cached: bool, coalesced: bool) -> Dict[str, Any]:
+    out = dict(result)
+    out["meta"] = {**result.get("meta", {}), "cached": cached, "coalesced": coalesced}
+    return out
+
+
+class KeywordTreeCache:
+    def __init__(self, redis_client, ttl: int, partial_ttl: int) -> None:
+        self._redis = redis_client
+        self.ttl = int(ttl)
+        self.partial_ttl = int(partial_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None and self.ttl > 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    @property
+    def redis(self):
+        return self._redis if self.enabled else None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            raw = await self._redis.get(key)
+        except Exception as e:
+            logger.warning("Tree cache read failed: %s", e)
+            return None
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            logger.warning("Tree cache entry corrupt for %s: %s", key[-16:], e)
+            return None
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        meta = result.get("meta", {})
+        if meta.get("deadline_hit"):
+            # Truncated by one caller's budget; not a tree to serve to anyone else.
+            return
+        ttl = self.partial_ttl if meta.get("partial") else self.ttl
+        if ttl <= 0:
+            return
+        try:
+            await self._redis.setex(key, ttl, json.dumps(result, ensure_ascii=False))
+        except Exception as e:
+            logger.warning("Tree cache write failed: %s", e)
+
+    async def record_request(self, seed: str, hl: str, gl: str, schema_version: int) -> None:
+        """Bump the seed's request count in the popularity sorted set."""
+        if not self.enabled:
+            return
+        try:
+            await self._redis.zincrby(
+                POPULARITY_KEY, 1.0, tree_popularity_member(seed, hl, gl, schema_version)
+            )
+        except Exception as e:
+            logger.debug("Tree popularity update failed: %s", e)
+
+    async def ttl_remaining(self, key: str) -> Optional[int]:
+        """Seconds until ``key`` expires, or None when absent / cache disabled."""
+        if not self.enabled:
+            return None
+        try:
+            ttl = await self._redis.ttl(key)
+        except Exception as e:
+            logger.warning("Tree cache TTL lookup failed: %s", e)
+            return None
+        return int(ttl) if ttl is not None and ttl >= 0 else None
+
+    async def _load_or_build(
+        self,
+        key: str,
+        builder: Callable[[], Awaitable[Dict[str, Any]]],
+        use_cached: bool = True,
+    ) -> Tuple[Dict[str, Any], bool]:
+        if use_cached:
+            cached = await self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, True
+        self.misses += 1
+        result = await builder()
+        await self.set(key, result)
+        return result, False
+
+    async def get_or_build(
+        self,
+        key: str,
+        builder: Callable[[], Awaitable[Dict[str, Any]]],
+        use_cached: bool = True,
+        time_budget_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return the tree for ``key``, joining an identical in-flight build if any.
+
+        The shared build runs as its own task, so a leader whose client
+        disconnects does not cancel the work followers are waiting on. With
+        ``use_cached=False`` a fresh tree is built (and cached) even on a hit.
+        ``time_budget_ms`` is the budget ``builder`` runs under; only requests
+        with the same budget share a build.
+        """
+        flight = tree_flight_key(key, time_budget_ms)
+        fut = self._inflight.get(flight)
+        coalesced = fut is not None
+        if fut is None:
+            fut = asyncio.ensure_future(self._load_or_build(key, builder, use_cached))
+            self._inflight[flight] = fut
+            fut.add_done_callback(lambda f, k=flight: self._build_done(k, f))
+        else:
+            self.coalesced += 1
+        result, cached = await asyncio.shield(fut)
+        return _with_cache_meta(result, cached=cached, coalesced=coalesced)
+
+    def _build_done(self, key: str, fut: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not fut.cancelled() and fut.exception() is not None:
+            # Mark retrieved: every waiter may have gone away before it failed.
+            logger.debug("Tree build for %s failed: %s", key[-16:], fut.exception())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+_tree_cache: Optional[KeywordTreeCache] = None
+
+
+def get_tree_cache() -> KeywordTreeCache:
+    """Return the worker-wide tree cache, creating it from env on first use."""
+    global _tree_cache
+    if _tree_cache is None:
+        try:
+            client = _redis_from_env()
+        except Exception as e:
+            logger.warning("Redis unavailable for tree cache: %s", e)
+            client = None
+        _tree_cache = KeywordTreeCache(
+            client,
+            ttl=int(os.getenv("CLUSTER_TREE_CACHE_TTL", "21600")),
+            partial_ttl=int(os.getenv("CLUSTER_TREE_CACHE_PARTIAL_TTL", "300")),
+        )
+    return _tree_cache
@@ -0,0 +1,174 @@
+"""
+Background pre-warming of keyword trees for popular seeds.
+
+Every /keyword-cluster request bumps its seed in a Redis sorted set (see
+KeywordTreeCache.record_request). On each cycle the pre-warmer decays those
+counts, takes the top-N seeds and rebuilds any whose cached tree is missing or
+close to expiry, so hot seeds keep hitting a warm cache. Rebuilds run under a
+small concurrency budget and are skipped while foreground tree builds or queued
+Suggest calls show the worker is busy. A short Redis lock keeps only one worker
+per cycle doing the work.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.suggest_limiter import AdaptiveSuggestLimiter, get_suggest_limiter
+from app.tree_cache import POPULARITY_KEY, KeywordTreeCache, get_tree_cache, tree_cache_key
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "clustering:tree:prewarm:lock"
+
+
+class TreePrewarmer:
+    def __init__(
+        self,
+        cache: KeywordTreeCache,
+        limiter: AdaptiveSuggestLimiter,
+        interval: float,
+        top_n: int,
+        refresh_margin: int,
+        concurrency: int,
+        max_foreground: int,
+        half_life: float,
+        max_tracked: int,
+        build_tree: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = None,
+    ) -> None:
+        self._cache = cache
+        self._build_tree = build_tree
+        self._limiter = limiter
+        self.interval = max(1.0, float(interval))
+        self.top_n = max(1, int(top_n))
+        self.refresh_margin = int(refresh_margin)
+        self.concurrency = max(1, int(concurrency))
+        self.max_foreground = max(0, int(max_foreground))
+        self.half_life = max(self.interval, float(half_life))
+        self.max_tracked = max(self.top_n, int(max_tracked))
+        self._task: Optional[asyncio.Task] = None
+        self._active = 0
+        self.cycles = 0
+        self.rebuilt = 0
+        self.skipped_busy = 0
+
+    def foreground_busy(self) -> bool:
+        """True while user-facing builds or queued Suggest calls need the worker."""
+        foreground = self._cache.in_flight - self._active
+        return foreground > self.max_foreground or self._limiter.snapshot()["waiting"] > 0
+
+    async def _decay(self, redis) -> None:
+        factor = 0.5 ** (self.interval / self.half_life)
+        await redis.zunionstore(POPULARITY_KEY, {POPULARITY_KEY: factor})
+        await redis.zremrangebyscore(POPULARITY_KEY, "-inf", 0.05)
+        await redis.zremrangebyrank(POPULARITY_KEY, 0, -(self.max_tracked + 1))
+
+    async def _refresh(self, member: Any, sem: asyncio.Semaphore) -> bool:
+        if isinstance(member, bytes):
+            member = member.decode("utf-8")
+        seed, hl, gl, schema_version = json.loads(member)
+        key = tree_cache_key(seed, hl, gl, schema_version)
+        ttl = await self._cache.ttl_remaining(key)
+        if ttl is not None and ttl > self.refresh_margin:
+            return False
+        async with sem:
+            if self.foreground_busy():
+                self.skipped_busy += 1
+                return False
+            self._active += 1
+            try:
+                build_tree = self._build_tree
+                if build_tree is None:
+                    # Imported lazily: keyword_tree pulls in the embedding stack.
+                    from app.keyword_tree import build_keyword_tree as build_tree
+                await self._cache.get_or_build(
+                    key,
+                    lambda: build_tree(seed, hl, gl, schema_version),
+                    use_cached=False,
+                )
+            except Exception as e:
+                logger.warning("Pre-warm of %r failed: %s", seed, e)
+                return False
+            finally:
+                self._active -= 1
+        return True
+
+    async def run_once(self) -> int:
+        """One pre-warm cycle; returns the number of trees rebuilt."""
+        redis = self._cache.redis
+        if redis is None:
+            return 0
+        if not await redis.set(LOCK_KEY, b"1", nx=True, ex=max(1, int(self.interval))):
+            return 0
+        self.cycles += 1
+        await self._decay(redis)
+        members = await redis.zrevrange(POPULARITY_KEY, 0, self.top_n - 1)
+        sem = asyncio.Semaphore(self.concurrency)
+        refreshed = await asyncio.gather(*[self._refresh(m, sem) for m in members])
+        count = sum(1 for r in refreshed if r)
+        self.rebuilt += count
+        return count
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                count = await self.run_once()
+                if count:
+                    logger.info("Pre-warmed %d keyword trees", count)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Tree pre-warm cycle failed: %s", e)
+
+    def start(self) -> None:
+        if self._task is None and self._cache.enabled:
+            self._task = asyncio.ensure_future(self._loop())
+            logger.info(
+                "Tree pre-warmer started (top %d seeds every %ss)", self.top_n, self.interval
+            )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "cycles": self.cycles,
+            "rebuilt": self.rebuilt,
+            "skipped_busy": self.skipped_busy,
+            "active": self._active,
+        }
+
+
+_tree_prewarmer: Optional[TreePrewarmer] = None
+
+
+def get_tree_prewarmer() -> TreePrewarmer:
+    global _tree_prewarmer
+    if _tree_prewarmer is None:
+        _tree_prewarmer = TreePrewarmer(
+            get_tree_cache(),
+            get_suggest_limiter(),
+            interval=float(os.getenv("CLUSTER_TREE_PREWARM_INTERVAL", "300")),
+            top_n=int(os.getenv("CLUSTER_TREE_PREWARM_TOP_N", "50")),
+            refresh_margin=int(os.getenv("CLUSTER_TREE_PREWARM_REFRESH_MARGIN", "1800")),
+            concurrency=int(os.getenv("CLUSTER_TREE_PREWARM_CONCURRENCY", "2")),
+            max_foreground=int(os.getenv("CLUSTER_TREE_PREWARM_MAX_FOREGROUND", "1")),
+            half_life=float(os.getenv("CLUSTER_TREE_PREWARM_HALF_LIFE", "86400")),
+            max_tracked=int(os.getenv("CLUSTER_TREE_PREWARM_MAX_TRACKED", "5000")),
+        )
+    return _tree_prewarmer
+
+
+def prewarm_enabled() -> bool:
+    return os.getenv("CLUSTER_TREE_PREWARM_ENABLED", "true").lower() in ("1", "true", "yes")
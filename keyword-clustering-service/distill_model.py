@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Distil the production clustering model into a smaller student.
+
+The teacher (the fine-tuned custom model, or all-mpnet-base-v2) embeds the
+keyword corpus once; embeddings are cached in a memory-mapped file keyed by
+teacher and corpus, so repeat runs with other students or settings skip that
+pass. The student is trained to reproduce the teacher's embeddings with an MSE
+loss; when its output size differs, a linear Dense projection to the teacher's
+dimension is appended, so the saved model is a drop-in for CUSTOM_MODEL_PATH.
+
+On a held-out slice the report compares what /cluster would do with either
+model: KMeans on request-sized batches, agreement as adjusted Rand index and
+NMI between teacher and student clusterings, next to encode throughput.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+import numpy as np
+from sentence_transformers import InputExample, SentenceTransformer, losses, models
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+from torch import nn
+from torch.utils.data import DataLoader, Dataset
+
+from pair_stream import PairStream
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+sys.stdout.reconfigure(line_buffering=True) if hasattr(sys.stdout, 'reconfigure') else None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout,
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+ENCODE_CHUNK = 50_000
+
+
+def load_keywords(path: str, max_keywords: int = None) -> List[str]:
+    """Unique keywords from a text file (one per line) or a pair file (JSON/JSONL)."""
+    seen = {}
+    if path.endswith(('.json', '.jsonl', '.ndjson')):
+        for k1, k2, _ in PairStream(path):
+            seen.setdefault(k1.strip(), None)
+            seen.setdefault(k2.strip(), None)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                keyword = line.split('\t', 1)[0].strip()
+                if keyword:
+                    seen.setdefault(keyword, None)
+    keywords = [k for k in seen if k]
+    if max_keywords and len(keywords) > max_keywords:
+        keywords = random.Random(42).sample(keywords, max_keywords)
+    return keywords
+
+
+def teacher_cache_path(cache_dir: str, teacher_name: str, keywords: List[str]) -> str:
+    """Cache file for the teacher's embeddings of exactly these keywords, in this order."""
+    h = hashlib.sha256(teacher_name.encode('utf-8'))
+    if os.path.isdir(teacher_name):
+        # A retrained custom model keeps its path; key on its files too.
+        h.update(os.path.abspath(teacher_name).encode('utf-8'))
+        for name in sorted(os.listdir(teacher_name)):
+            full = os.path.join(teacher_name, name)
+            if os.path.isfile(full):
+                h.update(f"{name}:{os.path.getsize(full)}:{int(os.path.getmtime(full))}".encode('utf-8'))
+    for keyword in keywords:
+        h.update(keyword.encode('utf-8'))
+        h.update(b'\n')
+    return os.path.join(cache_dir, f'teacher-{h.hexdigest()[:16]}.npy')
+
+
+def teacher_embeddings(teacher: SentenceTransformer, keywords: List[str], path: str, batch_size: int) -> np.ndarray:
+    if os.path.exists(path):
+        logger.info(f"Using cached teacher embeddings {path}")
+        return np.load(path, mmap_mode='r')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dim = teacher.get_sentence_embedding_dimension()
+    tmp = path + '.tmp.npy'
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(len(keywords), dim))
+    for start in range(0, len(keywords), ENCODE_CHUNK):
+        batch = keywords[start:start + ENCODE_CHUNK]
+        out[start:start + len(batch)] = teacher.encode(
+            batch, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+        )
+        logger.info(f"Teacher embedded {start + len(batch):,}/{len(keywords):,} keywords")
+    out.flush()
+    del out
+    os.replace(tmp, path)
+    return np.load(path, mmap_mode='r')
+
+
+class DistillationDataset(Dataset):
+    """Keyword i paired with its teacher embedding, read from the memmap on demand."""
+
+    def __init__(self, keywords: List[str], embeddings: np.ndarray, indices: np.ndarray):
+        self.keywords = keywords
+        self.embeddings = embeddings
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        idx = int(self.indices[i])
+        return InputExample(texts=[self.keywords[idx]], label=np.array(self.embeddings[idx]))
+
+
+def build_student(student_name: str, teacher_dim: int) -> SentenceTransformer:
+    student = SentenceTransformer(student_name)
+    student_dim = student.get_sentence_embedding_dimension()
+    if student_dim != teacher_dim:
+        logger.info(f"Adding Dense projection {student_dim} -> {teacher_dim}")
+        dense = models.Dense(
+            in_features=student_dim,
+            out_features=teacher_dim,
+            bias=False,
+            activation_function=nn.Identity(),
+        )
+        student = SentenceTransformer(modules=list(student) + [dense])
+    return student
+
+
+def encode_throughput(model: SentenceTransformer, keywords: List[str], batch_size: int):
+    start = time.perf_counter()
+    emb = model.encode(keywords, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+    return emb, len(keywords) / elapsed if elapsed > 0 else float('inf')
+
+
+def comparison_report(
+    teacher: SentenceTransformer,
+    student: SentenceTransformer,
+    keywords: List[str],
+    batch_size: int,
+    request_size: int,
+    num_clusters: int,
+) -> dict:
+    """Teacher vs student on held-out keywords: clustering agreement and encode speed."""
+    teacher_emb, teacher_rate = encode_throughput(teacher, keywords, batch_size)
+    student_emb, student_rate = encode_throughput(student, keywords, batch_size)
+
+    aris, nmis = [], []
+    for start in range(0, len(keywords) - num_clusters + 1, request_size):
+        t_batch = teacher_emb[start:start + request_size]
+        s_batch = student_emb[start:start + request_size]
+        k = min(num_clusters, len(t_batch))
+        # Same settings as /cluster.
+        t_labels = KMeans(n_clusters=k, random_state=42, n_init=10, max_iter=300).fit_predict(t_batch)
+        s_labels = KMeans(n_clusters=k, random_state=42, n_init=10, max_iter=300).fit_predict(s_batch)
+        aris.append(adjusted_rand_score(t_labels, s_labels))
+        nmis.append(normalized_mutual_info_score(t_labels, s_labels))
+
+    t_unit = teacher_emb / np.maximum(np.linalg.norm(teacher_emb, axis=1, keepdims=True), 1e-12)
+    s_unit = student_emb / np.maximum(np.linalg.norm(student_emb, axis=1, keepdims=True), 1e-12)
+    return {
+        'eval_keywords': len(keywords),
+        'request_size': request_size,
+        'num_clusters': num_clusters,
+        'cluster_batches': len(aris),
+        'adjusted_rand_mean': round(float(np.mean(aris)), 4) if aris else None,
+        'nmi_mean': round(float(np.mean(nmis)), 4) if nmis else None,
+        'embedding_cosine_mean': round(float(np.mean(np.sum(t_unit * s_unit, axis=1))), 4),
+        'embedding_mse': round(float(np.mean((teacher_emb - student_emb) ** 2)), 6),
+        'teacher_keywords_per_second': round(teacher_rate, 1),
+        'student_keywords_per_second': round(student_rate, 1),
+        'speedup': round(student_rate / teacher_rate, 2) if teacher_rate else None,
+    }
+
+
+def distill(
+    keywords_file: str,
+    output_dir: str,
+    teacher_name: str,
+    student_name: str,
+    cache_dir: str,
+    max_keywords: int = None,
+    eval_keywords: int = 5000,
+    epochs: int = 1,
+    batch_size: int = 64,
+    learning_rate: float = 1e-4,
+    warmup_steps: int = 500,
+    num_workers: int = 0,
+    request_size: int = 500,
+    num_clusters: int = 20,
+):
+    start_time = datetime.now()
+    keywords = load_keywords(keywords_file, max_keywords)
+    logger.info(f"Loaded {len(keywords):,} unique keywords")
+    if len(keywords) <= eval_keywords:
+        raise ValueError(f"Need more than {eval_keywords:,} keywords (have {len(keywords):,})")
+
+    logger.info(f"Loading teacher: {teacher_name}...")
+    teacher = SentenceTransformer(teacher_name)
+    embeddings = teacher_embeddings(
+        teacher, keywords, teacher_cache_path(cache_dir, teacher_name, keywords), batch_size
+    )
+
+    order = np.random.default_rng(42).permutation(len(keywords))
+    eval_idx, train_idx = order[:eval_keywords], order[eval_keywords:]
+
+    logger.info(f"Loading student: {student_name}...")
+    student = build_student(student_name, embeddings.shape[1])
+    train_dataloader = DataLoader(
+        DistillationDataset(keywords, embeddings, train_idx),
+        shuffle=True,
+        batch_size=batch_size,
+        num_workers=num_workers,
+    )
+    train_loss = losses.MSELoss(model=student)
+
+    logger.info(f"Training student on {len(train_idx):,} keywords for {epochs} epoch(s)...")
+    student.fit(
+        train_objectives=[(train_dataloader, train_loss)],
+        epochs=epochs,
+        warmup_steps=warmup_steps,
+        optimizer_params={'lr': learning_rate},
+        show_progress_bar=sys.stdout.isatty(),
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    student.save(output_dir)
+    logger.info(f"Student saved to {output_dir}")
+
+    logger.info("Comparing teacher and student on held-out keywords...")
+    report = comparison_report(
+        teacher, student, [keywords[int(i)] for i in eval_idx], batch_size, request_size, num_clusters
+    )
+    report.update({
+        'teacher': teacher_name,
+        'student': student_name,
+        'train_keywords': len(train_idx),
+        'epochs': epochs,
+        'batch_size': batch_size,
+        'learning_rate': learning_rate,
+        'training_started': start_time.isoformat(),
+        'training_completed': datetime.now().isoformat(),
+    })
+    report_path = os.path.join(output_dir, 'distillation_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("=" * 60)
+    logger.info(f"Clustering agreement: ARI {report['adjusted_rand_mean']}, NMI {report['nmi_mean']}")
+    logger.info(
+        f"Encode throughput: teacher {report['teacher_keywords_per_second']}/s, "
+        f"student {report['student_keywords_per_second']}/s ({report['speedup']}x)"
+    )
+    logger.info(f"Report saved to {report_path}")
+    logger.info("=" * 60)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Distil the clustering model into a smaller student model',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('keywords', help='Keyword file (one per line) or training pair file (JSON/JSONL)')
+    parser.add_argument('--output-dir', default='./models/distilled-keyword-clustering', help='Directory to save the student')
+    parser.add_argument(
+        '--teacher',
+        default=None,
+        help='Teacher model (default: CUSTOM_MODEL_PATH if trained, else all-mpnet-base-v2)'
+    )
+    parser.add_argument('--student', default='nreimers/MiniLM-L6-H384-uncased', help='Student base model')
+    parser.add_argument('--cache-dir', default='./data/teacher_cache', help='Teacher embedding cache directory')
+    parser.add_argument('--max-keywords', type=int, default=None, help='Sample at most this many keywords')
+    parser.add_argument('--eval-keywords', type=int, default=5000, help='Held-out keywords for the report')
+    parser.add_argument('--epochs', type=int, default=1, help='Training epochs')
+    parser.add_argument('--batch-size', type=int, default=64, help='Batch size')
+    parser.add_argument('--learning-rate', type=float, default=1e-4, help='Learning rate')
+    parser.add_argument('--warmup-steps', type=int, default=500, help='Warmup steps')
+    parser.add_argument('--num-workers', type=int, default=0, help='DataLoader worker processes')
+    parser.add_argument('--request-size', type=int, default=500, help='Keywords per simulated /cluster request')
+    parser.add_argument('--num-clusters', type=int, default=20, help='Clusters per simulated request')
+    args = parser.parse_args()
+
+    teacher = args.teacher
+    if teacher is None:
+        custom = os.getenv('CUSTOM_MODEL_PATH', './models/custom-keyword-clustering')
+        teacher = custom if os.path.isdir(custom) else 'sentence-transformers/all-mpnet-base-v2'
+
+    if not os.path.exists(args.keywords):
+        logger.error(f"Keyword file not found: {args.keywords}")
+        return 1
+
+    try:
+        distill(
+            keywords_file=args.keywords,
+            output_dir=args.output_dir,
+            teacher_name=teacher,
+            student_name=args.student,
+            cache_dir=args.cache_dir,
+            max_keywords=args.max_keywords,
+            eval_keywords=args.eval_keywords,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            learning_rate=args.learning_rate,
+            warmup_steps=args.warmup_steps,
+            num_workers=args.num_workers,
+            request_size=args.request_size,
+            num_clusters=args.num_clusters,
+        )
+        return 0
+    except Exception as e:
+        logger.error(f"Distillation failed: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Hard-negative and positive pair mining over an approximate nearest-neighbour index.
+
+The keyword vocabulary is embedded once (memory-mapped to disk) and indexed for
+inner-product search. Worker processes then walk the vocabulary in shards: every
+keyword's nearest neighbours that belong to a different group become hard
+negatives (close in embedding space, labelled dissimilar), neighbours from the
+same group become positives, topped up with random group members when the
+neighbourhood has too few. Pairs are deduplicated order-independently and
+written as JSONL shards that pair_stream / the training scripts read directly.
+
+Groups come from either
+  --vocab FILE   keyword<TAB>group per line (keywords without a group are skipped)
+  --pairs FILE   an existing pair file: keywords joined by pairs with similarity
+                 >= --positive-threshold form one group (union-find)
+
+The index is faiss (HNSW) when installed, otherwise an inverted-file index on
+k-means centroids built with numpy/scikit-learn.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pair_stream import PairStream
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; the numpy IVF index is the fallback
+    faiss = None
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout,
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+ENCODE_CHUNK = 100_000
+
+
+def load_vocab_groups(path: str) -> Tuple[List[str], np.ndarray]:
+    keywords: List[str] = []
+    groups: List[int] = []
+    group_ids: Dict[str, int] = {}
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            keyword, _, group = line.rstrip('\n').partition('\t')
+            keyword = ' '.join(keyword.split()).lower()
+            if not keyword or keyword in seen:
+                continue
+            seen.add(keyword)
+            keywords.append(keyword)
+            groups.append(group_ids.setdefault(group, len(group_ids)) if group else -1)
+    return keywords, np.asarray(groups, dtype=np.int64)
+
+
+def groups_from_pairs(path: str, positive_threshold: float) -> Tuple[List[str], np.ndarray]:
+    ids: Dict[str, int] = {}
+    parent: List[int] = []
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def kid(keyword: str) -> int:
+        keyword = ' '.join(keyword.split()).lower()
+        if keyword not in ids:
+            ids[keyword] = len(parent)
+            parent.append(len(parent))
+        return ids[keyword]
+
+    for k1, k2, similarity in PairStream(path):
+        a, b = kid(k1), kid(k2)
+        if similarity >= positive_threshold:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[ra] = rb
+    groups = np.asarray([find(i) for i in range(len(parent))], dtype=np.int64)
+    return list(ids), groups
+
+
+def embed_vocab(model_name: str, keywords: List[str], path: str, batch_size: int) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    dim = model.get_sentence_embedding_dimension()
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(keywords), dim))
+    for start in range(0, len(keywords), ENCODE_CHUNK):
+        batch = keywords[start:start + ENCODE_CHUNK]
+        out[start:start + len(batch)] = model.encode(
+            batch,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        logger.info(f"Embedded {start + len(batch):,}/{len(keywords):,} keywords")
+    out.flush()
+    del out
+    return np.load(path, mmap_mode='r')
+
+
+class IVFIndex:
+    """Inverted-file inner-product index: vectors bucketed by nearest k-means centroid."""
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray, nprobe: int):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = min(nprobe, len(centroids))
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int, nprobe: int, seed: int = 0) -> 'IVFIndex':
+        from sklearn.cluster import MiniBatchKMeans
+
+        n = len(vectors)
+        nlist = max(1, min(nlist, n // 8 or 1))
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))]
+        km = MiniBatchKMeans(n_clusters=nlist, batch_size=4096, n_init=1, random_state=seed)
+        km.fit(sample)
+        centroids = km.cluster_centers_.astype(np.float32)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, ENCODE_CHUNK):
+            block = np.asarray(vectors[start:start + ENCODE_CHUNK])
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind='stable').astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        return cls(centroids, order, offsets, nprobe)
+
+    def save(self, directory: str) -> None:
+        np.save(os.path.join(directory, 'ivf_centroids.npy'), self.centroids)
+        np.save(os.path.join(directory, 'ivf_order.npy'), self.order)
+        np.save(os.path.join(directory, 'ivf_offsets.npy'), self.offsets)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int) -> 'IVFIndex':
+        return cls(
+            np.load(os.path.join(directory, 'ivf_centroids.npy')),
+            np.load(os.path.join(directory, 'ivf_order.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, 'ivf_offsets.npy')),
+            nprobe,
+        )
+
+    def search(self, vectors: np.ndarray, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.nprobe]
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (q, lists) in enumerate(zip(queries, probes)):
+            # Sorted ids keep the memmap reads sequential.
+            cand = np.sort(np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists]))
+            if not len(cand):
+                continue
+            cand_sims = np.asarray(vectors[cand]) @ q
+            take = min(k, len(cand))
+            top = np.argpartition(-cand_sims, take - 1)[:take]
+            top = top[np.argsort(-cand_sims[top])]
+            ids[row, :take] = cand[top]
+            sims[row, :take] = cand_sims[top]
+        return ids, sims
+
+
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(workdir: str, params: dict) -> None:
+    _worker['vectors'] = np.load(os.path.join(workdir, 'embeddings.npy'), mmap_mode='r')
+    _worker['groups'] = np.load(os.path.join(workdir, 'groups.npy'), mmap_mode='r')
+    _worker['params'] = params
+    if params['backend'] == 'faiss':
+        faiss.omp_set_num_threads(1)
+        index = faiss.read_index(os.path.join(workdir, 'faiss.index'))
+        index.hnsw.efSearch = max(params['neighbors'] * 2, 64)
+        _worker['index'] = index
+    else:
+        _worker['index'] = IVFIndex.load(workdir, params['nprobe'])
+    # Members of each group, for positive top-up.
+    groups = np.asarray(_worker['groups'])
+    order = np.argsort(groups, kind='stable')
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(groups[order])) + 1, [len(order)]])
+    _worker['group_members'] = {
+        int(groups[order[s]]): order[s:e] for s, e in zip(bounds[:-1], bounds[1:]) if groups[order[s]] >= 0
+    }
+
+
+def _mine_shard(bounds: Tuple[int, int]) -> np.ndarray:
+    start, end = bounds
+    vectors = _worker['vectors']
+    groups = _worker['groups']
+    p = _worker['params']
+    rng = np.random.default_rng(p['seed'] + start)
+    query_ids = np.arange(start, end)[np.asarray(groups[start:end]) >= 0]
+    if not len(query_ids):
+        return np.empty((0, 3), dtype=np.float64)
+    queries = np.asarray(vectors[query_ids])
+    k = p['neighbors'] + 1
+    if p['backend'] == 'faiss':
+        sims, ids = _worker['index'].search(queries, k)
+    else:
+        ids, sims = _worker['index'].search(vectors, queries, k)
+
+    rows: List[Tuple[int, int, float]] = []
+    for qi, nbr_ids, nbr_sims in zip(query_ids, ids, sims):
+        group = groups[qi]
+        negatives = positives = 0
+        for nid, sim in zip(nbr_ids, nbr_sims):
+            if nid < 0 or nid == qi:
+                continue
+            ngroup = groups[nid]
+            if ngroup < 0:
+                continue
+            if ngroup != group:
+                # Near-identical phrases in different groups are more likely
+                # labelling gaps than true negatives.
+                if negatives < p['negatives'] and sim < p['max_negative_sim']:
+                    rows.append((qi, nid, p['negative_label']))
+                    negatives += 1
+            elif positives < p['positives']:
+                rows.append((qi, nid, p['positive_label']))
+                positives += 1
+        members = _worker['group_members'].get(int(group))
+        if positives < p['positives'] and members is not None and len(members) > 1:
+            for nid in rng.choice(members, size=min(len(members), p['positives'] * 2), replace=False):
+                if positives >= p['positives']:
+                    break
+                if nid != qi:
+                    rows.append((qi, int(nid), p['positive_label']))
+                    positives += 1
+        for _ in range(p['random_negatives']):
+            nid = int(rng.integers(len(groups)))
+            if groups[nid] >= 0 and groups[nid] != group:
+                rows.append((qi, nid, p['negative_label']))
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def dedupe_pairs(rows: np.ndarray, n: int) -> np.ndarray:
+    """Drop (a, b)/(b, a) repeats; the first label seen for a pair wins."""
+    a = rows[:, 0].astype(np.int64)
+    b = rows[:, 1].astype(np.int64)
+    key = np.minimum(a, b) * n + np.maximum(a, b)
+    _, first = np.unique(key, return_index=True)
+    return rows[np.sort(first)]
+
+
+def write_shards(rows: np.ndarray, keywords: List[str], output_dir: str, shard_size: int, seed: int) -> List[str]:
+    os.makedirs(output_dir, exist_ok=True)
+    rows = rows[np.random.default_rng(seed).permutation(len(rows))]
+    paths = []
+    for shard, start in enumerate(range(0, len(rows), shard_size)):
+        path = os.path.join(output_dir, f'pairs-{shard:05d}.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for a, b, label in rows[start:start + shard_size]:
+                f.write(json.dumps([keywords[int(a)], keywords[int(b)], float(label)], ensure_ascii=False))
+                f.write('\n')
+        paths.append(path)
+    return paths
+
+
+def mine_pairs(args: argparse.Namespace) -> dict:
+    start_time = time.time()
+    if args.vocab:
+        keywords, groups = load_vocab_groups(args.vocab)
+    else:
+        keywords, groups = groups_from_pairs(args.pairs, args.positive_threshold)
+    n = len(keywords)
+    labelled = int((groups >= 0).sum())
+    logger.info(f"Vocabulary: {n:,} keywords, {labelled:,} with a group, {len(np.unique(groups[groups >= 0])):,} groups")
+
+    workdir = tempfile.mkdtemp(prefix='mine-', dir=args.work_dir)
+    try:
+        np.save(os.path.join(workdir, 'groups.npy'), groups)
+        t = time.time()
+        vectors = embed_vocab(args.model, keywords, os.path.join(workdir, 'embeddings.npy'), args.batch_size)
+        encode_s = time.time() - t
+
+        t = time.time()
+        backend = 'faiss' if faiss is not None and not args.no_faiss else 'ivf'
+        if backend == 'faiss':
+            index = faiss.IndexHNSWFlat(vectors.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            for start in range(0, n, ENCODE_CHUNK):
+                index.add(np.ascontiguousarray(vectors[start:start + ENCODE_CHUNK]))
+            faiss.write_index(index, os.path.join(workdir, 'faiss.index'))
+            del index
+        else:
+            nlist = args.nlist or int(4 * np.sqrt(n))
+            IVFIndex.build(vectors, nlist, args.nprobe, args.seed).save(workdir)
+        index_s = time.time() - t
+        logger.info(f"Built {backend} index in {index_s:.1f}s")
+
+        params = {
+            'backend': backend,
+            'neighbors': args.neighbors,
+            'nprobe': args.nprobe,
+            'negatives': args.negatives_per_keyword,
+            'positives': args.positives_per_keyword,
+            'random_negatives': args.random_negatives_per_keyword,
+            'max_negative_sim': args.max_negative_similarity,
+            'positive_label': args.positive_label,
+            'negative_label': args.negative_label,
+            'seed': args.seed,
+        }
+        shards = [(s, min(n, s + args.shard_keywords)) for s in range(0, n, args.shard_keywords)]
+        t = time.time()
+        workers = args.workers or os.cpu_count() or 1
+        if workers > 1:
+            with mp.Pool(workers, initializer=_init_worker, initargs=(workdir, params)) as pool:
+                parts = pool.map(_mine_shard, shards, chunksize=1)
+        else:
+            _init_worker(workdir, params)
+            parts = [_mine_shard(s) for s in shards]
+        rows = np.concatenate(parts) if parts else np.empty((0, 3))
+        mined = len(rows)
+        rows = dedupe_pairs(rows, n)
+        mine_s = time.time() - t
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    paths = write_shards(rows, keywords, args.output_dir, args.output_shard_size, args.seed)
+    positives = int((rows[:, 2] == args.positive_label).sum()) if len(rows) else 0
+    report = {
+        'keywords': n,
+        'backend': backend,
+        'pairs': len(rows),
+        'duplicates_dropped': mined - len(rows),
+        'positive_count': positives,
+        'negative_count': len(rows) - positives,
+        'encode_seconds': round(encode_s, 1),
+        'index_seconds': round(index_s, 1),
+        'mine_seconds': round(mine_s, 1),
+        'total_seconds': round(time.time() - start_time, 1),
+        'shards': paths,
+    }
+    with open(os.path.join(args.output_dir, 'mining_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote {len(rows):,} pairs ({positives:,} positive) to {len(paths)} shards in {args.output_dir}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mine hard-negative and positive keyword pairs with an ANN index',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--vocab', help='keyword<TAB>group file')
+    source.add_argument('--pairs', help='Existing pair file (JSON/JSONL) to derive groups from')
+    parser.add_argument('--output-dir', default='./data/mined_pairs', help='Directory for JSONL shards')
+    parser.add_argument('--model', default='sentence-transformers/all-mpnet-base-v2', help='Embedding model')
+    parser.add_argument('--batch-size', type=int, default=256, help='Encode batch size')
+    parser.add_argument('--positive-threshold', type=float, default=0.5, help='Similarity that links keywords into a group (--pairs)')
+    parser.add_argument('--neighbors', type=int, default=30, help='Neighbours retrieved per keyword')
+    parser.add_argument('--negatives-per-keyword', type=int, default=5, help='Hard negatives per keyword')
+    parser.add_argument('--positives-per-keyword', type=int, default=3, help='Positives per keyword')
+    parser.add_argument('--random-negatives-per-keyword', type=int, default=1, help='Easy random negatives per keyword')
+    parser.add_argument('--max-negative-similarity', type=float, default=0.95, help='Skip negatives more similar than this')
+    parser.add_argument('--positive-label', type=float, default=1.0)
+    parser.add_argument('--negative-label', type=float, default=0.0)
+    parser.add_argument('--nlist', type=int, default=0, help='IVF lists (0 = 4*sqrt(n))')
+    parser.add_argument('--nprobe', type=int, default=8, help='IVF lists searched per query')
+    parser.add_argument('--no-faiss', action='store_true', help='Use the numpy IVF index even if faiss is installed')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = CPU count)')
+    parser.add_argument('--shard-keywords', type=int, default=20000, help='Keywords per worker task')
+    parser.add_argument('--output-shard-size', type=int, default=1_000_000, help='Pairs per JSONL shard')
+    parser.add_argument('--work-dir', default=None, help='Scratch directory for embeddings and index')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        mine_pairs(args)
+        return 0
+    except Exception as e:
+        logger.error(f"Pair mining failed: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for training-pair files.
+
+Training files can be several GB; json.load on them (plus the list of pairs it
+produces) is what OOMs the training container. PairStream walks the file
+incrementally and yields one pair at a time, so callers that sample or chunk
+the stream hold only what they keep.
+
+Supported layouts:
+  {"training_pairs": [[k1, k2, sim], ...], "positive_count": ..., ...}
+  {"pairs": [{"keyword1": ..., "keyword2": ..., "similarity": ...}, ...]}
+  [[k1, k2, sim], ...]
+  .jsonl / .ndjson - one pair (list or object) per line
+"""
+
+import json
+import logging
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str, float]
+
+PAIR_LIST_KEYS = ('training_pairs', 'pairs')
+READ_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def to_pair(item: Any) -> Optional[Pair]:
+    """Normalize a ``[k1, k2, sim]`` list or a keyword1/keyword2/similarity object."""
+    try:
+        if isinstance(item, (list, tuple)) and len(item) == 3:
+            return str(item[0]), str(item[1]), float(item[2])
+        if isinstance(item, dict):
+            return str(item['keyword1']), str(item['keyword2']), float(item['similarity'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+class _Buffer:
+    """Text window over a file that grows on demand and drops consumed input."""
+
+    def __init__(self, f) -> None:
+        self._f = f
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_ws(self) -> None:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        self.skip_ws()
+        return self.text[self.pos] if self.pos < len(self.text) else ''
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"Expected {ch!r} at offset {self.pos}, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more input until it is complete."""
+        self.skip_ws()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number at the very end of the window may continue in the next read.
+            if end == len(self.text) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+
+class PairStream:
+    """
+    Iterate ``(keyword1, keyword2, similarity)`` pairs from a pair file without
+    loading it whole. Scalar top-level fields seen along the way (for example
+    ``positive_count``) are collected in ``meta``; ``count`` and ``skipped``
+    are updated as the stream is consumed. Invalid pairs and malformed JSONL
+    lines are skipped and counted in ``skipped``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.count = 0
+        self.skipped = 0
+
+    def __iter__(self) -> Iterator[Pair]:
+        for item in self._items():
+            pair = to_pair(item)
+            if pair is None:
+                self._skip(f"Invalid pair format: {item!r}")
+                continue
+            self.count += 1
+            yield pair
+
+    def _skip(self, message: str) -> None:
+        self.skipped += 1
+        if self.skipped <= 10:
+            logger.warning(message)
+
+    def _items(self) -> Iterator[Any]:
+        if self.path.endswith(('.jsonl', '.ndjson')):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for lineno, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except ValueError as e:
+                        self._skip(f"{self.path}:{lineno}: malformed JSON line skipped ({e})")
+                        continue
+                    yield item
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            buf = _Buffer(f)
+            first = buf.peek()
+            if first == '[':
+                yield from self._array(buf)
+            elif first == '{':
+                yield from self._object(buf)
+            elif first:
+                raise ValueError(f"{self.path}: expected a JSON array or object")
+
+    def _array(self, buf: _Buffer) -> Iterator[Any]:
+        buf.expect('[')
+        if buf.peek() == ']':
+            buf.pos += 1
+            return
+        while True:
+            yield buf.value()
+            if buf.peek() == ',':
+                buf.pos += 1
+                continue
+            buf.expect(']')
+            return
+
+    def _object(self, buf: _Buffer) -> Iterator[Any]:
+        buf.expect('{')
+        if buf.peek() == '}':
+            return
+        streamed = False
+        while True:
+            key = buf.value()
+            buf.expect(':')
+            if key in PAIR_LIST_KEYS and not streamed and buf.peek() == '[':
+                streamed = True
+                yield from self._array(buf)
+            else:
+                value = buf.value()
+                if not isinstance(value, (dict, list)):
+                    self.meta[key] = value
+            if buf.peek() == ',':
+                buf.pos += 1
+                continue
+            buf.expect('}')
+            return
+
+
+def reservoir_sample(
+    items: Iterable[Pair], k: int, rng: Optional[random.Random] = None
+) -> List[Pair]:
+    """Uniform sample of ``k`` items in one pass (all of them if there are fewer), shuffled."""
+    rng = rng or random.Random()
+    reservoir: List[Pair] = []
+    for seen, item in enumerate(items):
+        if seen < k:
+            reservoir.append(item)
+        else:
+            j = rng.randint(0, seen)
+            if j < k:
+                reservoir[j] = item
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+def to_input_example(pair: Pair):
+    from sentence_transformers import InputExample
+
+    keyword1, keyword2, similarity = pair
+    return InputExample(texts=[keyword1, keyword2], label=float(similarity))
+
+
+def iter_example_chunks(pairs: Iterable[Pair], chunk_size: int) -> Iterator[list]:
+    """Yield lists of up to ``chunk_size`` InputExamples, consuming ``pairs`` lazily."""
+    chunk = []
+    for pair in pairs:
+        chunk.append(to_input_example(pair))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
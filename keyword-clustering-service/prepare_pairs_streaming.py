@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Streaming, parallel preparation of training-pair files.
+
+prepare_training_data.py and prepare_dataset_for_training.py hold every pair in
+memory and never drop mirrored duplicates. This pipeline keeps only bounded
+buffers in memory and spills everything else to disk:
+
+  1. Read    worker processes parse input shards (JSON, JSONL, CSV; large JSONL
+             files are split into byte ranges), normalize keywords, drop
+             self-pairs and out-of-range similarities, and hash each pair with
+             its keywords sorted, so (a, b) and (b, a) hash the same. Pairs are
+             spooled to disk partitioned by hash.
+  2. Dedupe  one worker per partition loads its spool files, in input order,
+             into an on-disk SQLite table keyed by the pair hash; the first
+             occurrence of a pair wins.
+  3. Balance every pair also carries a seeded pseudo-random sort key. Taking the
+             lowest keys of a similarity bucket is a uniform sample of that
+             bucket (a reservoir whose contents don't depend on worker
+             scheduling), and merging the buckets by key shuffles the output.
+  4. Write   JSONL shards of ``[keyword1, keyword2, similarity]`` lines that
+             pair_stream and the training scripts read directly.
+
+Memory is bounded by the SQLite page cache and the merge buffers; input size is
+limited by disk only.
+"""
+
+import argparse
+import bisect
+import csv
+import glob
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pair_stream import Pair, PairStream, to_pair
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout,
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+INPUT_SUFFIXES = ('.json', '.jsonl', '.ndjson', '.csv')
+INSERT_BATCH = 50_000
+
+# (path, byte start, byte end); end is None for whole-file tasks.
+Task = Tuple[str, int, Optional[int]]
+
+
+def normalize_keyword(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+def pair_hash(keyword1: str, keyword2: str) -> bytes:
+    """Order-independent 8-byte digest of a normalized pair."""
+    a, b = sorted((keyword1, keyword2))
+    return hashlib.blake2b(f'{a}\x1f{b}'.encode('utf-8'), digest_size=8).digest()
+
+
+def sort_key(digest: bytes, seed: int) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(digest, digest_size=8, key=str(seed).encode('utf-8')).digest(), 'big', signed=True
+    )
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(
+                p for p in sorted(glob.glob(os.path.join(item, '**', '*'), recursive=True))
+                if p.endswith(INPUT_SUFFIXES)
+            )
+        else:
+            paths.extend(sorted(glob.glob(item)) or [item])
+    return paths
+
+
+def plan_tasks(paths: List[str], split_bytes: int) -> List[Task]:
+    """One task per file; JSONL files larger than ``split_bytes`` become byte ranges."""
+    tasks: List[Task] = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith(('.jsonl', '.ndjson')) and split_bytes and size > split_bytes:
+            tasks.extend((path, start, min(size, start + split_bytes)) for start in range(0, size, split_bytes))
+        else:
+            tasks.append((path, 0, None))
+    return tasks
+
+
+def _jsonl_range(path: str, start: int, end: int) -> Iterator[Pair]:
+    """Pairs from lines that start inside [start, end)."""
+    with open(path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            # Finish the line that straddles ``start``; it belongs to the previous range.
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                try:
+                    yield to_pair(json.loads(line))
+                except ValueError:
+                    yield None
+
+
+def _csv_pairs(path: str) -> Iterator[Pair]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield to_pair(row)
+
+
+def read_task(task: Task) -> Iterable[Optional[Pair]]:
+    path, start, end = task
+    if end is not None:
+        return _jsonl_range(path, start, end)
+    if path.endswith('.csv'):
+        return _csv_pairs(path)
+    return PairStream(path)
+
+
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(params: dict) -> None:
+    _worker['params'] = params
+
+
+def _spool_task(indexed_task: Tuple[int, Task]) -> Dict[str, int]:
+    """Normalize one input task into per-partition spool files."""
+    task_id, task = indexed_task
+    p = _worker['params']
+    edges = p['bucket_edges']
+    partitions = p['partitions']
+    files = [
+        open(os.path.join(p['workdir'], f'spool-{part:04d}-{task_id:06d}.tsv'), 'w', encoding='utf-8')
+        for part in range(partitions)
+    ]
+    stats = {'read': 0, 'invalid': 0, 'filtered': 0, 'spooled': 0}
+    pairs = read_task(task)
+    try:
+        for pair in pairs:
+            stats['read'] += 1
+            if pair is None:
+                stats['invalid'] += 1
+                continue
+            k1, k2 = normalize_keyword(pair[0]), normalize_keyword(pair[1])
+            sim = pair[2]
+            if not k1 or not k2 or k1 == k2 or math.isnan(sim) or not p['min_similarity'] <= sim <= p['max_similarity']:
+                stats['filtered'] += 1
+                continue
+            digest = pair_hash(k1, k2)
+            h = int.from_bytes(digest, 'big', signed=True)
+            bucket = bisect.bisect_right(edges, sim)
+            files[int.from_bytes(digest, 'big') % partitions].write(
+                f"{h}\t{sort_key(digest, p['seed'])}\t{bucket}\t{sim!r}\t{k1}\t{k2}\n"
+            )
+            stats['spooled'] += 1
+        if isinstance(pairs, PairStream):
+            # PairStream drops malformed items itself.
+            stats['read'] += pairs.skipped
+            stats['invalid'] += pairs.skipped
+    finally:
+        for f in files:
+            f.close()
+    return stats
+
+
+def _dedupe_partition(part: int) -> Dict[str, object]:
+    """Load a partition's spool files into SQLite, first occurrence wins; return bucket counts."""
+    p = _worker['params']
+    workdir = p['workdir']
+    conn = sqlite3.connect(os.path.join(workdir, f'part-{part:04d}.sqlite'))
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute(f"PRAGMA cache_size=-{p['sqlite_cache_kb']}")
+    conn.execute(
+        'CREATE TABLE pairs (h INTEGER PRIMARY KEY, k INTEGER, bucket INTEGER, sim REAL, a TEXT, b TEXT)'
+    )
+    spooled = 0
+    for path in sorted(glob.glob(os.path.join(workdir, f'spool-{part:04d}-*.tsv'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = (line.rstrip('\n').split('\t') for line in f)
+            while True:
+                batch = list(itertools.islice(rows, INSERT_BATCH))
+                if not batch:
+                    break
+                spooled += len(batch)
+                conn.executemany('INSERT OR IGNORE INTO pairs VALUES (?, ?, ?, ?, ?, ?)', (
+                    (int(h), int(k), int(bucket), float(sim), a, b) for h, k, bucket, sim, a, b in batch
+                ))
+        os.remove(path)
+    conn.execute('CREATE INDEX pairs_bucket_k ON pairs (bucket, k)')
+    conn.commit()
+    counts = dict(conn.execute('SELECT bucket, COUNT(*) FROM pairs GROUP BY bucket'))
+    conn.close()
+    return {'spooled': spooled, 'buckets': counts}
+
+
+def _bucket_stream(dbs: List[sqlite3.Connection], bucket: int, limit: int) -> Iterator[tuple]:
+    """The ``limit`` lowest-key pairs of ``bucket`` across all partitions, in key order."""
+    cursors = [
+        db.execute('SELECT k, a, b, sim FROM pairs WHERE bucket = ? ORDER BY k LIMIT ?', (bucket, limit))
+        for db in dbs
+    ]
+    return itertools.islice(heapq.merge(*cursors), limit)
+
+
+def write_shards(rows: Iterator[tuple], output_dir: str, shard_size: int) -> Tuple[List[str], int]:
+    os.makedirs(output_dir, exist_ok=True)
+    paths: List[str] = []
+    written = 0
+    f = None
+    try:
+        for _, a, b, sim in rows:
+            if written % shard_size == 0:
+                if f is not None:
+                    f.close()
+                path = os.path.join(output_dir, f'pairs-{len(paths):05d}.jsonl')
+                f = open(path, 'w', encoding='utf-8')
+                paths.append(path)
+            f.write(json.dumps([a, b, sim], ensure_ascii=False))
+            f.write('\n')
+            written += 1
+    finally:
+        if f is not None:
+            f.close()
+    return paths, written
+
+
+def bucket_caps(totals: Dict[int, int], per_bucket: int, balance: bool) -> Dict[int, int]:
+    if not balance:
+        return dict(totals)
+    nonempty = [n for n in totals.values() if n]
+    cap = per_bucket or (min(nonempty) if nonempty else 0)
+    return {bucket: min(n, cap) for bucket, n in totals.items()}
+
+
+def prepare_pairs(args: argparse.Namespace) -> dict:
+    start_time = time.time()
+    paths = expand_inputs(args.inputs)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"Input not found: {', '.join(missing)}")
+    tasks = plan_tasks(paths, args.split_mb * 1024 * 1024)
+    edges = sorted(float(e) for e in args.bucket_edges.split(',') if e.strip())
+    workers = args.workers or os.cpu_count() or 1
+    logger.info(f"{len(paths)} input file(s), {len(tasks)} read task(s), {workers} worker(s)")
+
+    workdir = tempfile.mkdtemp(prefix='prepare-', dir=args.work_dir)
+    params = {
+        'workdir': workdir,
+        'partitions': args.partitions,
+        'bucket_edges': edges,
+        'min_similarity': args.min_similarity,
+        'max_similarity': args.max_similarity,
+        'seed': args.seed,
+        'sqlite_cache_kb': args.sqlite_cache_mb * 1024,
+    }
+    try:
+        t = time.time()
+        read_stats = {'read': 0, 'invalid': 0, 'filtered': 0, 'spooled': 0}
+        pool = mp.Pool(workers, initializer=_init_worker, initargs=(params,)) if workers > 1 else None
+        try:
+            if pool is None:
+                _init_worker(params)
+                spooled = map(_spool_task, enumerate(tasks))
+            else:
+                spooled = pool.imap_unordered(_spool_task, enumerate(tasks))
+            for stats in spooled:
+                for key, value in stats.items():
+                    read_stats[key] += value
+            read_s = time.time() - t
+            logger.info(
+                f"Read {read_stats['read']:,} pairs in {read_s:.1f}s "
+                f"({read_stats['invalid']:,} invalid, {read_stats['filtered']:,} filtered)"
+            )
+
+            t = time.time()
+            if pool is None:
+                parts = [_dedupe_partition(i) for i in range(args.partitions)]
+            else:
+                parts = pool.map(_dedupe_partition, range(args.partitions), chunksize=1)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        totals = {bucket: 0 for bucket in range(len(edges) + 1)}
+        for part in parts:
+            for bucket, n in part['buckets'].items():
+                totals[bucket] += n
+        unique = sum(totals.values())
+        dedupe_s = time.time() - t
+        logger.info(f"{unique:,} unique pairs after dedupe ({read_stats['spooled'] - unique:,} duplicates) in {dedupe_s:.1f}s")
+
+        caps = bucket_caps(totals, args.per_bucket, not args.no_balance)
+        t = time.time()
+        dbs = [sqlite3.connect(os.path.join(workdir, f'part-{i:04d}.sqlite')) for i in range(args.partitions)]
+        try:
+            streams = [_bucket_stream(dbs, bucket, cap) for bucket, cap in caps.items() if cap]
+            shard_paths, written = write_shards(heapq.merge(*streams), args.output_dir, args.output_shard_size)
+        finally:
+            for db in dbs:
+                db.close()
+        write_s = time.time() - t
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    labels = ['< ' + str(edges[0])] if edges else ['all']
+    labels += [f'{lo} - {hi}' for lo, hi in zip(edges, edges[1:])]
+    labels += ['>= ' + str(edges[-1])] if edges else []
+    report = {
+        'inputs': paths,
+        'pairs_read': read_stats['read'],
+        'invalid': read_stats['invalid'],
+        'filtered': read_stats['filtered'],
+        'duplicates_dropped': read_stats['spooled'] - unique,
+        'unique_pairs': unique,
+        'buckets': [
+            {'range': label, 'unique': totals[b], 'written': caps[b]} for b, label in enumerate(labels)
+        ],
+        'pairs': written,
+        'read_seconds': round(read_s, 1),
+        'dedupe_seconds': round(dedupe_s, 1),
+        'write_seconds': round(write_s, 1),
+        'total_seconds': round(time.time() - start_time, 1),
+        'shards': shard_paths,
+    }
+    with open(os.path.join(args.output_dir, 'prepare_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote {written:,} pairs to {len(shard_paths)} shards in {args.output_dir}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Prepare training pairs: parallel streaming read, dedupe and bucket balancing',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('inputs', nargs='+', help='Pair files (JSON, JSONL, CSV), globs or directories')
+    parser.add_argument('--output-dir', default='./data/prepared_pairs', help='Directory for JSONL shards')
+    parser.add_argument('--min-similarity', type=float, default=0.0, help='Drop pairs below this similarity')
+    parser.add_argument('--max-similarity', type=float, default=1.0, help='Drop pairs above this similarity')
+    parser.add_argument('--bucket-edges', default='0.5', help='Comma-separated similarity bucket boundaries')
+    parser.add_argument('--per-bucket', type=int, default=0, help='Pairs kept per bucket (0 = size of the smallest bucket)')
+    parser.add_argument('--no-balance', action='store_true', help='Keep every unique pair')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = CPU count)')
+    parser.add_argument('--partitions', type=int, default=16, help='Hash partitions (on-disk dedupe tables)')
+    parser.add_argument('--split-mb', type=int, default=256, help='Split JSONL inputs into tasks of this size')
+    parser.add_argument('--sqlite-cache-mb', type=int, default=64, help='SQLite page cache per partition')
+    parser.add_argument('--output-shard-size', type=int, default=1_000_000, help='Pairs per JSONL shard')
+    parser.add_argument('--work-dir', default=None, help='Scratch directory for spool files and dedupe tables')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        prepare_pairs(args)
+        return 0
+    except Exception as e:
+        logger.error(f"Preparation failed: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Pre-tokenized, memory-mapped training data for sentence-transformers fine-tuning.
+
+model.fit() normally re-tokenizes every batch through smart_batching_collate, on
+every epoch and every chunk. build_token_cache() tokenizes each unique keyword of
+a training set once and writes the token ids to flat memory-mapped arrays:
+
+  tokens.bin   int32, every keyword's ids back to back
+  offsets.npy  int64, keyword i is tokens[offsets[i]:offsets[i + 1]]
+  pairs.npy    int32 (n, 2), keyword ids of each training pair
+  labels.npy   float32 (n,), pair similarity
+
+Caches live under ``<cache_dir>/<tokenizer hash>/<data hash>/``, so a changed
+tokenizer, max_seq_length or training sample never reuses stale ids.
+PretokenizedPairDataset slices those arrays without copying, and
+PretokenizedCollate pads a batch straight into the feature dicts the model
+expects. use_token_cache() wires both into a model so model.fit() uses them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+logger = logging.getLogger(__name__)
+
+TOKENIZE_BATCH = 4096
+CACHE_VERSION = 1
+
+
+def _transformer_module(model):
+    return model._first_module()
+
+
+def tokenizer_fingerprint(model) -> str:
+    """Hash of everything that changes token ids: tokenizer, vocab and length limit."""
+    module = _transformer_module(model)
+    tok = module.tokenizer
+    h = hashlib.sha256()
+    h.update(json.dumps(
+        {
+            'version': CACHE_VERSION,
+            'class': type(tok).__name__,
+            'max_seq_length': module.max_seq_length,
+            'do_lower_case': getattr(module, 'do_lower_case', False),
+            'model_input_names': list(getattr(tok, 'model_input_names', [])),
+        },
+        sort_keys=True,
+    ).encode('utf-8'))
+    for token, idx in sorted(tok.get_vocab().items(), key=lambda kv: kv[1]):
+        h.update(f"{idx}\t{token}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _data_fingerprint(examples: Sequence) -> str:
+    h = hashlib.sha256()
+    for ex in examples:
+        h.update('\x1f'.join(ex.texts).encode('utf-8'))
+        h.update(f"\x1e{float(ex.label)!r}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _tokenize_texts(model, texts: List[str]) -> Iterable[List[int]]:
+    """Token ids per text, exactly as Transformer.tokenize would produce them (unpadded)."""
+    module = _transformer_module(model)
+    tok = module.tokenizer
+    lower = getattr(module, 'do_lower_case', False)
+    for start in range(0, len(texts), TOKENIZE_BATCH):
+        batch = [str(t).strip() for t in texts[start:start + TOKENIZE_BATCH]]
+        if lower:
+            batch = [t.lower() for t in batch]
+        encoded = tok(
+            batch,
+            padding=False,
+            truncation='longest_first',
+            max_length=module.max_seq_length,
+        )
+        yield from encoded['input_ids']
+
+
+def build_token_cache(model, examples: Sequence, cache_dir: str) -> str:
+    """Tokenize ``examples`` (two-text InputExamples) once; return the cache path."""
+    path = os.path.join(cache_dir, tokenizer_fingerprint(model), _data_fingerprint(examples))
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        logger.info(f"Using token cache {path}")
+        return path
+
+    text_ids: Dict[str, int] = {}
+    pairs = np.empty((len(examples), 2), dtype=np.int32)
+    labels = np.empty(len(examples), dtype=np.float32)
+    for i, ex in enumerate(examples):
+        for col, text in enumerate(ex.texts[:2]):
+            pairs[i, col] = text_ids.setdefault(text, len(text_ids))
+        labels[i] = float(ex.label)
+    texts = list(text_ids)
+    logger.info(f"Tokenizing {len(texts):,} unique keywords for {len(examples):,} pairs...")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tokens-', dir=cache_dir)
+    try:
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        with open(os.path.join(tmp, 'tokens.bin'), 'wb') as f:
+            for i, ids in enumerate(_tokenize_texts(model, texts)):
+                f.write(np.asarray(ids, dtype=np.int32).tobytes())
+                offsets[i + 1] = offsets[i] + len(ids)
+        np.save(os.path.join(tmp, 'offsets.npy'), offsets)
+        np.save(os.path.join(tmp, 'pairs.npy'), pairs)
+        np.save(os.path.join(tmp, 'labels.npy'), labels)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'pairs': len(examples), 'texts': len(texts), 'tokens': int(offsets[-1])}, f)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    logger.info(f"Token cache written to {path} ({int(offsets[-1]):,} tokens)")
+    return path
+
+
+class PretokenizedPairDataset(Dataset):
+    """Pairs of token-id views into a token cache; arrays are opened lazily per worker."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self._len = json.load(f)['pairs']
+        self._arrays: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _open(self) -> Tuple[np.ndarray, ...]:
+        if self._arrays is None:
+            tokens = np.memmap(os.path.join(self.path, 'tokens.bin'), dtype=np.int32, mode='r')
+            self._arrays = (
+                tokens,
+                np.load(os.path.join(self.path, 'offsets.npy'), mmap_mode='r'),
+                np.load(os.path.join(self.path, 'pairs.npy'), mmap_mode='r'),
+                np.load(os.path.join(self.path, 'labels.npy'), mmap_mode='r'),
+            )
+        return self._arrays
+
+    def __getstate__(self):
+        # Workers re-open the memmaps instead of pickling them.
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    def __getitem__(self, i: int):
+        tokens, offsets, pairs, labels = self._open()
+        a, b = pairs[i]
+        return (
+            tokens[offsets[a]:offsets[a + 1]],
+            tokens[offsets[b]:offsets[b + 1]],
+            float(labels[i]),
+        )
+
+
+class PretokenizedCollate:
+    """Pad a batch of token-id pairs into the (features, labels) smart_batching_collate returns."""
+
+    def __init__(self, pad_token_id: int, token_type_ids: bool = False) -> None:
+        self.pad_token_id = pad_token_id
+        self.token_type_ids = token_type_ids
+
+    def _features(self, seqs: List[np.ndarray]) -> Dict[str, torch.Tensor]:
+        width = max(len(s) for s in seqs)
+        ids = np.full((len(seqs), width), self.pad_token_id, dtype=np.int64)
+        mask = np.zeros((len(seqs), width), dtype=np.int64)
+        for row, s in enumerate(seqs):
+            ids[row, :len(s)] = s
+            mask[row, :len(s)] = 1
+        features = {'input_ids': torch.from_numpy(ids), 'attention_mask': torch.from_numpy(mask)}
+        if self.token_type_ids:
+            features['token_type_ids'] = torch.zeros_like(features['input_ids'])
+        return features
+
+    def __call__(self, batch):
+        features = [
+            self._features([item[0] for item in batch]),
+            self._features([item[1] for item in batch]),
+        ]
+        labels = torch.tensor([item[2] for item in batch])
+        return features, labels
+
+
+def use_token_cache(
+    model,
+    train_examples: Sequence,
+    cache_dir: str,
+    batch_size: int,
+    num_workers: int = 0,
+) -> DataLoader:
+    """
+    DataLoader over a token cache for ``train_examples``, with ``model`` set up to
+    consume it: model.fit() assigns model.smart_batching_collate to every
+    training DataLoader, so that is replaced with the pre-tokenized collate.
+    """
+    tok = _transformer_module(model).tokenizer
+    collate = PretokenizedCollate(
+        tok.pad_token_id,
+        token_type_ids='token_type_ids' in getattr(tok, 'model_input_names', []),
+    )
+    model.smart_batching_collate = collate
+    dataset = PretokenizedPairDataset(build_token_cache(model, train_examples, cache_dir))
+    return DataLoader(
+        dataset,
+        shuffle=True,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0,
+        collate_fn=collate,
+    )
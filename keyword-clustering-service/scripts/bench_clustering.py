@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Quality-vs-latency benchmark for the /cluster pipeline.
+
+Runs one labelled keyword corpus through every combination of model, inference
+backend, PCA on/off and KMeans/MiniBatchKMeans, and reports per pipeline:
+encode throughput, reduction and clustering time, peak RSS, and adjusted Rand
+index / NMI of the clusters against the gold labels.
+
+Each pipeline runs in its own subprocess so peak RSS is that pipeline's alone
+and one model's allocations don't leak into the next measurement.
+
+Backends:
+  torch       SentenceTransformer on CPU (what the service runs)
+  torch-int8  the same with dynamic int8 quantization of the Linear layers
+  cuda        SentenceTransformer on GPU (skipped when no GPU is visible)
+
+The corpus is a built-in generated set (topics x modifiers, topic = label)
+unless --corpus points at a ``keyword<TAB>label`` file.
+
+    python scripts/bench_clustering.py \\
+        --models sentence-transformers/all-mpnet-base-v2,./models/distilled-keyword-clustering \\
+        --backends torch,torch-int8 --json results/clustering.json --csv results/clustering.csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+
+BACKENDS = ("torch", "torch-int8", "cuda")
+CLUSTERERS = ("kmeans", "minibatch")
+
+TOPICS = {
+    "running shoes": ["running shoes", "trail runners", "marathon trainers", "jogging sneakers"],
+    "coffee": ["espresso machine", "coffee grinder", "cold brew", "french press"],
+    "seo": ["keyword research", "backlink audit", "technical seo", "on page seo"],
+    "email marketing": ["newsletter software", "email automation", "drip campaign", "mailing list"],
+    "mortgages": ["mortgage rates", "home loan", "refinance calculator", "fixed rate mortgage"],
+    "python": ["python tutorial", "pandas dataframe", "python list comprehension", "django framework"],
+    "yoga": ["yoga poses", "vinyasa flow", "yoga mat", "hot yoga class"],
+    "electric cars": ["electric car", "ev charger", "tesla model 3", "ev battery range"],
+    "dog training": ["puppy training", "dog obedience", "leash training", "crate training"],
+    "budget travel": ["cheap flights", "hostel booking", "backpacking europe", "travel hacks"],
+    "gardening": ["vegetable garden", "tomato plants", "raised garden bed", "composting"],
+    "skincare": ["retinol serum", "sunscreen spf 50", "moisturizer for dry skin", "acne treatment"],
+    "home workout": ["bodyweight workout", "resistance bands", "dumbbell exercises", "hiit routine"],
+    "web hosting": ["wordpress hosting", "vps server", "cloud hosting", "domain registration"],
+    "photography": ["dslr camera", "portrait photography", "camera lens", "lightroom presets"],
+    "meal prep": ["meal prep ideas", "healthy lunch", "batch cooking", "high protein recipes"],
+    "remote work": ["remote jobs", "work from home", "home office setup", "freelance writing"],
+    "personal finance": ["budget planner", "index funds", "emergency fund", "credit score"],
+    "gaming": ["gaming laptop", "mechanical keyboard", "graphics card", "gaming headset"],
+    "weddings": ["wedding venue", "bridal dress", "wedding photographer", "wedding invitations"],
+}
+
+MODIFIERS = [
+    "{}", "best {}", "cheap {}", "{} near me", "how to choose {}", "{} for beginners",
+    "{} review", "{} 2024", "top 10 {}", "{} guide", "buy {} online", "{} tips",
+    "what is {}", "{} vs alternatives", "affordable {}", "{} deals", "{} ideas",
+    "{} price", "{} comparison", "beginner {} questions",
+]
+
+
+def generate_corpus(per_topic: int, seed: int) -> List[Tuple[str, str]]:
+    """Deterministic labelled corpus: ``per_topic`` unique keywords for every topic."""
+    rng = random.Random(seed)
+    corpus: List[Tuple[str, str]] = []
+    for label, terms in TOPICS.items():
+        candidates = [m.format(t) for t in terms for m in MODIFIERS]
+        rng.shuffle(candidates)
+        corpus.extend((kw, label) for kw in candidates[:per_topic])
+    rng.shuffle(corpus)
+    return corpus
+
+
+def load_corpus(path: str) -> List[Tuple[str, str]]:
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            keyword, _, label = line.rstrip("\n").partition("\t")
+            if keyword.strip() and label.strip():
+                corpus.append((keyword.strip(), label.strip()))
+    return corpus
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def load_model(name: str, backend: str):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "cuda":
+        return SentenceTransformer(name, device="cuda")
+    model = SentenceTransformer(name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def run_pipeline(config: Dict[str, Any]) -> Dict[str, Any]:
+    """One pipeline, in this process; called in the child."""
+    import numpy as np
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.decomposition import PCA
+    from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+
+    result: Dict[str, Any] = {
+        "model": config["model"],
+        "backend": config["backend"],
+        "pca": config["pca_components"] or None,
+        "clusterer": config["clusterer"],
+    }
+    if config["backend"] == "cuda":
+        import torch
+
+        if not torch.cuda.is_available():
+            result["skipped"] = "no CUDA device"
+            return result
+
+    corpus = load_corpus(config["corpus"])
+    keywords = [kw for kw, _ in corpus]
+    gold = [label for _, label in corpus]
+    n_clusters = len(set(gold))
+
+    t0 = time.perf_counter()
+    model = load_model(config["model"], config["backend"])
+    load_s = time.perf_counter() - t0
+
+    # Warm-up so one-off kernel/allocator setup doesn't count as throughput.
+    model.encode(keywords[:config["batch_size"]], batch_size=config["batch_size"])
+    t0 = time.perf_counter()
+    embeddings = model.encode(keywords, batch_size=config["batch_size"], convert_to_numpy=True)
+    encode_s = time.perf_counter() - t0
+
+    reduce_s = 0.0
+    if config["pca_components"]:
+        t0 = time.perf_counter()
+        components = min(config["pca_components"], embeddings.shape[0], embeddings.shape[1])
+        embeddings = PCA(n_components=components, random_state=42).fit_transform(embeddings)
+        reduce_s = time.perf_counter() - t0
+
+    if config["clusterer"] == "kmeans":
+        # Same settings as /cluster.
+        clusterer = KMeans(n_clusters=n_clusters, random_state=42, n_init=10, max_iter=300)
+    else:
+        clusterer = MiniBatchKMeans(
+            n_clusters=n_clusters, random_state=42, n_init=3, batch_size=1024, max_iter=300
+        )
+    t0 = time.perf_counter()
+    labels = clusterer.fit_predict(np.asarray(embeddings))
+    cluster_s = time.perf_counter() - t0
+
+    result.update({
+        "keywords": len(keywords),
+        "clusters": n_clusters,
+        "embedding_dim": int(np.asarray(embeddings).shape[1]),
+        "model_load_s": round(load_s, 3),
+        "encode_s": round(encode_s, 3),
+        "keywords_per_second": round(len(keywords) / encode_s, 1) if encode_s else None,
+        "reduce_s": round(reduce_s, 3),
+        "cluster_s": round(cluster_s, 3),
+        "adjusted_rand": round(float(adjusted_rand_score(gold, labels)), 4),
+        "nmi": round(float(normalized_mutual_info_score(gold, labels)), 4),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return result
+
+
+def spawn_pipeline(config: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-pipeline", json.dumps(config)]
+    row = {
+        "model": config["model"],
+        "backend": config["backend"],
+        "pca": config["pca_components"] or None,
+        "clusterer": config["clusterer"],
+    }
+    try:
+        proc = subprocess.run(
+            cmd, cwd=str(SERVICE_ROOT), capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        row["error"] = f"timed out after {timeout:.0f}s"
+        return row
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        tail = proc.stderr.strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]
+        row["error"] = tail[0]
+        return row
+    return json.loads(lines[-1])
+
+
+def write_csv(rows: List[Dict[str, Any]], path: str) -> None:
+    fields: List[str] = []
+    for row in rows:
+        fields.extend(k for k in row if k not in fields)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark clustering quality and latency")
+    parser.add_argument(
+        "--models",
+        default=os.getenv("MODEL_NAME", "sentence-transformers/all-mpnet-base-v2"),
+        help="Comma-separated model names or paths",
+    )
+    parser.add_argument("--backends", default="torch,torch-int8", help=f"Comma-separated: {', '.join(BACKENDS)}")
+    parser.add_argument("--pca-components", type=int, default=64, help="Components for the PCA-on runs")
+    parser.add_argument("--clusterers", default=",".join(CLUSTERERS))
+    parser.add_argument("--corpus", help="keyword<TAB>label file (default: generated corpus)")
+    parser.add_argument("--per-topic", type=int, default=60, help="Keywords per topic in the generated corpus")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Seconds per pipeline")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--csv", help="Write the result table to this CSV file")
+    parser.add_argument("--run-pipeline", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_pipeline:
+        print(json.dumps(run_pipeline(json.loads(args.run_pipeline))))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    clusterers = [c.strip() for c in args.clusterers.split(",") if c.strip()]
+    if set(backends) - set(BACKENDS):
+        parser.error(f"unknown backend(s): {', '.join(sorted(set(backends) - set(BACKENDS)))}")
+    if set(clusterers) - set(CLUSTERERS):
+        parser.error(f"unknown clusterer(s): {', '.join(sorted(set(clusterers) - set(CLUSTERERS)))}")
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+
+    tmp = None
+    corpus_path = args.corpus
+    if corpus_path is None:
+        corpus = generate_corpus(args.per_topic, args.random_seed)
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, encoding="utf-8")
+        with tmp:
+            tmp.writelines(f"{kw}\t{label}\n" for kw, label in corpus)
+        corpus_path = tmp.name
+
+    rows = []
+    try:
+        for model in models:
+            for backend in backends:
+                for pca in (0, args.pca_components):
+                    for clusterer in clusterers:
+                        config = {
+                            "model": model,
+                            "backend": backend,
+                            "pca_components": pca,
+                            "clusterer": clusterer,
+                            "corpus": os.path.abspath(corpus_path),
+                            "batch_size": args.batch_size,
+                        }
+                        row = spawn_pipeline(config, args.timeout)
+                        print(json.dumps(row), file=sys.stderr)
+                        rows.append(row)
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+    report = {
+        "corpus": args.corpus or f"generated ({len(TOPICS)} topics x {args.per_topic})",
+        "batch_size": args.batch_size,
+        "results": rows,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        write_csv(rows, args.csv)
+
+
+if __name__ == "__main__":
+    main()
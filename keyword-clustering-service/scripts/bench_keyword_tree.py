@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyword tree builds against a local Suggest stand-in.
+
+Drives --trees builds of build_keyword_tree (cache and coalescing bypassed, so
+every tree is built) with --concurrency in flight, and reports latency
+percentiles, Suggest calls per tree and encode time per tree. By default it
+spawns scripts/suggest_stub.py with the given latency/error flags; pass
+--suggest-url to use a stub (or recorder) that is already running.
+
+    python scripts/bench_keyword_tree.py --trees 200 --concurrency 8 \\
+        --latency-ms 80 --error-rate 0.02 --fixtures fixtures/suggest_en_us.json \\
+        --json results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SEEDS = [
+    "keyword research", "seo audit", "content marketing", "link building",
+    "local seo", "email marketing", "python tutorial", "home workout",
+    "electric bikes", "remote jobs", "budget travel", "meal prep",
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p95": round(float(np.percentile(arr, 95)), 1),
+        "p99": round(float(np.percentile(arr, 99)), 1),
+        "max": round(float(arr.max()), 1),
+        "mean": round(float(arr.mean()), 1),
+    }
+
+
+def spawn_stub(args: argparse.Namespace) -> subprocess.Popen:
+    cmd = [
+        sys.executable,
+        str(SERVICE_ROOT / "scripts" / "suggest_stub.py"),
+        "--port", str(args.stub_port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--timeout-rate", str(args.timeout_rate),
+        "--random-seed", str(args.random_seed),
+    ]
+    if args.fixtures:
+        cmd += ["--fixtures", args.fixtures]
+    return subprocess.Popen(cmd)
+
+
+def wait_for_stub(url: str, timeout: float = 30.0) -> None:
+    stats_url = url.rsplit("/complete/search", 1)[0] + "/stats"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(stats_url, timeout=1.0).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Suggest stub did not come up at {stats_url}")
+
+
+async def run_benchmark(
+    seeds: List[str], trees: int, concurrency: int, time_budget_ms: Optional[int]
+) -> Dict[str, Any]:
+    from app import keyword_tree as kt
+
+    kt.load_tree_embedding_model()
+    # Warm the model and intent prototypes outside the measured window.
+    await kt.build_keyword_tree(seeds[0], "en", "us", 1)
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    suggest_calls: List[float] = []
+    encode_ms: List[float] = []
+    partial = 0
+
+    async def one(i: int) -> None:
+        nonlocal partial
+        seed = seeds[i % len(seeds)]
+        async with sem:
+            start = time.perf_counter()
+            result = await kt.build_keyword_tree(
+                seed, "en", "us", 1, time_budget_ms=time_budget_ms
+            )
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        meta = result["meta"]
+        suggest_calls.append(meta["suggest_calls"])
+        encode_ms.append(meta["encode_ms"])
+        partial += bool(meta["partial"])
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(trees)])
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "trees": trees,
+        "concurrency": concurrency,
+        "time_budget_ms": time_budget_ms,
+        "wall_s": round(wall, 2),
+        "trees_per_s": round(trees / wall, 2) if wall > 0 else None,
+        "latency_ms": percentiles(latencies),
+        "suggest_calls_per_tree": percentiles(suggest_calls),
+        "encode_ms_per_tree": percentiles(encode_ms),
+        "partial_trees": partial,
+        "suggest_limiter": kt.get_suggest_limiter().snapshot(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark keyword tree builds")
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seeds-file", help="One seed per line (default: built-in list)")
+    parser.add_argument("--time-budget-ms", type=int, default=None)
+    parser.add_argument(
+        "--suggest-url", help="Use an already running stub instead of spawning one"
+    )
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="Fixture file for the spawned stub")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument(
+        "--suggest-rate",
+        type=float,
+        default=1000.0,
+        help="Limiter rate for the run; the production default would dominate latency",
+    )
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    seeds = DEFAULT_SEEDS
+    if args.seeds_file:
+        with open(args.seeds_file, "r", encoding="utf-8") as f:
+            seeds = [line.strip() for line in f if line.strip()]
+
+    stub = None
+    url = args.suggest_url
+    if url is None:
+        url = f"http://127.0.0.1:{args.stub_port}/complete/search"
+        stub = spawn_stub(args)
+    # Both must be set before app.keyword_tree / the limiter are first imported.
+    os.environ["CLUSTER_TREE_SUGGEST_URL"] = url
+    os.environ["CLUSTER_TREE_SUGGEST_RATE"] = str(args.suggest_rate)
+    os.environ["CLUSTER_TREE_SUGGEST_BURST"] = str(max(20, int(args.suggest_rate)))
+    sys.path.insert(0, str(SERVICE_ROOT))
+
+    try:
+        wait_for_stub(url)
+        report = asyncio.run(
+            run_benchmark(seeds, args.trees, args.concurrency, args.time_budget_ms)
+        )
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait(timeout=10)
+
+    report["stub"] = {
+        "url": url,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "timeout_rate": args.timeout_rate,
+        "fixtures": args.fixtures,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google Suggest, for benchmarking and regression-testing the
+keyword tree pipeline without the network.
+
+Point the service (or scripts/bench_keyword_tree.py) at it with
+CLUSTER_TREE_SUGGEST_URL=http://127.0.0.1:8765/complete/search.
+
+Modes:
+  replay (default)  answer from a fixture file; queries missing from it get
+                    deterministic synthetic suggestions derived from the query
+  --record FILE     proxy every query to the real Suggest endpoint and save the
+                    responses to FILE, to be replayed later with --fixtures FILE
+
+Latency (--latency-ms, --jitter-ms) and failures (--error-rate with
+--error-status, --timeout-rate) are injected per request from a seeded RNG, so
+two runs with the same flags see the same sequence of delays and errors.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Query, Response
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger("suggest_stub")
+
+UPSTREAM_URL = "https://suggestqueries.google.com/complete/search"
+
+SYNTHETIC_MODIFIERS = [
+    "tips", "for beginners", "examples", "near me", "cost", "reddit", "tools",
+    "online free", "course", "software", "checklist", "jobs", "salary", "template",
+    "strategy", "vs", "pdf", "meaning", "2024", "guide",
+]
+
+
+def fixture_key(q: str, hl: str, gl: str) -> str:
+    return f"{hl}|{gl}|{q.strip().lower()}"
+
+
+def synthetic_suggestions(q: str, count: int = 8) -> List[str]:
+    """Stable fake completions: the same query always gets the same list."""
+    q = q.strip()
+    if not q:
+        return []
+    digest = hashlib.sha256(q.lower().encode("utf-8")).digest()
+    rnd = random.Random(digest)
+    return [f"{q} {m}" for m in rnd.sample(SYNTHETIC_MODIFIERS, count)]
+
+
+def load_fixtures(path: str) -> Dict[str, List[str]]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixtures(path: str, fixtures: Dict[str, List[str]]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Suggest stub")
+    rnd = random.Random(args.random_seed)
+    record_path = args.record
+    fixtures = load_fixtures(record_path or args.fixtures)
+    stats = {"requests": 0, "fixture_hits": 0, "synthetic": 0, "recorded": 0, "errors": 0}
+    upstream: Dict[str, httpx.AsyncClient] = {}
+
+    @app.on_event("startup")
+    async def _open_upstream():
+        if record_path:
+            upstream["client"] = httpx.AsyncClient(
+                timeout=10.0, headers={"User-Agent": "Mozilla/5.0"}
+            )
+
+    @app.on_event("shutdown")
+    async def _close_upstream():
+        if "client" in upstream:
+            await upstream["client"].aclose()
+            save_fixtures(record_path, fixtures)
+
+    @app.get("/complete/search")
+    async def complete(
+        q: str = Query(""),
+        hl: str = Query("en"),
+        gl: str = Query("us"),
+        client: str = Query("firefox"),
+    ):
+        stats["requests"] += 1
+        # Draw every random number up front so the sequence does not depend on
+        # which branch a request takes.
+        delay = max(0.0, args.latency_ms + rnd.uniform(-1.0, 1.0) * args.jitter_ms) / 1000.0
+        roll = rnd.random()
+        if roll < args.timeout_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(args.timeout_s)
+            return Response(status_code=504)
+        if roll < args.timeout_rate + args.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(delay)
+            return Response(status_code=args.error_status)
+
+        key = fixture_key(q, hl, gl)
+        if record_path and key not in fixtures:
+            r = await upstream["client"].get(
+                UPSTREAM_URL, params={"client": client, "q": q, "hl": hl, "gl": gl}
+            )
+            r.raise_for_status()
+            data = r.json()
+            fixtures[key] = [str(x) for x in data[1] if x] if len(data) > 1 else []
+            stats["recorded"] += 1
+            if stats["recorded"] % 50 == 0:
+                save_fixtures(record_path, fixtures)
+            return JSONResponse([q, fixtures[key]])
+
+        await asyncio.sleep(delay)
+        if key in fixtures:
+            stats["fixture_hits"] += 1
+            return JSONResponse([q, fixtures[key]])
+        stats["synthetic"] += 1
+        return JSONResponse([q, synthetic_suggestions(q)])
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "fixtures": len(fixtures)}
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake Google Suggest server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="JSON fixture file to replay")
+    parser.add_argument("--record", help="Proxy to Google and save responses to this file")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--timeout-s", type=float, default=30.0, help="How long a timed-out request hangs"
+    )
+    parser.add_argument("--random-seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    mode = f"recording to {args.record}" if args.record else "replay"
+    logger.info("Suggest stub on %s:%d (%s)", args.host, args.port, mode)
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
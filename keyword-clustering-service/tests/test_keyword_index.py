@@ -0,0 +1,52 @@
+import gzip
+
+from app.keyword_index import KeywordIndex
+
+
+def _index():
+    return KeywordIndex(
+        [
+            ("seo tools", 50),
+            ("seo tools free", 30),
+            ("SEO  Tools for agencies", 40),
+            ("best seo tools", 90),
+            ("local seo tools list", 10),
+            ("seo", 100),
+            ("keyword research", 70),
+        ]
+    )
+
+
+def test_prefix_completions_rank_by_count_and_skip_the_query():
+    assert _index().prefix("seo tools", limit=5) == ["seo tools for agencies", "seo tools free"]
+
+
+def test_infix_matches_start_at_word_boundaries():
+    idx = _index()
+    assert idx.infix("seo tools") == ["best seo tools", "local seo tools list"]
+    assert idx.infix("eo tools") == []
+
+
+def test_complete_pads_prefix_hits_with_infix_hits():
+    assert _index().complete("seo tools", limit=3) == [
+        "seo tools for agencies",
+        "seo tools free",
+        "best seo tools",
+    ]
+
+
+def test_from_file_reads_counts_and_gzip(tmp_path):
+    path = tmp_path / "corpus.txt.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("running shoes\t5\nrunning shoes men\nrunning shoes women\t9\n")
+    idx = KeywordIndex.from_file(str(path))
+    assert len(idx) == 3
+    assert idx.prefix("running") == ["running shoes women", "running shoes", "running shoes men"]
+
+
+def test_short_prefixes_rank_the_whole_range():
+    entries = [(f"s{i:05d}", 1) for i in range(20000)]
+    entries += [("sz popular", 500), ("s tail", 2), ("sa tied", 2), ("a x s", 900)]
+    idx = KeywordIndex(entries)
+    assert idx.prefix("s", limit=3) == ["sz popular", "s tail", "sa tied"]
+    assert idx.infix("s", limit=1) == ["a x s"]
@@ -0,0 +1,75 @@
+import numpy as np
+
+from mine_training_pairs import IVFIndex, _init_worker, _mine_shard, dedupe_pairs
+
+PARAMS = {
+    'backend': 'ivf',
+    'neighbors': 10,
+    'nprobe': 4,
+    'negatives': 3,
+    'positives': 2,
+    'random_negatives': 0,
+    'max_negative_sim': 0.95,
+    'positive_label': 1.0,
+    'negative_label': 0.0,
+    'seed': 0,
+}
+
+
+def _embeddings():
+    """Three groups of eight around nearby centres, plus a group-1 near-copy of keyword 0."""
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=16)
+    centres = [base + rng.normal(scale=0.8, size=16) for _ in range(3)]
+    vectors = [c + rng.normal(scale=0.3, size=16) for c in centres for _ in range(8)]
+    vectors.append(vectors[0] + rng.normal(scale=0.01, size=16))
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    groups = np.asarray([g for g in range(3) for _ in range(8)] + [1], dtype=np.int64)
+    return vectors, groups
+
+
+def _mine(tmp_path):
+    vectors, groups = _embeddings()
+    np.save(tmp_path / 'embeddings.npy', vectors)
+    np.save(tmp_path / 'groups.npy', groups)
+    IVFIndex.build(vectors, nlist=4, nprobe=PARAMS['nprobe']).save(str(tmp_path))
+    _init_worker(str(tmp_path), PARAMS)
+    return vectors, groups, _mine_shard((0, len(vectors)))
+
+
+def test_hard_negatives_fall_inside_the_similarity_band(tmp_path):
+    vectors, groups, rows = _mine(tmp_path)
+    sims = vectors @ vectors.T
+    negatives = rows[rows[:, 2] == PARAMS['negative_label']].astype(np.int64)
+    assert len(negatives)
+    near_copy = len(vectors) - 1
+    assert sims[0, near_copy] >= PARAMS['max_negative_sim']
+    for a, b, _ in negatives:
+        assert sims[a, b] < PARAMS['max_negative_sim']
+        # Hard: one of the query's nearest neighbours (every list is probed here).
+        assert sims[a, b] >= np.sort(sims[a])[::-1][PARAMS['neighbors']]
+        assert {a, b} != {0, near_copy}
+
+
+def test_positives_are_not_reported_as_negatives(tmp_path):
+    _, groups, rows = _mine(tmp_path)
+    a = rows[:, 0].astype(np.int64)
+    b = rows[:, 1].astype(np.int64)
+    positive = rows[:, 2] == PARAMS['positive_label']
+    assert positive.any() and (~positive).any()
+    assert (groups[a[positive]] == groups[b[positive]]).all()
+    assert (groups[a[~positive]] != groups[b[~positive]]).all()
+    assert not (a == b).any()
+
+
+def test_dedupe_drops_reversed_pairs_and_keeps_the_first_label():
+    rows = np.asarray([[0, 1, 1.0], [2, 3, 0.0], [1, 0, 1.0], [3, 2, 1.0], [0, 2, 0.0]])
+    assert dedupe_pairs(rows, 4).tolist() == [[0, 1, 1.0], [2, 3, 0.0], [0, 2, 0.0]]
+
+
+def test_mined_pairs_are_unique_after_dedupe(tmp_path):
+    vectors, _, rows = _mine(tmp_path)
+    deduped = dedupe_pairs(rows, len(vectors))
+    keys = {tuple(sorted(pair)) for pair in deduped[:, :2].astype(np.int64).tolist()}
+    assert len(keys) == len(deduped) < len(rows)
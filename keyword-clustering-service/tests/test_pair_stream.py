@@ -0,0 +1,51 @@
+import json
+import random
+
+import pair_stream
+from pair_stream import PairStream, reservoir_sample
+
+PAIRS = [[f"keyword {i}", f"related {i}", round(i / 100, 2)] for i in range(50)]
+
+
+def test_streams_training_pairs_across_read_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(pair_stream, "READ_SIZE", 5)
+    path = tmp_path / "pairs.json"
+    path.write_text(
+        json.dumps({"positive_count": 30, "training_pairs": PAIRS + [["bad"]], "negative_count": 20})
+    )
+    stream = PairStream(str(path))
+    assert list(stream) == [tuple(p) for p in PAIRS]
+    assert stream.meta == {"positive_count": 30, "negative_count": 20}
+    assert stream.skipped == 1
+
+
+def test_reads_object_pairs_and_jsonl(tmp_path):
+    objects = tmp_path / "pairs.json"
+    objects.write_text(
+        json.dumps({"pairs": [{"keyword1": a, "keyword2": b, "similarity": s} for a, b, s in PAIRS]})
+    )
+    lines = tmp_path / "pairs.jsonl"
+    lines.write_text("\n".join(json.dumps(p) for p in PAIRS) + "\n")
+    expected = [tuple(p) for p in PAIRS]
+    assert list(PairStream(str(objects))) == expected
+    assert list(PairStream(str(lines))) == expected
+
+
+def test_malformed_jsonl_lines_are_skipped_and_counted(tmp_path, caplog):
+    path = tmp_path / "pairs.jsonl"
+    path.write_text(json.dumps(PAIRS[0]) + '\n["truncated", "li\n' + json.dumps(PAIRS[1]) + "\n")
+    stream = PairStream(str(path))
+    assert list(stream) == [tuple(PAIRS[0]), tuple(PAIRS[1])]
+    assert stream.skipped == 1 and stream.count == 2
+    assert "pairs.jsonl:2" in caplog.text
+
+
+def test_reservoir_sample_is_bounded_and_uniform():
+    assert len(reservoir_sample(iter(range(5)), 10)) == 5
+    rng = random.Random(0)
+    hits = [0] * 20
+    for _ in range(4000):
+        for x in reservoir_sample(iter(range(20)), 5, rng):
+            hits[x] += 1
+    # Each item should be kept ~1000 times (5/20 of 4000 draws).
+    assert min(hits) > 850 and max(hits) < 1150
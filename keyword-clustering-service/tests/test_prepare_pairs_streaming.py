@@ -0,0 +1,86 @@
+import csv
+import json
+from argparse import Namespace
+
+from pair_stream import PairStream
+from prepare_pairs_streaming import pair_hash, plan_tasks, prepare_pairs, read_task
+
+
+def _args(inputs, output_dir, **overrides):
+    args = dict(
+        inputs=inputs,
+        output_dir=str(output_dir),
+        min_similarity=0.0,
+        max_similarity=1.0,
+        bucket_edges="0.5",
+        per_bucket=0,
+        no_balance=False,
+        workers=1,
+        partitions=4,
+        split_mb=256,
+        sqlite_cache_mb=8,
+        output_shard_size=1000,
+        work_dir=None,
+        seed=42,
+    )
+    args.update(overrides)
+    return Namespace(**args)
+
+
+def _read_output(report):
+    pairs = []
+    for path in report["shards"]:
+        pairs.extend(PairStream(path))
+    return pairs
+
+
+def _write_inputs(tmp_path):
+    positives = [[f"Topic {i}", f"topic  {i} guide", 0.9] for i in range(30)]
+    negatives = [[f"topic {i}", f"unrelated {i}", 0.1] for i in range(100)]
+    mirrored = [[b, a, s] for a, b, s in positives[:10]]
+    jsonl = tmp_path / "a.jsonl"
+    jsonl.write_text("\n".join(json.dumps(p) for p in positives + mirrored + [["bad"]]) + "\n")
+    with open(tmp_path / "b.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["keyword1", "keyword2", "similarity"])
+        writer.writerows(negatives + [["same", "Same", 0.2]])
+    return [str(jsonl), str(tmp_path / "b.csv")]
+
+
+def test_pair_hash_is_order_independent():
+    assert pair_hash("a b", "c") == pair_hash("c", "a b")
+    assert pair_hash("a b", "c") != pair_hash("a", "b c")
+
+
+def test_dedupes_mirrored_pairs_and_balances_buckets(tmp_path):
+    report = prepare_pairs(_args(_write_inputs(tmp_path), tmp_path / "out"))
+    assert report["pairs_read"] == 30 + 10 + 1 + 101
+    assert report["invalid"] == 1
+    assert report["filtered"] == 1
+    assert report["duplicates_dropped"] == 10
+    assert [b["unique"] for b in report["buckets"]] == [100, 30]
+    assert [b["written"] for b in report["buckets"]] == [30, 30]
+
+    pairs = _read_output(report)
+    assert len(pairs) == 60
+    assert len({frozenset(p[:2]) for p in pairs}) == 60
+    assert ("topic 0", "topic 0 guide", 0.9) in pairs
+    assert sum(1 for p in pairs if p[2] >= 0.5) == 30
+
+
+def test_output_is_independent_of_workers_and_byte_ranges(tmp_path):
+    inputs = _write_inputs(tmp_path)
+    one = prepare_pairs(_args(inputs, tmp_path / "one", no_balance=True))
+    two = prepare_pairs(_args(inputs, tmp_path / "two", no_balance=True, workers=2, partitions=3))
+    assert _read_output(one) == _read_output(two)
+    assert one["pairs"] == 130
+
+
+def test_byte_ranges_cover_every_line_once(tmp_path):
+    path = tmp_path / "pairs.jsonl"
+    lines = [[f"keyword {i}", f"other {i}", 0.5] for i in range(200)]
+    path.write_text("\n".join(json.dumps(p) for p in lines) + "\n")
+    tasks = plan_tasks([str(path)], 97)
+    assert len(tasks) > 10
+    read = [pair for task in tasks for pair in read_task(task)]
+    assert read == [tuple(p) for p in lines]
@@ -0,0 +1,66 @@
+from pretokenized import build_token_cache, use_token_cache
+
+
+class FakeTokenizer:
+    pad_token_id = 0
+    model_input_names = ["input_ids", "attention_mask"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_vocab(self):
+        return {"[CLS]": 101, "[SEP]": 102}
+
+    def __call__(self, batch, padding, truncation, max_length):
+        self.calls += 1
+        ids = [[101] + [len(w) + 1 for w in t.split()][: max_length - 2] + [102] for t in batch]
+        return {"input_ids": ids}
+
+
+class FakeModule:
+    max_seq_length = 5
+    do_lower_case = False
+
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+
+
+class FakeModel:
+    def __init__(self):
+        self.module = FakeModule()
+
+    def _first_module(self):
+        return self.module
+
+
+class Example:
+    def __init__(self, a, b, label):
+        self.texts = [a, b]
+        self.label = label
+
+
+EXAMPLES = [Example("seo tools", "seo software for agencies", 0.9), Example("seo", "cake", 0.1)]
+
+
+def test_batches_match_smart_batching_layout(tmp_path):
+    model = FakeModel()
+    loader = use_token_cache(model, EXAMPLES, str(tmp_path), batch_size=2)
+    assert model.smart_batching_collate is loader.collate_fn
+
+    features, labels = next(iter(loader))
+    by_label = sorted(zip(labels.tolist(), features[1]["input_ids"].tolist()))
+    # Truncated to max_seq_length including special tokens, then padded per batch.
+    assert by_label[1][1] == [101, 4, 9, 4, 102]
+    assert by_label[0][1] == [101, 5, 102, 0, 0]
+    assert features[1]["attention_mask"].sum().item() == 8
+
+
+def test_cache_is_reused_for_same_tokenizer_and_data(tmp_path):
+    model = FakeModel()
+    first = build_token_cache(model, EXAMPLES, str(tmp_path))
+    second = build_token_cache(model, EXAMPLES, str(tmp_path))
+    assert first == second
+    assert model.module.tokenizer.calls == 1
+
+    model.module.max_seq_length = 8
+    assert build_token_cache(model, EXAMPLES, str(tmp_path)) != first
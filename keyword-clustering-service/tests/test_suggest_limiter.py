@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.suggest_limiter import AdaptiveSuggestLimiter, is_backoff_error
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://suggest.test/complete/search")
+    response = httpx.Response(code, request=request)
+    return httpx.HTTPStatusError("status", request=request, response=response)
+
+
+def test_backoff_classification():
+    assert is_backoff_error(_status_error(429))
+    assert is_backoff_error(_status_error(503))
+    assert is_backoff_error(httpx.ReadTimeout("slow"))
+    assert not is_backoff_error(_status_error(400))
+    assert not is_backoff_error(ValueError("bad json"))
+
+
+def test_window_grows_on_success_and_halves_on_throttle():
+    now = [0.0]
+
+    def clock() -> float:
+        now[0] += 0.001
+        return now[0]
+
+    limiter = AdaptiveSuggestLimiter(
+        rate=1000, burst=1000, initial_concurrency=4, max_concurrency=8, clock=clock
+    )
+
+    async def run(n: int, exc: Exception = None):
+        for _ in range(n):
+            try:
+                async with limiter.slot():
+                    if exc is not None:
+                        raise exc
+            except type(exc) if exc is not None else ():
+                pass
+
+    asyncio.run(run(20))
+    assert limiter.concurrency_limit > 4
+
+    grown = limiter.concurrency_limit
+    now[0] = 10.0
+    asyncio.run(run(3, _status_error(429)))
+    # Three throttles inside one cooldown window cost a single cut.
+    assert limiter.concurrency_limit == max(1, int(grown * 0.5))
+    assert limiter.backoffs == 3
+
+
+def test_plain_errors_do_not_move_the_window():
+    limiter = AdaptiveSuggestLimiter(rate=1000, burst=1000, initial_concurrency=4)
+
+    async def fail():
+        with pytest.raises(ValueError):
+            async with limiter.slot():
+                raise ValueError("parse")
+
+    asyncio.run(fail())
+    assert limiter.concurrency_limit == 4
+    assert limiter.errors == 1
+
+
+def test_concurrency_is_capped_across_callers():
+    limiter = AdaptiveSuggestLimiter(
+        rate=1000, burst=1000, initial_concurrency=3, max_concurrency=3
+    )
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*[call() for _ in range(12)])
+
+    asyncio.run(main())
+    assert peak == 3
+    assert limiter.in_flight == 0
@@ -0,0 +1,94 @@
+import asyncio
+
+from app.tree_cache import KeywordTreeCache, tree_cache_key
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        entry = self.store.get(key)
+        return entry[0] if entry else None
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = (value, ttl)
+
+
+def _tree(partial: bool):
+    return {"seed": "seo", "tree": {"id": "root"}, "meta": {"partial": partial}}
+
+
+def test_concurrent_identical_requests_share_one_build():
+    cache = KeywordTreeCache(FakeRedis(), ttl=600, partial_ttl=30)
+    builds = 0
+
+    async def build():
+        nonlocal builds
+        builds += 1
+        await asyncio.sleep(0.01)
+        return _tree(partial=False)
+
+    async def main():
+        key = tree_cache_key("seo", "en", "us", 1)
+        return await asyncio.gather(*[cache.get_or_build(key, build) for _ in range(4)])
+
+    results = asyncio.run(main())
+    assert builds == 1
+    assert [r["meta"]["coalesced"] for r in results] == [False, True, True, True]
+    assert all(r["meta"]["cached"] is False for r in results)
+
+
+def test_completed_tree_is_served_from_redis_with_partial_ttl():
+    redis = FakeRedis()
+    cache = KeywordTreeCache(redis, ttl=600, partial_ttl=30)
+    key = tree_cache_key("seo", "en", "us", 1)
+
+    async def build():
+        return _tree(partial=True)
+
+    first = asyncio.run(cache.get_or_build(key, build))
+    second = asyncio.run(cache.get_or_build(key, build))
+
+    assert first["meta"]["cached"] is False
+    assert second["meta"]["cached"] is True
+    assert redis.store[key][1] == 30
+    assert '"cached"' not in redis.store[key][0]
+
+
+def test_deadline_hit_tree_is_neither_cached_nor_shared_across_budgets():
+    redis = FakeRedis()
+    cache = KeywordTreeCache(redis, ttl=600, partial_ttl=30)
+    key = tree_cache_key("seo", "en", "us", 1)
+    builds = []
+
+    def builder(budget):
+        async def build():
+            builds.append(budget)
+            await asyncio.sleep(0.01)
+            tree = _tree(partial=budget is not None)
+            tree["meta"]["deadline_hit"] = budget is not None
+            return tree
+
+        return build
+
+    async def main():
+        return await asyncio.gather(
+            cache.get_or_build(key, builder(100), time_budget_ms=100),
+            cache.get_or_build(key, builder(None)),
+            cache.get_or_build(key, builder(None)),
+        )
+
+    budgeted, full, joined = asyncio.run(main())
+    assert sorted(builds, key=str) == [100, None]
+    assert budgeted["meta"]["deadline_hit"] is True
+    assert full["meta"]["deadline_hit"] is False and joined["meta"]["coalesced"] is True
+    assert "deadline_hit\": false" in redis.store[key][0]
+
+    redis.store.clear()
+    asyncio.run(cache.get_or_build(key, builder(100), time_budget_ms=100))
+    assert key not in redis.store
+
+
+def test_streamed_trees_have_their_own_key():
+    assert tree_cache_key("seo", "en", "us", 1, streamed=True) != tree_cache_key("seo", "en", "us", 1)
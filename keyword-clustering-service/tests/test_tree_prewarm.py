@@ -0,0 +1,73 @@
+import asyncio
+
+from app.suggest_limiter import AdaptiveSuggestLimiter
+from app.tree_cache import KeywordTreeCache, tree_cache_key, tree_popularity_member
+from app.tree_prewarm import TreePrewarmer
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.zset = {}
+
+    async def get(self, key):
+        entry = self.store.get(key)
+        return entry[0] if entry else None
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = (value, ttl)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = (value, ex)
+        return True
+
+    async def ttl(self, key):
+        entry = self.store.get(key)
+        return entry[1] if entry else -2
+
+    async def zunionstore(self, dest, weights):
+        for src, w in weights.items():
+            self.zset = {m: s * w for m, s in self.zset.items()}
+
+    async def zremrangebyscore(self, key, lo, hi):
+        self.zset = {m: s for m, s in self.zset.items() if s > hi}
+
+    async def zremrangebyrank(self, key, start, stop):
+        pass
+
+    async def zrevrange(self, key, start, stop):
+        ranked = sorted(self.zset, key=lambda m: -self.zset[m])
+        return [m.encode("utf-8") for m in ranked[start : stop + 1]]
+
+
+def _prewarmer(cache, build_tree):
+    limiter = AdaptiveSuggestLimiter(rate=100, burst=10, initial_concurrency=4)
+    return TreePrewarmer(
+        cache, limiter, interval=60, top_n=10, refresh_margin=100,
+        concurrency=2, max_foreground=1, half_life=3600, max_tracked=100,
+        build_tree=build_tree,
+    )
+
+
+def test_rebuilds_only_missing_or_expiring_trees():
+    redis = FakeRedis()
+    cache = KeywordTreeCache(redis, ttl=600, partial_ttl=30)
+    for seed in ("fresh", "stale", "missing"):
+        redis.zset[tree_popularity_member(seed, "en", "us", 1)] = 5.0
+    redis.store[tree_cache_key("fresh", "en", "us", 1)] = (b"{}", 500)
+    redis.store[tree_cache_key("stale", "en", "us", 1)] = (b"{}", 20)
+    built = []
+
+    async def fake_build(seed, hl, gl, schema_version):
+        built.append(seed)
+        return {"seed": seed, "meta": {"partial": False}}
+
+    prewarmer = _prewarmer(cache, fake_build)
+
+    assert asyncio.run(prewarmer.run_once()) == 2
+    assert sorted(built) == ["missing", "stale"]
+    assert redis.store[tree_cache_key("stale", "en", "us", 1)][1] == 600
+    # The cycle lock stops a second worker (or run) until it expires.
+    assert asyncio.run(prewarmer.run_once()) == 0
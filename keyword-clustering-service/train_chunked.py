@@ -9,7 +9,7 @@ import os
 import sys
 import argparse
 from pathlib import Path
-from sentence_transformers import SentenceTransformer, InputExample, losses, evaluation
+from sentence_transformers import SentenceTransformer, losses, evaluation
 from sentence_transformers.evaluation import EmbeddingSimilarityEvaluator
 from torch.utils.data import DataLoader
 from sklearn.model_selection import train_test_split
@@ -17,6 +17,9 @@ import logging
 from datetime import datetime
 import random
 
+from pair_stream import PairStream, iter_example_chunks, reservoir_sample
+from pretokenized import use_token_cache
+
 os.environ['PYTHONUNBUFFERED'] = '1'
 sys.stdout.reconfigure(line_buffering=True) if hasattr(sys.stdout, 'reconfigure') else None
 
@@ -28,54 +31,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_training_pairs(file_path: str):
-    """Load training pairs from JSON file"""
-    logger.info(f"Loading training pairs from {file_path}...")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    if 'training_pairs' in data:
-        pairs = data['training_pairs']
-        logger.info(f"Loaded {len(pairs):,} training pairs")
-        logger.info(f"  Positive: {data.get('positive_count', 0):,}")
-        logger.info(f"  Negative: {data.get('negative_count', 0):,}")
-        return pairs
-    return data
-
-def sample_pairs(pairs, total_pairs=2000):
-    """Sample specified number of pairs from dataset"""
-    if len(pairs) <= total_pairs:
-        logger.info(f"Dataset has {len(pairs)} pairs, using all")
-        return pairs
-    
-    logger.info(f"Sampling {total_pairs:,} pairs from {len(pairs):,} total pairs...")
-    sampled = random.sample(pairs, total_pairs)
-    logger.info(f"Sampled {len(sampled):,} pairs")
-    return sampled
-
-def split_into_chunks(pairs, chunk_size=1000):
-    """Split pairs into chunks of specified size"""
-    chunks = []
-    for i in range(0, len(pairs), chunk_size):
-        chunk = pairs[i:i + chunk_size]
-        chunks.append(chunk)
-        logger.info(f"Chunk {len(chunks)}: {len(chunk):,} pairs")
-    return chunks
-
-def prepare_examples(pairs):
-    """Convert pairs to InputExample format"""
-    examples = []
-    for pair in pairs:
-        if len(pair) == 3:
-            keyword1, keyword2, similarity = pair
-            examples.append(InputExample(texts=[keyword1, keyword2], label=float(similarity)))
-        else:
-            logger.warning(f"Invalid pair format: {pair}")
-    return examples
+def load_training_pairs(file_path: str, sample_size: int = None, seed: int = 42):
+    """Stream pairs from file, keeping a uniform reservoir sample of ``sample_size``"""
+    logger.info(f"Streaming training pairs from {file_path}...")
+    stream = PairStream(file_path)
+    if sample_size:
+        pairs = reservoir_sample(stream, sample_size, random.Random(seed))
+    else:
+        pairs = list(stream)
+    logger.info(f"Read {stream.count:,} training pairs, kept {len(pairs):,}")
+    if 'positive_count' in stream.meta:
+        logger.info(f"  Positive: {stream.meta.get('positive_count', 0):,}")
+        logger.info(f"  Negative: {stream.meta.get('negative_count', 0):,}")
+    if stream.skipped:
+        logger.warning(f"Skipped {stream.skipped:,} invalid pairs")
+    return pairs
 
 def train_chunk(
     model,
-    chunk_pairs,
+    examples,
     output_dir: str,
     chunk_num: int,
     total_chunks: int,
@@ -85,13 +59,14 @@ def train_chunk(
     learning_rate: float = 2e-5,
     warmup_steps: int = 50,  # Reduced warmup for smaller chunks
     evaluation_steps: int = 100,  # More frequent evaluation for smaller chunks
+    token_cache_dir: str = None,
+    num_workers: int = 0,
 ):
     """Train model on a single chunk"""
     logger.info("=" * 60)
     logger.info(f"Training Chunk {chunk_num}/{total_chunks}")
     logger.info("=" * 60)
     
-    examples = prepare_examples(chunk_pairs)
     logger.info(f"Prepared {len(examples):,} examples from chunk")
     
     # Split into train/validation
@@ -103,8 +78,13 @@ def train_chunk(
     )
     logger.info(f"Train: {len(train_examples):,}, Validation: {len(val_examples):,}")
     
-    # Prepare data loaders
-    train_dataloader = DataLoader(train_examples, shuffle=True, batch_size=batch_size)
+    # Prepare data loaders (tokenized once into the memory-mapped cache when enabled)
+    if token_cache_dir:
+        train_dataloader = use_token_cache(
+            model, train_examples, token_cache_dir, batch_size, num_workers=num_workers
+        )
+    else:
+        train_dataloader = DataLoader(train_examples, shuffle=True, batch_size=batch_size)
     train_loss = losses.CosineSimilarityLoss(model)
     
     # Prepare evaluator
@@ -148,6 +128,8 @@ def train_model_chunked(
     warmup_steps: int = 50,
     evaluation_steps: int = 100,
     resume: bool = False,
+    token_cache_dir: str = None,
+    num_workers: int = 0,
 ):
     """Train model using chunked approach"""
     start_time = datetime.now()
@@ -156,13 +138,9 @@ def train_model_chunked(
     logger.info(f"Total pairs: {total_pairs:,}, Chunk size: {chunk_size:,}")
     logger.info("=" * 60)
     
-    # Load and sample pairs
-    all_pairs = load_training_pairs(training_pairs_file)
-    sampled_pairs = sample_pairs(all_pairs, total_pairs)
-    
-    # Split into chunks
-    chunks = split_into_chunks(sampled_pairs, chunk_size)
-    total_chunks = len(chunks)
+    # Stream and sample pairs; only the sample is ever held in memory
+    sampled_pairs = load_training_pairs(training_pairs_file, sample_size=total_pairs)
+    total_chunks = max(1, -(-len(sampled_pairs) // chunk_size))
     
     logger.info(f"Split into {total_chunks} chunks of ~{chunk_size:,} pairs each")
     
@@ -176,10 +154,12 @@ def train_model_chunked(
         logger.info("Base model loaded successfully")
     
     # Train on each chunk
-    for chunk_num, chunk_pairs in enumerate(chunks, 1):
+    chunks = iter_example_chunks(sampled_pairs, chunk_size)
+    for chunk_num, chunk_examples in enumerate(chunks, 1):
+        logger.info(f"Chunk {chunk_num}: {len(chunk_examples):,} pairs")
         model = train_chunk(
             model=model,
-            chunk_pairs=chunk_pairs,
+            examples=chunk_examples,
             output_dir=output_dir,
             chunk_num=chunk_num,
             total_chunks=total_chunks,
@@ -189,6 +169,8 @@ def train_model_chunked(
             learning_rate=learning_rate,
             warmup_steps=warmup_steps,
             evaluation_steps=evaluation_steps,
+            token_cache_dir=token_cache_dir,
+            num_workers=num_workers,
         )
     
     # Save final model
@@ -234,7 +216,7 @@ def main():
     )
     parser.add_argument(
         'training_pairs',
-        help='Path to training pairs JSON file',
+        help='Path to training pairs JSON or JSONL file',
         default='training_pairs.json',
         nargs='?'
     )
@@ -296,6 +278,22 @@ def main():
         default=100,
         help='Steps between evaluations'
     )
+    parser.add_argument(
+        '--token-cache-dir',
+        default='./data/token_cache',
+        help='Directory for memory-mapped pre-tokenized training data'
+    )
+    parser.add_argument(
+        '--no-token-cache',
+        action='store_true',
+        help='Tokenize on the fly in every batch instead of using the token cache'
+    )
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=0,
+        help='DataLoader worker processes (token cache only)'
+    )
     parser.add_argument(
         '--resume',
         action='store_true',
@@ -322,6 +320,8 @@ def main():
             warmup_steps=args.warmup_steps,
             evaluation_steps=args.evaluation_steps,
             resume=args.resume,
+            token_cache_dir=None if args.no_token_cache else args.token_cache_dir,
+            num_workers=args.num_workers,
         )
         return 0
     except Exception as e:
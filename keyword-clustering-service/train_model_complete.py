@@ -3,12 +3,16 @@ import os
 import sys
 import argparse
 from pathlib import Path
-from sentence_transformers import SentenceTransformer, InputExample, losses, evaluation
+from sentence_transformers import SentenceTransformer, losses, evaluation
 from sentence_transformers.evaluation import EmbeddingSimilarityEvaluator
 from torch.utils.data import DataLoader
 from sklearn.model_selection import train_test_split
 import logging
 from datetime import datetime
+import random
+
+from pair_stream import PairStream, reservoir_sample, to_input_example
+from pretokenized import use_token_cache
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 sys.stdout.reconfigure(line_buffering=True) if hasattr(sys.stdout, 'reconfigure') else None
@@ -21,28 +25,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_training_pairs(file_path: str):
-    logger.info(f"Loading training pairs from {file_path}...")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    if 'training_pairs' in data:
-        pairs = data['training_pairs']
-        logger.info(f"Loaded {len(pairs):,} training pairs")
-        logger.info(f"  Positive: {data.get('positive_count', 0):,}")
-        logger.info(f"  Negative: {data.get('negative_count', 0):,}")
-        return pairs
-    return data
+def load_training_pairs(file_path: str, max_pairs: int = None):
+    logger.info(f"Streaming training pairs from {file_path}...")
+    stream = PairStream(file_path)
+    if max_pairs:
+        pairs = reservoir_sample(stream, max_pairs, random.Random(42))
+    else:
+        pairs = list(stream)
+    logger.info(f"Read {stream.count:,} training pairs, kept {len(pairs):,}")
+    if 'positive_count' in stream.meta:
+        logger.info(f"  Positive: {stream.meta.get('positive_count', 0):,}")
+        logger.info(f"  Negative: {stream.meta.get('negative_count', 0):,}")
+    if stream.skipped:
+        logger.warning(f"Skipped {stream.skipped:,} invalid pairs")
+    return pairs
 
 def prepare_examples(pairs):
-    logger.info("Converting pairs to InputExample format...")
-    examples = []
-    for pair in pairs:
-        if len(pair) == 3:
-            keyword1, keyword2, similarity = pair
-            examples.append(InputExample(texts=[keyword1, keyword2], label=float(similarity)))
-        else:
-            logger.warning(f"Invalid pair format: {pair}")
+    logger.info("Converting pairs to training examples...")
+    examples = [to_input_example(pair) for pair in pairs]
     logger.info(f"Prepared {len(examples):,} examples")
     return examples
 
@@ -57,18 +57,23 @@ def train_model(
     warmup_steps: int = 100,
     evaluation_steps: int = 500,
     resume: bool = False,
+    max_pairs: int = None,
+    token_cache_dir: str = None,
+    num_workers: int = 0,
 ):
     start_time = datetime.now()
     logger.info("=" * 60)
     logger.info("Starting Custom Keyword Clustering Model Training")
     logger.info("=" * 60)
 
-    pairs = load_training_pairs(training_pairs_file)
+    pairs = load_training_pairs(training_pairs_file, max_pairs=max_pairs)
 
     if not pairs:
         raise ValueError("No training pairs found in file")
 
     examples = prepare_examples(pairs)
+    pairs_count = len(pairs)
+    del pairs
 
     logger.info(f"Splitting data (train: {train_ratio*100:.1f}%, validation: {(1-train_ratio)*100:.1f}%)...")
     train_examples, val_examples = train_test_split(
@@ -108,7 +113,13 @@ def train_model(
         logger.info("Base model loaded successfully")
 
     logger.info(f"Preparing data loaders (batch size: {batch_size})...")
-    train_dataloader = DataLoader(train_examples, shuffle=True, batch_size=batch_size)
+    if token_cache_dir:
+        logger.info(f"Using pre-tokenized cache in {token_cache_dir} (workers: {num_workers})...")
+        train_dataloader = use_token_cache(
+            model, train_examples, token_cache_dir, batch_size, num_workers=num_workers
+        )
+    else:
+        train_dataloader = DataLoader(train_examples, shuffle=True, batch_size=batch_size)
 
     logger.info("Initializing loss function (CosineSimilarityLoss)...")
     train_loss = losses.CosineSimilarityLoss(model)
@@ -166,7 +177,7 @@ def train_model(
 
         metadata = {
             'base_model': base_model,
-            'training_pairs_count': len(pairs),
+            'training_pairs_count': pairs_count,
             'train_examples': len(train_examples),
             'val_examples': len(val_examples),
             'epochs': epochs,
@@ -201,7 +212,7 @@ def main():
     )
     parser.add_argument(
         'training_pairs',
-        help='Path to training pairs JSON file',
+        help='Path to training pairs JSON or JSONL file',
         default='training_pairs.json',
         nargs='?'
     )
@@ -251,6 +262,28 @@ def main():
         default=500,
         help='Steps between evaluations'
     )
+    parser.add_argument(
+        '--max-pairs',
+        type=int,
+        default=None,
+        help='Train on a uniform sample of this many pairs (default: all)'
+    )
+    parser.add_argument(
+        '--token-cache-dir',
+        default='./data/token_cache',
+        help='Directory for memory-mapped pre-tokenized training data'
+    )
+    parser.add_argument(
+        '--no-token-cache',
+        action='store_true',
+        help='Tokenize on the fly in every batch instead of using the token cache'
+    )
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=0,
+        help='DataLoader worker processes (token cache only)'
+    )
     parser.add_argument(
         '--resume',
         action='store_true',
@@ -277,6 +310,9 @@ def main():
             warmup_steps=args.warmup_steps,
             evaluation_steps=args.evaluation_steps,
             resume=args.resume,
+            max_pairs=args.max_pairs,
+            token_cache_dir=None if args.no_token_cache else args.token_cache_dir,
+            num_workers=args.num_workers,
         )
         return 0
     except Exception as e:
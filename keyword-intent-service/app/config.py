@@ -4,12 +4,46 @@ import os
 # Max keywords per request (input cap)
 MAX_KEYWORDS_INPUT = 1000
 
+# Max keywords per /classify request
+CLASSIFY_MAX_KEYWORDS = int(os.getenv("CLASSIFY_MAX_KEYWORDS", "10000"))
+
 # Number of top keywords to return
 TOP_N_INFORMATIONAL = 100
 
 # spaCy model name (small English model)
 SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
 
+# Pipeline components not needed for scoring (only POS tags and the parse are used)
+SPACY_EXCLUDE = [
+    c.strip() for c in os.getenv("SPACY_EXCLUDE", "ner,lemmatizer").split(",") if c.strip()
+]
+
+# Keywords per nlp.pipe batch
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "256"))
+
+# Score cache: in-process LRU entries, and Redis (REDIS_URL / REDIS_HOST) behind it
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "100000"))
+SCORE_CACHE_REDIS = os.getenv("SCORE_CACHE_REDIS", "true").lower() in ("1", "true", "yes")
+SCORE_CACHE_TTL = int(os.getenv("SCORE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# /rank/stream: keywords scored per batch, largest top_n, longest line, and dedupe memory bounds
+# (STREAM_BLOOM_CAPACITY is the first Bloom stage; 0 = twice STREAM_DEDUPE_EXACT_LIMIT)
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+STREAM_MAX_TOP_N = int(os.getenv("STREAM_MAX_TOP_N", "10000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+STREAM_DEDUPE_EXACT_LIMIT = int(os.getenv("STREAM_DEDUPE_EXACT_LIMIT", "1000000"))
+STREAM_BLOOM_CAPACITY = int(os.getenv("STREAM_BLOOM_CAPACITY", "0"))
+STREAM_BLOOM_ERROR_RATE = float(os.getenv("STREAM_BLOOM_ERROR_RATE", "0.001"))
+
+# Process-pool scoring: workers (0 = from the CPU quota), batch size that triggers
+# sharding, and smallest shard sent to a worker
+SCORING_POOL_WORKERS = int(os.getenv("SCORING_POOL_WORKERS", "0"))
+SCORING_POOL_MIN_KEYWORDS = int(os.getenv("SCORING_POOL_MIN_KEYWORDS", "1000"))
+SCORING_POOL_MIN_SHARD = int(os.getenv("SCORING_POOL_MIN_SHARD", "250"))
+
+# Learned informational weights (scripts/train_intent_weights.py); empty = hand-weighted scorer
+INTENT_WEIGHTS_FILE = os.getenv("INTENT_WEIGHTS_FILE", "")
+
 # Server
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8002"))
@@ -7,9 +7,10 @@ Scores keywords (0–100) based on signals that indicate informational search in
 - Sentence structure (questions, length)
 - POS and dependency features from spaCy
 """
+import hashlib
 import re
 import logging
-from typing import List, Tuple
+from typing import Dict, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -43,8 +44,31 @@ INFORMATIONAL_PHRASES = [
     r"\bguide to\b", r"\btutorial on\b", r"\blearn (about|how)\b", r"\bmeaning of\b",
 ]
 
+# Other intents: whole-word terms (matched with word boundaries, like the phrases)
+COMMERCIAL_TERMS = [
+    "best", "top", "top rated", "review", "reviews", "rated", "ratings", "vs", "versus",
+    "compare", "comparison", "alternative", "alternatives", "cheapest", "affordable",
+    "pricing", "worth it", "recommended", "brands", "ranking", "rankings", "features",
+    "specs", "which is better", "better than",
+]
+TRANSACTIONAL_TERMS = [
+    "buy", "order", "purchase", "price", "prices", "cost", "coupon", "coupons",
+    "promo code", "discount", "deal", "deals", "cheap", "sale", "for sale", "shop",
+    "store", "subscribe", "subscription", "free trial", "download", "book", "booking",
+    "reserve", "hire", "rent", "near me", "delivery", "shipping", "sign up", "quote",
+]
+NAVIGATIONAL_TERMS = [
+    "login", "log in", "sign in", "signin", "official site", "official website",
+    "website", "homepage", "app", "account", "my account", "contact", "customer service",
+    "phone number", "support", "portal", "dashboard",
+]
+# Navigational substrings (domains), matched anywhere
+NAVIGATIONAL_MARKERS = [".com", ".org", ".net", ".io", ".co.uk", "www."]
+
+INTENTS = ("informational", "commercial", "transactional", "navigational")
 
-def _normalize(text: str) -> str:
+
+def normalize_keyword(text: str) -> str:
     """Normalize keyword for scoring: strip, lowercase, collapse spaces."""
     if not text or not isinstance(text, str):
         return ""
@@ -53,7 +77,7 @@ def _normalize(text: str) -> str:
 
 def _score_question_words(text: str) -> float:
     """Score 0–1 based on question words at start and in text."""
-    normalized = _normalize(text)
+    normalized = normalize_keyword(text)
     if not normalized:
         return 0.0
     tokens = normalized.split()
@@ -67,23 +91,163 @@ def _score_question_words(text: str) -> float:
     return min(1.0, score)
 
 
+def _expand_phrase(pattern: str) -> List[str]:
+    """Literal strings matched by an INFORMATIONAL_PHRASES pattern ("\\btypes? of\\b" -> types of, type of)."""
+    if not (pattern.startswith(r"\b") and pattern.endswith(r"\b")):
+        raise ValueError(f"phrase pattern must be word-bounded: {pattern!r}")
+    body = pattern[2:-2]
+    variants = [""]
+    i = 0
+    while i < len(body):
+        if body[i] == "(":
+            end = body.index(")", i)
+            options = body[i + 1:end].split("|")
+            i = end + 1
+        else:
+            options = [body[i]]
+            i += 1
+        if i < len(body) and body[i] == "?":
+            options = options + [""]
+            i += 1
+        variants = [v + o for v in variants for o in options]
+    return variants
+
+
+class _TrieNode:
+    __slots__ = ("children", "markers", "phrases")
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.markers = []
+        self.phrases = []
+
+
+def _build_marker_matcher():
+    """
+    Compile every intent's markers and terms into one regex.
+
+    Every literal (informational markers and phrase variants, the other
+    intents' terms and domain markers) goes into a character trie, emitted as
+    a regex wrapped in a lookahead, so finditer visits every start position
+    and reports all literals starting there. Literals that match at the same
+    position are prefixes of one another, i.e. lie on one trie path; each end
+    of a literal is an empty named group on that path. Markers match as plain
+    substrings; phrase and term ends also require a word boundary, as the
+    original \\b...\\b patterns do.
+    """
+    root = _TrieNode()
+
+    def insert(literal: str) -> _TrieNode:
+        node = root
+        for ch in literal:
+            node = node.children.setdefault(ch, _TrieNode())
+        return node
+
+    for marker in sorted(INFORMATIONAL_MARKERS):
+        insert(marker).markers.append(("informational", marker))
+    for marker in NAVIGATIONAL_MARKERS:
+        insert(marker).markers.append(("navigational", marker))
+    for index, pattern in enumerate(INFORMATIONAL_PHRASES):
+        for variant in _expand_phrase(pattern):
+            insert(variant).phrases.append(("informational", index))
+    for intent, terms in (
+        ("commercial", COMMERCIAL_TERMS),
+        ("transactional", TRANSACTIONAL_TERMS),
+        ("navigational", NAVIGATIONAL_TERMS),
+    ):
+        for term in terms:
+            insert(term).phrases.append((intent, term))
+
+    groups = {}
+    # Group names on the path down to each group, root first.
+    chains = {}
+
+    def emit(node: _TrieNode, path: Tuple[str, ...]) -> str:
+        out = ""
+        if node.markers:
+            name = f"m{len(groups)}"
+            groups[name] = ("marker", tuple(node.markers))
+            path = chains[name] = path + (name,)
+            out += f"(?P<{name}>)"
+        if node.phrases:
+            name = f"p{len(groups)}"
+            groups[name] = ("phrase", tuple(node.phrases))
+            path = chains[name] = path + (name,)
+            out += rf"(?:\b(?P<{name}>))?"
+        if node.children:
+            alts = [re.escape(ch) + emit(child, path) for ch, child in sorted(node.children.items())]
+            body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+            out += f"(?:{body})?" if node.markers or node.phrases else body
+        return out
+
+    return re.compile("(?=" + emit(root, ()) + ")"), groups, chains
+
+
+_MARKER_MATCHER, _MARKER_GROUPS, _MARKER_CHAINS = _build_marker_matcher()
+_NON_WORD = re.compile(r"\W")
+# Markers are summed in INFORMATIONAL_MARKERS iteration order, as the per-marker loop did.
+_MARKER_ORDER = {marker: i for i, marker in enumerate(INFORMATIONAL_MARKERS)}
+
+
+def scan_intent_terms(normalized: str) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    One scan of a normalized keyword for every intent's markers and terms.
+
+    Returns ``(markers, phrases)``, both ``{intent: {key: first position}}``:
+    substring markers keyed by the marker, word-bounded phrases and terms keyed
+    by the term (by pattern index for INFORMATIONAL_PHRASES).
+    """
+    markers: Dict[str, Dict] = {}
+    phrases: Dict[str, Dict] = {}
+    for m in _MARKER_MATCHER.finditer(normalized):
+        if m.lastgroup is None:
+            # Only term ends that failed their word-boundary check.
+            continue
+        pos = m.start()
+        word_start = None
+        for name in _MARKER_CHAINS[m.lastgroup]:
+            if m.group(name) is None:
+                continue
+            kind, values = _MARKER_GROUPS[name]
+            if kind == "marker":
+                for intent, key in values:
+                    markers.setdefault(intent, {}).setdefault(key, pos)
+                continue
+            if word_start is None:
+                word_start = pos == 0 or _NON_WORD.match(normalized, pos - 1) is not None
+            if word_start:
+                for intent, key in values:
+                    phrases.setdefault(intent, {}).setdefault(key, pos)
+    return markers, phrases
+
+
+def find_informational_markers(normalized: str) -> Tuple[Dict[str, int], Set[int]]:
+    """
+    Informational markers found in a normalized keyword, with the position of
+    each one's first occurrence (0 earns the "starts with" bonus), and the
+    indices of the INFORMATIONAL_PHRASES patterns that match.
+    """
+    markers, phrases = scan_intent_terms(normalized)
+    return markers.get("informational", {}), set(phrases.get("informational", ()))
+
+
 def _score_informational_markers(text: str) -> float:
     """Score 0–1 based on informational lexical markers."""
-    normalized = _normalize(text)
+    normalized = normalize_keyword(text)
     if not normalized:
         return 0.0
-    tokens = set(normalized.split())
+    markers, phrases = find_informational_markers(normalized)
+    return _informational_marker_score(markers, phrases)
+
+
+def _informational_marker_score(markers: Dict[str, int], phrases) -> float:
     score = 0.0
-    for marker in INFORMATIONAL_MARKERS:
-        if marker in normalized:  # phrase or word
-            if normalized.startswith(marker) or normalized.split()[0] == marker:
-                score += 0.15
-            else:
-                score += 0.08
+    for marker in sorted(markers, key=_MARKER_ORDER.__getitem__):
+        # Starts with the marker (phrase or word)
+        score += 0.15 if markers[marker] == 0 else 0.08
     # Multi-word phrase matches
-    for pattern in INFORMATIONAL_PHRASES:
-        if re.search(pattern, normalized):
-            score += 0.12
+    for _ in phrases:
+        score += 0.12
     return min(1.0, score)
 
 
@@ -126,6 +290,93 @@ def _score_spacy(doc) -> float:
     return min(1.0, score)
 
 
+# Weighted combination of signals
+W_QUESTION = 0.30
+W_MARKERS = 0.35
+W_STRUCTURE = 0.15
+W_SPACY = 0.20
+
+# Scoring modes: "full" parses every keyword with spaCy; "fast" uses the rule
+# signals only, with their weights rescaled to sum to 1
+SCORING_MODES = ("full", "fast")
+FAST_SCALE = 1.0 / (W_QUESTION + W_MARKERS + W_STRUCTURE)
+
+# Keywords per nlp.pipe batch
+DEFAULT_BATCH_SIZE = 256
+
+
+def _combine(s_question: float, s_markers: float, s_structure: float, s_spacy: float) -> float:
+    raw = (
+        W_QUESTION * s_question
+        + W_MARKERS * s_markers
+        + W_STRUCTURE * s_structure
+        + W_SPACY * s_spacy
+    )
+    # Scale to 0–100 and round
+    return round(min(100.0, max(0.0, raw * 100)), 2)
+
+
+def _combine_fast(s_question: float, s_markers: float, s_structure: float) -> float:
+    return _combine(s_question * FAST_SCALE, s_markers * FAST_SCALE, s_structure * FAST_SCALE, 0.0)
+
+
+def rule_scores(keyword: str) -> Tuple[float, float, float]:
+    return (
+        _score_question_words(keyword),
+        _score_informational_markers(keyword),
+        _score_question_structure(keyword),
+    )
+
+
+def spacy_doc_scores(
+    keywords: List[str], nlp, batch_size: int, doc_score=_score_spacy, default=0.0
+) -> list:
+    """doc_score of each keyword's doc, parsed with nlp.pipe in batches of batch_size."""
+    scores = []
+    for start in range(0, len(keywords), batch_size):
+        batch = keywords[start:start + batch_size]
+        try:
+            scores.extend(doc_score(doc) for doc in nlp.pipe(batch, batch_size=batch_size))
+        except Exception as e:
+            # One bad keyword shouldn't zero its whole batch; retry one at a time.
+            logger.debug("spaCy batch failed, scoring individually: %s", e)
+            for keyword in batch:
+                try:
+                    scores.append(doc_score(nlp(keyword)))
+                except Exception as e:
+                    logger.debug("spaCy analysis failed for %r: %s", keyword[:50], e)
+                    scores.append(default)
+    return scores
+
+
+def score_keywords_informational_intent(
+    keywords: List[str],
+    nlp,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    mode: str = "full",
+) -> List[float]:
+    """
+    Informational intent scores (0–100) for a batch of stripped, non-empty keywords.
+
+    Same scores as score_keyword_informational_intent, but all keywords go
+    through spaCy together via nlp.pipe. mode="fast" skips spaCy and scores
+    from the rule signals alone (nlp is not used).
+    """
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode: {mode!r}")
+    if not keywords:
+        return []
+    if mode == "fast":
+        return [_combine_fast(*rule_scores(keyword)) for keyword in keywords]
+    spacy_scores = (
+        spacy_doc_scores(keywords, nlp, batch_size) if nlp is not None else [0.0] * len(keywords)
+    )
+    return [
+        _combine(*rule_scores(keyword), s_spacy)
+        for keyword, s_spacy in zip(keywords, spacy_scores)
+    ]
+
+
 def score_keyword_informational_intent(
     keyword: str,
     nlp,
@@ -138,39 +389,54 @@ def score_keyword_informational_intent(
     keyword = (keyword or "").strip()
     if not keyword:
         return 0.0
+    return score_keywords_informational_intent([keyword], nlp)[0]
 
-    # Weighted combination of signals
-    w_question = 0.30
-    w_markers = 0.35
-    w_structure = 0.15
-    w_spacy = 0.20
 
-    s_question = _score_question_words(keyword)
-    s_markers = _score_informational_markers(keyword)
-    s_structure = _score_question_structure(keyword)
-
-    s_spacy = 0.0
-    if nlp is not None:
+def scorer_version(nlp, mode: str = "full") -> str:
+    """
+    Short hash identifying the scores this scorer produces: this module's
+    source plus the spaCy model and pipeline (or their absence). Fast mode
+    gets its own version, independent of the model.
+    """
+    h = hashlib.sha256()
+    with open(__file__, "rb") as f:
+        h.update(f.read())
+    if mode != "full":
+        h.update(f"mode={mode}".encode("utf-8"))
+    elif nlp is not None:
+        meta = getattr(nlp, "meta", {}) or {}
+        h.update(
+            f"{meta.get('lang')}_{meta.get('name')}|{meta.get('version')}|{','.join(nlp.pipe_names)}".encode("utf-8")
+        )
         try:
-            doc = nlp(keyword)
-            s_spacy = _score_spacy(doc)
-        except Exception as e:
-            logger.debug("spaCy analysis failed for %r: %s", keyword[:50], e)
+            import spacy
 
-    raw = (
-        w_question * s_question
-        + w_markers * s_markers
-        + w_structure * s_structure
-        + w_spacy * s_spacy
-    )
-    # Scale to 0–100 and round
-    return round(min(100.0, max(0.0, raw * 100)), 2)
+            h.update(spacy.__version__.encode("utf-8"))
+        except ImportError:
+            pass
+    return h.hexdigest()[:12]
+
+
+def select_top(scored: List[Tuple[str, float]], top_n: int) -> List[Tuple[str, float]]:
+    """The top_n (keyword, score) pairs, score descending, ties by keyword."""
+    return sorted(scored, key=lambda x: (-x[1], x[0]))[:top_n]
+
+
+def dedupe_keywords(keywords: List[str]) -> List[str]:
+    """Stripped, non-empty keywords in first-seen order, without repeats."""
+    unique = {}
+    for k in keywords:
+        k_clean = (k or "").strip()
+        if k_clean:
+            unique.setdefault(k_clean, None)
+    return list(unique)
 
 
 def rank_keywords_by_informational_intent(
     keywords: List[str],
     nlp,
     top_n: int = 100,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> List[Tuple[str, float]]:
     """
     Score all keywords and return top_n (keyword, score) sorted by score descending.
@@ -178,15 +444,111 @@ def rank_keywords_by_informational_intent(
     if not keywords:
         return []
 
-    scored: List[Tuple[str, float]] = []
-    seen = set()
-    for k in keywords:
-        k_clean = (k or "").strip()
-        if not k_clean or k_clean in seen:
-            continue
-        seen.add(k_clean)
-        score = score_keyword_informational_intent(k_clean, nlp)
-        scored.append((k_clean, score))
+    unique = dedupe_keywords(keywords)
+    scores = score_keywords_informational_intent(unique, nlp, batch_size=batch_size)
+    return select_top(list(zip(unique, scores)), top_n)
+
+
+# --- Multi-intent classification -------------------------------------------
+
+# Intent scores below this leave the keyword labelled informational
+LABEL_MIN_SCORE = 10.0
+# Equal scores resolve in this order (most specific first)
+LABEL_PRIORITY = ("navigational", "transactional", "commercial", "informational")
+
+DIGIT_RE = re.compile(r"\d")
+
 
-    scored.sort(key=lambda x: (-x[1], x[0]))
-    return scored[:top_n]
+def _score_terms(hits: Dict[str, int]) -> float:
+    """Score 0–1 from distinct term hits: 0.5 for a term the keyword starts with, 0.35 otherwise."""
+    score = 0.0
+    for pos in hits.values():
+        score += 0.5 if pos == 0 else 0.35
+    return min(1.0, score)
+
+
+def _spacy_intent_features(doc) -> Tuple[float, float, float, float]:
+    """
+    Per-intent spaCy scores (0–1) from one parse: informational (as _score_spacy),
+    commercial (superlatives), transactional (imperative verb, amounts) and
+    navigational (a short all-proper-noun keyword, i.e. a brand or site name).
+    """
+    if doc is None or len(doc) == 0:
+        return 0.0, 0.0, 0.0, 0.0
+    commercial = 0.0
+    transactional = 0.0
+    for token in doc:
+        if token.tag_ in ("JJS", "RBS"):
+            commercial = 1.0
+        if token.pos_ in ("NUM", "SYM") or token.like_num:
+            transactional = max(transactional, 0.3)
+    first = doc[0]
+    if first.pos_ == "VERB" and first.text.lower() not in QUESTION_WORDS and first.tag_ == "VB":
+        transactional = 1.0
+    navigational = 1.0 if len(doc) <= 3 and all(t.pos_ == "PROPN" for t in doc) else 0.0
+    return _score_spacy(doc), commercial, transactional, navigational
+
+
+def _intent_scores(keyword: str, spacy_features: Tuple[float, float, float, float]) -> Dict[str, float]:
+    normalized = normalize_keyword(keyword)
+    markers, phrases = scan_intent_terms(normalized)
+    s_info_spacy, s_comm_spacy, s_trans_spacy, s_nav_spacy = spacy_features
+
+    s_question = _score_question_words(keyword)
+    s_markers = _informational_marker_score(
+        markers.get("informational", {}), phrases.get("informational", ())
+    ) if normalized else 0.0
+    s_structure = _score_question_structure(keyword)
+
+    commercial = (
+        0.65 * _score_terms(phrases.get("commercial", {}))
+        + 0.15 * (1.0 if DIGIT_RE.search(normalized) else 0.0)
+        + 0.20 * s_comm_spacy
+    )
+    transactional = 0.70 * _score_terms(phrases.get("transactional", {})) + 0.30 * s_trans_spacy
+    nav_hits = {**phrases.get("navigational", {}), **markers.get("navigational", {})}
+    navigational = 0.60 * _score_terms(nav_hits) + 0.40 * s_nav_spacy
+    return {
+        "informational": _combine(s_question, s_markers, s_structure, s_info_spacy),
+        "commercial": round(min(100.0, commercial * 100), 2),
+        "transactional": round(min(100.0, transactional * 100), 2),
+        "navigational": round(min(100.0, navigational * 100), 2),
+    }
+
+
+def intent_label(scores: Dict[str, float]) -> str:
+    """Highest-scoring intent; informational when nothing reaches LABEL_MIN_SCORE."""
+    best = max(LABEL_PRIORITY, key=lambda intent: (scores[intent], -LABEL_PRIORITY.index(intent)))
+    return best if scores[best] >= LABEL_MIN_SCORE else "informational"
+
+
+def score_keywords_intents(
+    keywords: List[str],
+    nlp,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Dict[str, float]]:
+    """
+    Scores (0–100) for all four intents per keyword, from one marker scan and
+    one spaCy parse per keyword. The informational score equals
+    score_keywords_informational_intent's.
+    """
+    if not keywords:
+        return []
+    if nlp is not None:
+        features = spacy_doc_scores(
+            keywords, nlp, batch_size, doc_score=_spacy_intent_features, default=(0.0, 0.0, 0.0, 0.0)
+        )
+    else:
+        features = [(0.0, 0.0, 0.0, 0.0)] * len(keywords)
+    return [_intent_scores(keyword, f) for keyword, f in zip(keywords, features)]
+
+
+def classify_keywords(
+    keywords: List[str],
+    nlp,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Tuple[str, str, Dict[str, float]]]:
+    """(keyword, label, scores) for each unique, non-empty keyword, in input order."""
+    unique = dedupe_keywords(keywords)
+    scores = score_keywords_intents(unique, nlp, batch_size=batch_size)
+    return [(k, intent_label(s), s) for k, s in zip(unique, scores)]
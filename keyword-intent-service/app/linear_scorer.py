@@ -0,0 +1,241 @@
+"""
+Learned linear informational intent scorer.
+
+A batch of keywords becomes one NumPy feature matrix (question-word flags,
+informational marker and phrase hits, other-intent term hits, length buckets,
+spaCy POS-pattern flags) and is scored with one matrix-vector product against
+weights fitted offline by scripts/train_intent_weights.py:
+
+    score = 100 * sigmoid(X @ w)
+
+The weights live in a small versioned JSON file (INTENT_WEIGHTS_FILE) mapping
+feature names to weights, so they can be retrained and redeployed without code
+changes. Without a weights file the hand-weighted scorer in intent_scorer is used.
+"""
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.intent_scorer import (
+    DEFAULT_BATCH_SIZE,
+    DIGIT_RE,
+    INFORMATIONAL_MARKERS,
+    INFORMATIONAL_PHRASES,
+    QUESTION_WORDS,
+    normalize_keyword,
+    scan_intent_terms,
+    spacy_doc_scores,
+)
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FORMAT = 1
+
+# Feature extraction lives in this module, so its source is part of every
+# scorer version: changing a feature without retraining must not serve cached scores.
+with open(__file__, "rb") as _f:
+    _SOURCE_DIGEST = hashlib.sha256(_f.read()).hexdigest()
+
+# Word-count buckets: (feature, min words, max words)
+_WORD_BUCKETS = (
+    ("words:1", 1, 1),
+    ("words:2", 2, 2),
+    ("words:3-5", 3, 5),
+    ("words:6-8", 6, 8),
+    ("words:9+", 9, None),
+)
+_POS_FLAGS = (
+    "pos:wh_word_start",    # ADV/PRON/SCONJ question word in the first five tokens
+    "pos:question_dep",     # question word as ROOT/aux/advcl in the first five tokens
+    "pos:root_verb",
+    "pos:imperative_start",  # base-form verb first, e.g. "buy", "download"
+    "pos:all_propn",
+    "pos:superlative",
+    "pos:number",
+)
+
+FEATURE_NAMES: Tuple[str, ...] = (
+    "bias",
+    *(f"question_first:{w}" for w in sorted(QUESTION_WORDS)),
+    "question_words",
+    "question_mark",
+    *(name for name, _, _ in _WORD_BUCKETS),
+    *(f"marker:{m}" for m in sorted(INFORMATIONAL_MARKERS)),
+    "marker_start",
+    *(f"phrase:{p}" for p in INFORMATIONAL_PHRASES),
+    "commercial_terms",
+    "transactional_terms",
+    "navigational_terms",
+    "digit",
+    *_POS_FLAGS,
+)
+FEATURE_INDEX: Dict[str, int] = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+_NO_POS = (0.0,) * len(_POS_FLAGS)
+
+
+def _pos_flags(doc) -> Tuple[float, ...]:
+    if doc is None or len(doc) == 0:
+        return _NO_POS
+    wh_start = question_dep = superlative = number = False
+    root_verb = None
+    all_propn = len(doc) <= 3
+    for i, token in enumerate(doc):
+        if i < 5 and token.text.lower() in QUESTION_WORDS:
+            wh_start = wh_start or token.pos_ in ("ADV", "PRON", "SCONJ")
+            question_dep = question_dep or token.dep_ in ("ROOT", "aux", "advcl")
+        if token.dep_ == "ROOT" and root_verb is None:
+            root_verb = token.pos_ == "VERB"
+        all_propn = all_propn and token.pos_ == "PROPN"
+        superlative = superlative or token.tag_ in ("JJS", "RBS")
+        number = number or token.pos_ in ("NUM", "SYM") or token.like_num
+    first = doc[0]
+    imperative = first.pos_ == "VERB" and first.tag_ == "VB" and first.text.lower() not in QUESTION_WORDS
+    return (
+        float(wh_start),
+        float(question_dep),
+        float(bool(root_verb)),
+        float(imperative),
+        float(all_propn),
+        float(superlative),
+        float(number),
+    )
+
+
+def _rule_features(keyword: str) -> List[Tuple[int, float]]:
+    """(column, value) pairs of the non-zero rule features of one keyword."""
+    features = [(FEATURE_INDEX["bias"], 1.0)]
+    normalized = normalize_keyword(keyword)
+    if not normalized:
+        return features
+    tokens = normalized.split()
+    if tokens[0] in QUESTION_WORDS:
+        features.append((FEATURE_INDEX[f"question_first:{tokens[0]}"], 1.0))
+    question_words = sum(1 for t in tokens if t in QUESTION_WORDS)
+    if question_words:
+        features.append((FEATURE_INDEX["question_words"], min(question_words, 3) / 3))
+    if keyword.strip().endswith("?"):
+        features.append((FEATURE_INDEX["question_mark"], 1.0))
+    word_count = len(keyword.split())
+    for name, low, high in _WORD_BUCKETS:
+        if word_count >= low and (high is None or word_count <= high):
+            features.append((FEATURE_INDEX[name], 1.0))
+            break
+
+    markers, phrases = scan_intent_terms(normalized)
+    info_markers = markers.get("informational", {})
+    for marker in info_markers:
+        features.append((FEATURE_INDEX[f"marker:{marker}"], 1.0))
+    if 0 in info_markers.values():
+        features.append((FEATURE_INDEX["marker_start"], 1.0))
+    for i in phrases.get("informational", ()):
+        features.append((FEATURE_INDEX[f"phrase:{INFORMATIONAL_PHRASES[i]}"], 1.0))
+    if phrases.get("commercial"):
+        features.append((FEATURE_INDEX["commercial_terms"], 1.0))
+    if phrases.get("transactional"):
+        features.append((FEATURE_INDEX["transactional_terms"], 1.0))
+    if phrases.get("navigational") or markers.get("navigational"):
+        features.append((FEATURE_INDEX["navigational_terms"], 1.0))
+    if DIGIT_RE.search(normalized):
+        features.append((FEATURE_INDEX["digit"], 1.0))
+    return features
+
+
+def feature_matrix(keywords: List[str], nlp=None, batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """
+    Feature matrix (len(keywords) x len(FEATURE_NAMES), float32) for stripped
+    keywords. POS-pattern columns are parsed with nlp.pipe and stay zero when
+    nlp is None.
+    """
+    matrix = np.zeros((len(keywords), len(FEATURE_NAMES)), dtype=np.float32)
+    if not keywords:
+        return matrix
+    rows: List[int] = []
+    cols: List[int] = []
+    values: List[float] = []
+    for row, keyword in enumerate(keywords):
+        for col, value in _rule_features(keyword):
+            rows.append(row)
+            cols.append(col)
+            values.append(value)
+    matrix[rows, cols] = values
+    if nlp is not None:
+        pos_start = FEATURE_INDEX[_POS_FLAGS[0]]
+        matrix[:, pos_start:pos_start + len(_POS_FLAGS)] = spacy_doc_scores(
+            keywords, nlp, batch_size, doc_score=_pos_flags, default=_NO_POS
+        )
+    return matrix
+
+
+class LinearIntentScorer:
+    """Logistic scores (0–100) from a feature matrix and a weight vector over FEATURE_NAMES."""
+
+    def __init__(self, weights: np.ndarray, version: str, meta: Optional[dict] = None) -> None:
+        if weights.shape != (len(FEATURE_NAMES),):
+            raise ValueError(f"Expected {len(FEATURE_NAMES)} weights, got {weights.shape}")
+        self.weights = weights.astype(np.float32)
+        self.version = version
+        self.meta = meta or {}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LinearIntentScorer":
+        if data.get("format") != WEIGHTS_FORMAT:
+            raise ValueError(f"Unsupported weights format: {data.get('format')!r}")
+        named = data["features"]
+        unknown = sorted(set(named) - set(FEATURE_INDEX))
+        if unknown:
+            raise ValueError(f"Weights for unknown features (trained on another feature set?): {unknown[:5]}")
+        missing = [name for name in FEATURE_NAMES if name not in named]
+        if missing:
+            logger.warning("Weights file has no weight for %d features; using 0 for them", len(missing))
+        weights = np.array([named.get(name, 0.0) for name in FEATURE_NAMES], dtype=np.float32)
+        h = hashlib.sha256(json.dumps(named, sort_keys=True).encode("utf-8"))
+        h.update(_SOURCE_DIGEST.encode("ascii"))
+        digest = h.hexdigest()[:8]
+        meta = {k: v for k, v in data.items() if k != "features"}
+        return cls(weights, f"{data.get('version', 'unversioned')}-{digest}", meta)
+
+    @classmethod
+    def from_file(cls, path: str) -> "LinearIntentScorer":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> dict:
+        return {
+            **self.meta,
+            "format": WEIGHTS_FORMAT,
+            "features": {name: round(float(w), 6) for name, w in zip(FEATURE_NAMES, self.weights)},
+        }
+
+    def score_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        logits = (matrix @ self.weights).astype(np.float64)
+        return np.round(100.0 / (1.0 + np.exp(-logits)), 2)
+
+    def score_keywords(self, keywords: List[str], nlp, batch_size: int = DEFAULT_BATCH_SIZE) -> List[float]:
+        """Informational intent scores (0–100) for stripped, non-empty keywords."""
+        if not keywords:
+            return []
+        return self.score_matrix(feature_matrix(keywords, nlp, batch_size)).tolist()
+
+
+_linear_scorer: Optional[LinearIntentScorer] = None
+
+
+def init_linear_scorer() -> Optional[LinearIntentScorer]:
+    """Load the worker-wide scorer from INTENT_WEIGHTS_FILE; None when unset."""
+    global _linear_scorer
+    from app.config import INTENT_WEIGHTS_FILE
+
+    if not INTENT_WEIGHTS_FILE:
+        _linear_scorer = None
+        return None
+    _linear_scorer = LinearIntentScorer.from_file(INTENT_WEIGHTS_FILE)
+    logger.info("Linear intent scorer loaded from %s (version %s)", INTENT_WEIGHTS_FILE, _linear_scorer.version)
+    return _linear_scorer
+
+
+def get_linear_scorer() -> Optional[LinearIntentScorer]:
+    return _linear_scorer
@@ -6,12 +6,38 @@ by informational intent score.
 """
 import logging
 import os
+from typing import Literal
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 
-from app.config import MAX_KEYWORDS_INPUT, SPACY_MODEL, TOP_N_INFORMATIONAL
-from app.intent_scorer import rank_keywords_by_informational_intent
+from app.config import (
+    CLASSIFY_MAX_KEYWORDS,
+    INTENT_WEIGHTS_FILE,
+    MAX_KEYWORDS_INPUT,
+    SPACY_BATCH_SIZE,
+    SPACY_EXCLUDE,
+    SPACY_MODEL,
+    STREAM_BATCH_SIZE,
+    STREAM_BLOOM_CAPACITY,
+    STREAM_BLOOM_ERROR_RATE,
+    STREAM_DEDUPE_EXACT_LIMIT,
+    STREAM_MAX_LINE_BYTES,
+    STREAM_MAX_TOP_N,
+    TOP_N_INFORMATIONAL,
+)
+from app.intent_scorer import (
+    classify_keywords,
+    dedupe_keywords,
+    intent_label,
+    score_keywords_informational_intent,
+    scorer_version,
+    select_top,
+)
+from app.linear_scorer import get_linear_scorer, init_linear_scorer
+from app.score_cache import get_score_cache, init_score_cache
+from app.scoring_pool import get_scoring_pool, init_scoring_pool, shutdown_scoring_pool
+from app.stream_rank import KeywordDeduper, TopN, iter_keywords
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +50,10 @@ app = FastAPI(
 
 nlp = None
 
+# "full": rules + spaCy parse; "fast": rule signals only, no spaCy
+ScoringMode = Literal["full", "fast"]
+MODE_QUERY = Query("full", description="full (rules + spaCy) or fast (rule signals only, no spaCy parse).")
+
 
 class RankRequest(BaseModel):
     """Request body: list of keywords from an external source."""
@@ -52,6 +82,53 @@ class RankResponse(BaseModel):
     )
     total_input: int = Field(..., description="Number of unique keywords processed.")
     top_n: int = Field(..., description="Requested/used top_n (default 100).")
+    cache_hits: int = Field(0, description="Unique keywords whose score came from the score cache.")
+    cache_hit_ratio: float = Field(0.0, description="cache_hits / unique keywords.")
+    mode: str = Field("full", description="Scoring mode used: full or fast.")
+
+
+class ClassifyRequest(BaseModel):
+    """Request body: keywords to label with a search intent."""
+
+    keywords: list[str] = Field(
+        ...,
+        description=f"Keywords to classify (max {CLASSIFY_MAX_KEYWORDS}).",
+        min_length=1,
+        max_length=CLASSIFY_MAX_KEYWORDS,
+    )
+
+
+class IntentScores(BaseModel):
+    """Per-intent scores, 0–100."""
+
+    informational: float
+    commercial: float
+    transactional: float
+    navigational: float
+
+
+class ClassifiedKeyword(BaseModel):
+    """A keyword with its intent label and all four intent scores."""
+
+    keyword: str
+    intent: str = Field(..., description="informational, commercial, transactional or navigational.")
+    scores: IntentScores
+
+
+class ClassifyResponse(BaseModel):
+    """Intent labels for every unique keyword, in input order."""
+
+    results: list[ClassifiedKeyword]
+    total_input: int = Field(..., description="Number of keywords received.")
+
+
+class StreamRankResponse(RankResponse):
+    """Top N keywords of a streamed keyword list."""
+
+    unique_input: int = Field(..., description="Number of unique keywords scored.")
+    approximate_dedupe: bool = Field(
+        False, description="True once the stream outgrew exact dedupe and a Bloom filter took over."
+    )
 
 
 @app.get("/health")
@@ -61,6 +138,10 @@ async def health_check():
         "status": "ok",
         "service": "keyword-intent",
         "spacy_loaded": nlp is not None,
+        "intent_weights": linear.version if (linear := get_linear_scorer()) else None,
+        "score_cache": cache.snapshot() if (cache := get_score_cache()) else None,
+        "fast_score_cache": cache.snapshot() if (cache := get_score_cache("fast")) else None,
+        "scoring_pool": pool.snapshot() if (pool := get_scoring_pool()) else None,
     }
 
 
@@ -73,33 +154,85 @@ async def load_spacy_model():
         logger.info("Loading spaCy model: %s", model_name)
         import spacy
 
-        nlp = spacy.load(model_name)
-        logger.info("spaCy model loaded successfully")
+        nlp = spacy.load(model_name, exclude=SPACY_EXCLUDE)
+        logger.info("spaCy model loaded successfully (pipeline: %s)", ", ".join(nlp.pipe_names))
     except Exception as e:
         logger.exception("Failed to load spaCy model: %s", e)
         nlp = None
+    # Fast mode needs no model, so it is served even if the load failed.
+    init_score_cache(scorer_version(None, mode="fast"), mode="fast")
+    if nlp is not None:
+        version = scorer_version(nlp)
+        try:
+            linear = init_linear_scorer()
+        except Exception as e:
+            logger.exception("Failed to load intent weights, using the hand-weighted scorer: %s", e)
+            linear = None
+        if linear is not None:
+            version = f"{version}-{linear.version}"
+        init_score_cache(version)
+        try:
+            init_scoring_pool(model_name, SPACY_EXCLUDE, INTENT_WEIGHTS_FILE if linear is not None else None)
+        except Exception as e:
+            logger.exception("Failed to start scoring pool, scoring in-process: %s", e)
+
+
+@app.on_event("shutdown")
+async def stop_scoring_pool():
+    shutdown_scoring_pool()
+
+
+async def _pooled(kind: str, keywords: list[str]):
+    """Scores from the process pool for large batches, or None to score in-process."""
+    pool = get_scoring_pool()
+    if pool is None or not pool.should_shard(len(keywords)):
+        return None
+    return await pool.score(kind, keywords, SPACY_BATCH_SIZE)
+
+
+def _require_nlp(mode: str = "full") -> None:
+    if nlp is None and mode == "full":
+        raise HTTPException(
+            status_code=503,
+            detail="spaCy model not loaded; service unavailable",
+        )
+
+
+async def _score_unique(keywords: list[str], mode: str = "full") -> tuple[list[float], int]:
+    """Scores for unique, stripped keywords through the mode's score cache; also returns cache hits."""
+
+    async def score(batch: list[str]) -> list[float]:
+        if mode == "fast":
+            return score_keywords_informational_intent(batch, None, mode="fast")
+        linear = get_linear_scorer()
+        scores = await _pooled("linear" if linear is not None else "informational", batch)
+        if scores is None:
+            if linear is not None:
+                scores = linear.score_keywords(batch, nlp, batch_size=SPACY_BATCH_SIZE)
+            else:
+                scores = score_keywords_informational_intent(batch, nlp, batch_size=SPACY_BATCH_SIZE)
+        return scores
+
+    cache = get_score_cache(mode)
+    if cache is None:
+        return await score(keywords), 0
+    return await cache.score_many(keywords, score)
 
 
 @app.post("/rank", response_model=RankResponse)
-async def rank_informational(request: RankRequest):
+async def rank_informational(request: RankRequest, mode: ScoringMode = MODE_QUERY):
     """
     Rank keywords by informational intent.
 
     Accepts up to 1000 keywords (e.g. from an external source), scores each with
     spaCy-based rules, and returns the top 100 by informational intent score.
+    With ``mode=fast`` only the rule signals are used (no spaCy parse).
     """
-    if nlp is None:
-        raise HTTPException(
-            status_code=503,
-            detail="spaCy model not loaded; service unavailable",
-        )
+    _require_nlp(mode)
 
-    top_n = min(TOP_N_INFORMATIONAL, len(request.keywords))
-    ranked = rank_keywords_by_informational_intent(
-        keywords=request.keywords,
-        nlp=nlp,
-        top_n=TOP_N_INFORMATIONAL,
-    )
+    unique = dedupe_keywords(request.keywords)
+    scores, hits = await _score_unique(unique, mode)
+    ranked = select_top(list(zip(unique, scores)), TOP_N_INFORMATIONAL)
 
     return RankResponse(
         top_keywords=[
@@ -107,4 +240,90 @@ async def rank_informational(request: RankRequest):
         ],
         total_input=len(request.keywords),
         top_n=len(ranked),
+        cache_hits=hits,
+        cache_hit_ratio=round(hits / len(unique), 4) if unique else 0.0,
+        mode=mode,
+    )
+
+
+@app.post("/classify", response_model=ClassifyResponse)
+async def classify_intent(request: ClassifyRequest):
+    """
+    Label keywords with a search intent.
+
+    Scores informational, commercial, transactional and navigational intent for
+    each keyword from one marker scan and one spaCy parse, and labels it with
+    the highest-scoring intent.
+    """
+    _require_nlp()
+
+    unique = dedupe_keywords(request.keywords)
+    intent_scores = await _pooled("intents", unique)
+    if intent_scores is None:
+        classified = classify_keywords(unique, nlp, batch_size=SPACY_BATCH_SIZE)
+    else:
+        classified = [(k, intent_label(scores), scores) for k, scores in zip(unique, intent_scores)]
+    return ClassifyResponse(
+        results=[
+            ClassifiedKeyword(keyword=k, intent=label, scores=IntentScores(**scores))
+            for k, label, scores in classified
+        ],
+        total_input=len(request.keywords),
+    )
+
+
+@app.post("/rank/stream", response_model=StreamRankResponse)
+async def rank_informational_stream(
+    request: Request,
+    top_n: int = Query(TOP_N_INFORMATIONAL, ge=1, le=STREAM_MAX_TOP_N),
+    mode: ScoringMode = MODE_QUERY,
+):
+    """
+    Rank a keyword stream of any size by informational intent.
+
+    The body is NDJSON (``application/x-ndjson``: one JSON string,
+    ``{"keyword": ...}`` or ``{"keywords": [...]}`` per line) or plain text
+    with one keyword per line, and may be sent chunked. Keywords are deduped
+    and scored in batches as they arrive; only the best ``top_n`` are kept,
+    ranked exactly as /rank ranks them. ``mode`` is as for /rank.
+    """
+    _require_nlp(mode)
+
+    ndjson = not request.headers.get("content-type", "").startswith("text/plain")
+    deduper = KeywordDeduper(STREAM_DEDUPE_EXACT_LIMIT, STREAM_BLOOM_CAPACITY, STREAM_BLOOM_ERROR_RATE)
+    top = TopN(top_n)
+    total = hits = 0
+    batch: list[str] = []
+
+    async def flush() -> None:
+        nonlocal hits
+        scores, batch_hits = await _score_unique(batch, mode)
+        hits += batch_hits
+        top.push_many(zip(batch, scores))
+        batch.clear()
+
+    async for keyword in iter_keywords(request.stream(), ndjson=ndjson, max_line_bytes=STREAM_MAX_LINE_BYTES):
+        total += 1
+        keyword = keyword.strip()
+        if keyword and deduper.add(keyword):
+            batch.append(keyword)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                await flush()
+    if batch:
+        await flush()
+
+    if not deduper.unique:
+        raise HTTPException(status_code=422, detail="No keywords in request body")
+    ranked = top.items()
+    return StreamRankResponse(
+        top_keywords=[
+            RankedKeyword(keyword=k, informational_score=s) for k, s in ranked
+        ],
+        total_input=total,
+        top_n=len(ranked),
+        unique_input=deduper.unique,
+        approximate_dedupe=deduper.approximate,
+        cache_hits=hits,
+        cache_hit_ratio=round(hits / deduper.unique, 4),
+        mode=mode,
     )
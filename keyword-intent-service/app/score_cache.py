@@ -0,0 +1,170 @@
+"""
+Per-keyword intent score cache.
+
+A keyword's score depends only on its text and the scorer version (scoring code
+plus spaCy model), so scores are cached across requests: first in a bounded
+in-process LRU, then optionally in Redis, shared by all replicas. Lookups and
+writes for a whole request are batched (one MGET, one pipelined write) and
+awaited on the async client, so a slow Redis delays only its own request. Keys
+include the scorer version, so a code or model change never serves stale scores.
+"""
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "intent:score:"
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional; the in-process LRU works without it
+    aioredis = None
+
+
+def redis_from_env():
+    """Async Redis client from REDIS_URL / REDIS_HOST, or None when not configured."""
+    if aioredis is None:
+        return None
+    redis_url = os.getenv("REDIS_URL", os.getenv("REDIS_HOST"))
+    if not redis_url:
+        return None
+    if redis_url.startswith("redis://"):
+        return aioredis.from_url(redis_url, socket_timeout=1.0)
+    return aioredis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0)),
+        password=os.getenv("REDIS_PASSWORD"),
+        socket_timeout=1.0,
+    )
+
+
+class ScoreCache:
+    """Bounded LRU of keyword -> score in front of an optional Redis."""
+
+    def __init__(self, version: str, max_size: int = 100_000, redis_client=None, ttl: int = 0) -> None:
+        self.version = version
+        self.max_size = max(0, int(max_size))
+        self.ttl = int(ttl)
+        self._redis = redis_client
+        self._lru: "OrderedDict[str, float]" = OrderedDict()
+        self.lookups = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+
+    def _redis_key(self, keyword: str) -> str:
+        digest = hashlib.blake2b(keyword.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{KEY_PREFIX}{self.version}:{digest}"
+
+    def _remember(self, keyword: str, score: float) -> None:
+        if not self.max_size:
+            return
+        self._lru[keyword] = score
+        self._lru.move_to_end(keyword)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    async def get_many(self, keywords: List[str]) -> Dict[str, float]:
+        """Cached scores for the keywords that have one."""
+        self.lookups += len(keywords)
+        found: Dict[str, float] = {}
+        missing: List[str] = []
+        for keyword in keywords:
+            score = self._lru.get(keyword)
+            if score is None:
+                missing.append(keyword)
+            else:
+                self._lru.move_to_end(keyword)
+                found[keyword] = score
+        self.local_hits += len(found)
+
+        if missing and self._redis is not None:
+            try:
+                values = await self._redis.mget([self._redis_key(k) for k in missing])
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning("Score cache read failed: %s", e)
+                values = []
+            for keyword, raw in zip(missing, values):
+                if raw is None:
+                    continue
+                try:
+                    score = float(raw)
+                except ValueError:
+                    continue
+                found[keyword] = score
+                self.redis_hits += 1
+                self._remember(keyword, score)
+        return found
+
+    async def set_many(self, scores: Dict[str, float]) -> None:
+        for keyword, score in scores.items():
+            self._remember(keyword, score)
+        if not scores or self._redis is None:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            if self.ttl > 0:
+                for keyword, score in scores.items():
+                    pipe.set(self._redis_key(keyword), repr(score), ex=self.ttl)
+            else:
+                pipe.mset({self._redis_key(k): repr(s) for k, s in scores.items()})
+            await pipe.execute()
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Score cache write failed: %s", e)
+
+    async def score_many(
+        self, keywords: List[str], score_fn: Callable[[List[str]], Awaitable[List[float]]]
+    ) -> Tuple[List[float], int]:
+        """
+        Scores for ``keywords`` (unique), computing only the cache misses with
+        the coroutine ``score_fn``. Returns the scores in input order and the
+        number of hits.
+        """
+        cached = await self.get_many(keywords)
+        misses = [k for k in keywords if k not in cached]
+        if misses:
+            computed = dict(zip(misses, await score_fn(misses)))
+            await self.set_many(computed)
+            cached.update(computed)
+        return [cached[k] for k in keywords], len(keywords) - len(misses)
+
+    def snapshot(self) -> dict:
+        hits = self.local_hits + self.redis_hits
+        return {
+            "version": self.version,
+            "redis": self._redis is not None,
+            "size": len(self._lru),
+            "max_size": self.max_size,
+            "lookups": self.lookups,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "hit_ratio": round(hits / self.lookups, 4) if self.lookups else 0.0,
+        }
+
+
+_score_caches: Dict[str, ScoreCache] = {}
+
+
+def init_score_cache(version: str, mode: str = "full") -> ScoreCache:
+    """Create the worker-wide cache for a scoring mode's scorer version from SCORE_CACHE_* settings."""
+    from app.config import SCORE_CACHE_REDIS, SCORE_CACHE_SIZE, SCORE_CACHE_TTL
+
+    client = redis_from_env() if SCORE_CACHE_REDIS else None
+    cache = ScoreCache(version, max_size=SCORE_CACHE_SIZE, redis_client=client, ttl=SCORE_CACHE_TTL)
+    _score_caches[mode] = cache
+    logger.info(
+        "Score cache ready (%s mode, version %s, LRU %d, redis %s)",
+        mode, version, SCORE_CACHE_SIZE, client is not None,
+    )
+    return cache
+
+
+def get_score_cache(mode: str = "full") -> Optional[ScoreCache]:
+    return _score_caches.get(mode)
@@ -0,0 +1,190 @@
+"""
+Process-pool sharded scoring for large keyword batches.
+
+spaCy parsing is CPU-bound and the GIL keeps one process on one core. Batches
+of at least SCORING_POOL_MIN_KEYWORDS keywords are split into contiguous shards and
+scored in a pool of worker processes, each of which loads the trimmed spaCy
+pipeline once when it starts. Scores come back in input order, so callers
+(score cache, top-N selection) don't change. Shards are awaited, so the event
+loop keeps serving other requests while the workers parse. The pool is sized
+from the container's CPU quota rather than the host's core count. If a worker
+dies the pool is shut down and dropped, and scoring falls back to in-process.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.intent_scorer import score_keywords_informational_intent, score_keywords_intents
+
+logger = logging.getLogger(__name__)
+
+SCORERS = {
+    "informational": score_keywords_informational_intent,
+    "intents": score_keywords_intents,
+}
+
+
+def cpu_quota(cgroup_root: str = "/sys/fs/cgroup") -> float:
+    """CPUs this process may use: the cgroup CPU quota if set, else the CPU affinity mask."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open(os.path.join(cgroup_root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return max(int(quota) / int(period), 1.0)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read())
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return max(quota / period, 1.0)
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return float(len(os.sched_getaffinity(0)))
+    return float(os.cpu_count() or 1)
+
+
+def pool_size(configured: int, cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """Worker count: ``configured`` if set, else the CPU quota rounded down."""
+    if configured > 0:
+        return configured
+    return max(1, math.floor(cpu_quota(cgroup_root)))
+
+
+_worker_nlp = None
+_worker_linear = None
+
+
+def _init_worker(model_name: Optional[str], exclude: List[str], weights_file: Optional[str] = None) -> None:
+    global _worker_nlp, _worker_linear
+    if model_name:
+        import spacy
+
+        _worker_nlp = spacy.load(model_name, exclude=exclude)
+    if weights_file:
+        from app.linear_scorer import LinearIntentScorer
+
+        _worker_linear = LinearIntentScorer.from_file(weights_file)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _score_shard(kind: str, keywords: List[str], batch_size: int) -> list:
+    if kind == "linear":
+        return _worker_linear.score_keywords(keywords, _worker_nlp, batch_size=batch_size)
+    return SCORERS[kind](keywords, _worker_nlp, batch_size=batch_size)
+
+
+class ScoringPool:
+    """Pre-forked scoring workers; ``score`` shards large batches across them."""
+
+    def __init__(
+        self,
+        workers: int,
+        model_name: Optional[str],
+        exclude: List[str],
+        min_keywords: int = 1000,
+        min_shard: int = 250,
+        weights_file: Optional[str] = None,
+    ) -> None:
+        self.workers = workers
+        self.min_keywords = min_keywords
+        self.min_shard = max(1, min_shard)
+        self.sharded_batches = 0
+        self.failures = 0
+        self.broken = False
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, exclude, weights_file),
+        )
+        # Start every worker now so the model load isn't paid by the first request.
+        for future in [self._executor.submit(_ready) for _ in range(workers)]:
+            future.result()
+        logger.info("Scoring pool ready: %d workers", workers)
+
+    def should_shard(self, n: int) -> bool:
+        return self.workers > 1 and n >= self.min_keywords
+
+    def shards(self, keywords: List[str]) -> List[List[str]]:
+        size = max(self.min_shard, math.ceil(len(keywords) / self.workers))
+        return [keywords[i:i + size] for i in range(0, len(keywords), size)]
+
+    async def score(self, kind: str, keywords: List[str], batch_size: int) -> Optional[list]:
+        """Scores for ``keywords`` in input order, or None if the pool failed."""
+        shards = self.shards(keywords)
+        try:
+            futures = [self._executor.submit(_score_shard, kind, shard, batch_size) for shard in shards]
+            results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        except BrokenProcessPool as e:
+            self.failures += 1
+            self.broken = True
+            self.shutdown()
+            logger.error("Scoring pool broken, scoring in-process from now on: %s", e)
+            return None
+        self.sharded_batches += 1
+        return [score for shard_scores in results for score in shard_scores]
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "min_keywords": self.min_keywords,
+            "sharded_batches": self.sharded_batches,
+            "failures": self.failures,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_scoring_pool: Optional[ScoringPool] = None
+
+
+def init_scoring_pool(
+    model_name: Optional[str], exclude: List[str], weights_file: Optional[str] = None
+) -> Optional[ScoringPool]:
+    """Start the worker-wide pool from SCORING_POOL_* settings; None when one CPU is all there is."""
+    global _scoring_pool
+    from app.config import SCORING_POOL_MIN_KEYWORDS, SCORING_POOL_MIN_SHARD, SCORING_POOL_WORKERS
+
+    workers = pool_size(SCORING_POOL_WORKERS)
+    if workers <= 1:
+        logger.info("Scoring pool disabled (1 CPU available)")
+        return None
+    _scoring_pool = ScoringPool(
+        workers,
+        model_name,
+        exclude,
+        min_keywords=SCORING_POOL_MIN_KEYWORDS,
+        min_shard=SCORING_POOL_MIN_SHARD,
+        weights_file=weights_file,
+    )
+    return _scoring_pool
+
+
+def get_scoring_pool() -> Optional[ScoringPool]:
+    """The worker-wide pool; None if disabled or once it has broken."""
+    global _scoring_pool
+    if _scoring_pool is not None and _scoring_pool.broken:
+        _scoring_pool = None
+    return _scoring_pool
+
+
+def shutdown_scoring_pool() -> None:
+    global _scoring_pool
+    if _scoring_pool is not None:
+        _scoring_pool.shutdown()
+        _scoring_pool = None
@@ -0,0 +1,198 @@
+"""
+Building blocks for ranking keyword streams of any size in bounded memory.
+
+- iter_keywords: keywords from an NDJSON or plain-text byte stream, line by line
+- KeywordDeduper: exact seen-set that turns into a scalable Bloom filter past a size limit
+- TopN: the best top_n (keyword, score) pairs seen so far, in /rank order
+"""
+import hashlib
+import heapq
+import json
+import logging
+import math
+from typing import AsyncIterator, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _line_keywords(line: bytes, ndjson: bool) -> List[str]:
+    if not line:
+        return []
+    if not ndjson:
+        return [line.decode("utf-8", errors="replace")]
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return []
+    if isinstance(item, str):
+        return [item]
+    if isinstance(item, dict):
+        if isinstance(item.get("keyword"), str):
+            return [item["keyword"]]
+        item = item.get("keywords")
+    if isinstance(item, list):
+        return [k for k in item if isinstance(k, str)]
+    return []
+
+
+async def iter_keywords(
+    chunks: AsyncIterator[bytes], ndjson: bool = True, max_line_bytes: int = 64 * 1024
+) -> AsyncIterator[str]:
+    """
+    Keywords from a byte stream, one line at a time.
+
+    NDJSON lines may be a JSON string, {"keyword": ...}, {"keywords": [...]} or a
+    list of strings; anything else is skipped. Plain text is one keyword per line.
+    Lines longer than ``max_line_bytes`` are skipped, so a body without newlines
+    can't grow the buffer without bound. Only newly received bytes are searched
+    for newlines.
+    """
+    buf = bytearray()
+    skipping = False  # inside an over-long line, dropping bytes until its newline
+    skipped = 0
+    async for chunk in chunks:
+        scan = len(buf)
+        buf += chunk
+        start = 0
+        end = buf.find(b"\n", scan)
+        while end != -1:
+            if skipping:
+                skipping = False
+            elif end - start > max_line_bytes:
+                skipped += 1
+            else:
+                for keyword in _line_keywords(bytes(buf[start:end]).strip(), ndjson):
+                    yield keyword
+            start = end + 1
+            end = buf.find(b"\n", start)
+        del buf[:start]
+        if len(buf) > max_line_bytes:
+            if not skipping:
+                skipped += 1
+                skipping = True
+            buf.clear()
+    if not skipping and len(buf) <= max_line_bytes:
+        for keyword in _line_keywords(bytes(buf).strip(), ndjson):
+            yield keyword
+    if skipped:
+        logger.warning("Skipped %d keyword stream lines longer than %d bytes", skipped, max_line_bytes)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[pos >> 3] >> (pos & 7) & 1 for pos in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; True if it was (probably) present already."""
+        present = True
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._array[byte] >> bit & 1:
+                present = False
+                self._array[byte] |= 1 << bit
+        if not present:
+            self.count += 1
+        return present
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._array)
+
+
+class KeywordDeduper:
+    """
+    Running dedupe for a keyword stream. Exact up to ``exact_limit`` unique
+    keywords; beyond that the seen-set is folded into a Bloom filter so memory
+    grows by bits, not strings, per keyword. The filter is scalable: it starts
+    at ``bloom_capacity`` keywords (0 = twice ``exact_limit``) and each time a
+    stage fills, a stage twice as large with half the error rate is added, so
+    memory tracks the stream's size and about ``bloom_error_rate`` of later
+    unique keywords are dropped as false duplicates overall.
+    """
+
+    def __init__(self, exact_limit: int, bloom_capacity: int, bloom_error_rate: float) -> None:
+        self.exact_limit = exact_limit
+        self.bloom_capacity = bloom_capacity or 2 * max(1, exact_limit)
+        self.bloom_error_rate = bloom_error_rate
+        self._seen = set()
+        self._blooms: List[BloomFilter] = []
+        self.unique = 0
+
+    @property
+    def approximate(self) -> bool:
+        return bool(self._blooms)
+
+    @property
+    def bloom_bytes(self) -> int:
+        return sum(b.size_bytes for b in self._blooms)
+
+    def _add_stage(self) -> None:
+        n = len(self._blooms)
+        # Error rates e/2, e/4, ... keep the compound false-positive rate under e.
+        self._blooms.append(BloomFilter(self.bloom_capacity << n, self.bloom_error_rate / 2 ** (n + 1)))
+        logger.info(
+            "Keyword stream dedupe: Bloom stage %d added, %.1f MB in total",
+            n + 1, self.bloom_bytes / (1 << 20),
+        )
+
+    def add(self, keyword: str) -> bool:
+        """True if ``keyword`` has not been seen before."""
+        if self._blooms:
+            if any(keyword in b for b in self._blooms[:-1]) or self._blooms[-1].add(keyword):
+                return False
+            if self._blooms[-1].full:
+                self._add_stage()
+        else:
+            if keyword in self._seen:
+                return False
+            self._seen.add(keyword)
+            if len(self._seen) > self.exact_limit:
+                self.bloom_capacity = max(self.bloom_capacity, len(self._seen) * 2)
+                self._add_stage()
+                for seen in self._seen:
+                    self._blooms[0].add(seen)
+                self._seen = set()
+                logger.info("Keyword stream passed %d unique keywords; deduping approximately", self.exact_limit)
+        self.unique += 1
+        return True
+
+
+def _rank_key(item: Tuple[str, float]):
+    return (-item[1], item[0])
+
+
+class TopN:
+    """Best ``top_n`` (keyword, score) pairs pushed so far; same order as select_top."""
+
+    def __init__(self, top_n: int) -> None:
+        self.top_n = top_n
+        self._items: List[Tuple[str, float]] = []
+
+    def push_many(self, scored: Iterable[Tuple[str, float]]) -> None:
+        self._items = heapq.nsmallest(self.top_n, [*self._items, *scored], key=_rank_key)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def items(self) -> List[Tuple[str, float]]:
+        return list(self._items)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Throughput and ranking agreement of /rank's fast mode against full mode.
+
+Scores one keyword corpus with both modes (full: rules + spaCy parse; fast:
+rule signals only) and reports keywords/s for each, how many of full mode's
+top-N keywords fast mode also puts in its top-N, and Kendall's tau-b between
+the two score lists, over the whole corpus and over full mode's top-N.
+
+The corpus is the scorer's golden fixture (tests/fixtures/
+informational_scores_golden.jsonl) unless --corpus points at a file with one
+keyword per line.
+
+    python scripts/bench_fast_mode.py --top-n 100 --json results/fast_mode.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_ROOT))
+
+from app.config import SPACY_BATCH_SIZE, SPACY_EXCLUDE, SPACY_MODEL  # noqa: E402
+from app.intent_scorer import (  # noqa: E402
+    dedupe_keywords,
+    score_keywords_informational_intent,
+    select_top,
+)
+
+DEFAULT_CORPUS = SERVICE_ROOT / "tests" / "fixtures" / "informational_scores_golden.jsonl"
+
+
+def load_corpus(path: Path) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            keywords = [json.loads(line)[0] for line in f if line.strip()]
+        else:
+            keywords = [line.rstrip("\n") for line in f]
+    return dedupe_keywords(keywords)
+
+
+def kendall_tau_b(x: List[float], y: List[float]) -> float:
+    """Kendall's tau-b (tie-corrected) of two equal-length score lists."""
+    a = np.asarray(x, dtype=np.float64)
+    b = np.asarray(y, dtype=np.float64)
+    n = len(a)
+    if n < 2:
+        return 1.0
+    s = ties_a = ties_b = 0
+    for i in range(n - 1):
+        da = np.sign(a[i + 1:] - a[i])
+        db = np.sign(b[i + 1:] - b[i])
+        s += int(np.dot(da, db))
+        ties_a += int(np.count_nonzero(da == 0))
+        ties_b += int(np.count_nonzero(db == 0))
+    pairs = n * (n - 1) // 2
+    denom = ((pairs - ties_a) * (pairs - ties_b)) ** 0.5
+    return s / denom if denom else 1.0
+
+
+def timed(score_fn: Callable[[List[str]], List[float]], keywords: List[str], repeats: int):
+    """Scores from the last run and the best keywords/s over ``repeats`` runs."""
+    best = float("inf")
+    scores: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scores = score_fn(keywords)
+        best = min(best, time.perf_counter() - start)
+    return scores, len(keywords) / best if best > 0 else float("inf")
+
+
+def compare(
+    keywords: List[str], nlp, top_n: int = 100, repeats: int = 3, batch_size: int = SPACY_BATCH_SIZE
+) -> Dict[str, Any]:
+    full, full_rate = timed(
+        lambda kws: score_keywords_informational_intent(kws, nlp, batch_size=batch_size), keywords, repeats
+    )
+    fast, fast_rate = timed(
+        lambda kws: score_keywords_informational_intent(kws, None, mode="fast"), keywords, repeats
+    )
+    top_full = select_top(list(zip(keywords, full)), top_n)
+    top_fast = select_top(list(zip(keywords, fast)), top_n)
+    overlap = len({k for k, _ in top_full} & {k for k, _ in top_fast})
+    fast_by_keyword = dict(zip(keywords, fast))
+    return {
+        "keywords": len(keywords),
+        "top_n": top_n,
+        "full_keywords_per_s": round(full_rate, 1),
+        "fast_keywords_per_s": round(fast_rate, 1),
+        "speedup": round(fast_rate / full_rate, 2) if full_rate else None,
+        "top_n_overlap": overlap,
+        "top_n_overlap_ratio": round(overlap / len(top_full), 4) if top_full else 0.0,
+        "kendall_tau": round(kendall_tau_b(full, fast), 4),
+        "kendall_tau_top_n": round(
+            kendall_tau_b([s for _, s in top_full], [fast_by_keyword[k] for k, _ in top_full]), 4
+        ),
+        "mean_abs_score_delta": round(float(np.mean(np.abs(np.subtract(full, fast)))), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare /rank fast mode against full mode.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Keyword corpus (.jsonl fixture or one keyword per line)")
+    parser.add_argument("--model", default=os.getenv("SPACY_MODEL", SPACY_MODEL), help="spaCy model for full mode")
+    parser.add_argument("--top-n", type=int, default=100, help="Top-N compared for overlap")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per mode (best is reported)")
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    import spacy
+
+    nlp = spacy.load(args.model, exclude=SPACY_EXCLUDE)
+    keywords = load_corpus(args.corpus)
+    print(f"Scoring {len(keywords)} keywords from {args.corpus} (model {args.model})", file=sys.stderr)
+    results = compare(keywords, nlp, top_n=args.top_n, repeats=args.repeats)
+    results["model"] = args.model
+    results["corpus"] = str(args.corpus)
+
+    for key, value in results.items():
+        print(f"{key:>22}: {value}")
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
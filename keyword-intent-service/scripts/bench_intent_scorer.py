@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Benchmark and profiling suite for the intent scorer.
+
+Benchmark mode generates realistic keyword corpora (100, 1k, 10k and 100k
+keywords by default: informational, commercial, transactional and navigational
+templates over a set of topics, with casing/whitespace noise and duplicates)
+and times each scoring stage separately. It reports seconds and keywords/s per
+stage:
+
+  normalize  dedupe_keywords + normalize_keyword (request preprocessing)
+  rules      question-word, marker and structure signals
+  spacy      nlp.pipe parse + POS/dependency signal
+  end_to_end score_keywords_informational_intent, what /rank runs on misses
+  fast       mode="fast" (rule signals only)
+
+Results, with the Python, spaCy, model and NumPy versions, are written as a
+JSON baseline. --compare checks a run against an earlier baseline and exits
+non-zero when a stage is more than --max-slowdown times slower, so a spaCy or
+model upgrade that doubles /rank latency shows up before it ships.
+
+Profile mode (--profile SIZE or --profile FILE) scores one corpus end to end
+under cProfile and tracemalloc. It writes a .prof file (for snakeviz/pstats),
+the top functions by cumulative time, and the top allocation sites with the
+peak traced memory.
+
+    python scripts/bench_intent_scorer.py --out benchmarks/baseline.json
+    python scripts/bench_intent_scorer.py --compare benchmarks/baseline.json
+    python scripts/bench_intent_scorer.py --profile 10000 --profile-dir profiles/
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_ROOT))
+
+from app.config import SPACY_BATCH_SIZE, SPACY_EXCLUDE, SPACY_MODEL  # noqa: E402
+from app.intent_scorer import (  # noqa: E402
+    dedupe_keywords,
+    normalize_keyword,
+    rule_scores,
+    score_keywords_informational_intent,
+    spacy_doc_scores,
+)
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+TOPICS = [
+    "seo", "python", "running shoes", "coffee grinder", "mortgage rates", "yoga mat",
+    "electric car", "dog training", "wordpress hosting", "iphone 15", "credit score",
+    "meal prep", "sourdough bread", "tax return", "solar panels", "vpn", "react hooks",
+    "kubernetes", "wedding venue", "home loan", "gaming laptop", "air fryer",
+    "project management software", "car insurance", "protein powder", "standing desk",
+    "email marketing", "web hosting", "noise cancelling headphones", "keto diet",
+]
+QUALIFIERS = [
+    "", "", "", "", "cheap", "wireless", "organic", "used", "small", "professional",
+    "portable", "smart", "vegan", "commercial", "luxury", "diy", "budget", "premium",
+]
+SUFFIXES = [
+    "", "", "", "", " for beginners", " for kids", " at home", " online", " for small business",
+    " uk", " reddit", " 2024", " without experience", " for seniors", " on a budget", " in {place}",
+]
+BRANDS = ["amazon", "netflix", "spotify", "nike", "hubspot", "shopify", "canva", "ikea", "airbnb", "zoom"]
+PLACES = ["london", "new york", "chicago", "austin", "toronto", "sydney", "berlin"]
+TEMPLATES = {
+    "informational": [
+        "what is {t}", "how to use {t}", "how does {t} work", "why is {t} so expensive",
+        "{t} guide", "{t} tutorial for beginners", "types of {t}", "benefits of {t}",
+        "{t} meaning", "how to choose {t}", "difference between {t} and {t2}",
+        "is {t} worth it?", "when to replace {t}", "{t} explained", "tips for {t}",
+        "step by step {t} setup", "what are the pros and cons of {t}", "who invented {t}",
+        "learn about {t}", "can you use {t} without {t2}",
+    ],
+    "commercial": [
+        "best {t}", "best {t} {year}", "top 10 {t}", "{t} review", "{t} vs {t2}",
+        "{t} alternatives", "cheapest {t}", "{b} {t} review", "{t} comparison", "top rated {t}",
+    ],
+    "transactional": [
+        "buy {t}", "{t} price", "{t} near me", "{t} coupon code", "{t} for sale",
+        "order {t} online", "{t} discount", "cheap {t} deals", "{t} {place}", "book {t} {place}",
+    ],
+    "navigational": [
+        "{b} login", "{b}", "{b}.com", "{b} official site", "{b} customer service",
+        "{b} app", "{b} account", "www.{b}.com", "{b} sign in", "{b} help center",
+    ],
+}
+INTENT_SHARE = {"informational": 0.45, "commercial": 0.25, "transactional": 0.2, "navigational": 0.1}
+
+
+def generate_corpus(size: int, seed: int = 0, duplicate_rate: float = 0.05) -> List[str]:
+    """``size`` keywords in a realistic intent mix, with case/whitespace noise and some duplicates."""
+    rng = random.Random(seed)
+    intents = list(INTENT_SHARE)
+    shares = [INTENT_SHARE[i] for i in intents]
+    keywords: List[str] = []
+    for _ in range(size):
+        if keywords and rng.random() < duplicate_rate:
+            keywords.append(rng.choice(keywords))
+            continue
+        template = rng.choice(TEMPLATES[rng.choices(intents, shares)[0]]) + rng.choice(SUFFIXES)
+        keyword = template.format(
+            t=f"{rng.choice(QUALIFIERS)} {rng.choice(TOPICS)}".strip(),
+            t2=rng.choice(TOPICS),
+            b=rng.choice(BRANDS),
+            place=rng.choice(PLACES),
+            year=rng.choice((2023, 2024, 2025)),
+        )
+        noise = rng.random()
+        if noise < 0.05:
+            keyword = keyword.upper()
+        elif noise < 0.15:
+            keyword = keyword.title()
+        elif noise < 0.2:
+            keyword = f"  {keyword.replace(' ', '  ')} "
+        keywords.append(keyword)
+    return keywords
+
+
+def load_corpus(path: Path) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            return [json.loads(line)[0] for line in f if line.strip()]
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def best_time(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_corpus(keywords: List[str], nlp, repeats: int, batch_size: int = SPACY_BATCH_SIZE) -> Dict[str, Any]:
+    """Best-of-``repeats`` seconds and keywords/s for each stage on one corpus."""
+    unique = dedupe_keywords(keywords)
+    stages: Dict[str, Callable[[], Any]] = {
+        "normalize": lambda: [normalize_keyword(k) for k in dedupe_keywords(keywords)],
+        "rules": lambda: [rule_scores(k) for k in unique],
+        "spacy": lambda: spacy_doc_scores(unique, nlp, batch_size),
+        "end_to_end": lambda: score_keywords_informational_intent(unique, nlp, batch_size=batch_size),
+        "fast": lambda: score_keywords_informational_intent(unique, None, mode="fast"),
+    }
+    if nlp is None:
+        del stages["spacy"]
+    results: Dict[str, Any] = {"keywords": len(keywords), "unique": len(unique), "stages": {}}
+    for stage, fn in stages.items():
+        seconds = best_time(fn, repeats)
+        n = len(keywords) if stage == "normalize" else len(unique)
+        results["stages"][stage] = {
+            "seconds": round(seconds, 6),
+            "keywords_per_s": round(n / seconds, 1) if seconds > 0 else None,
+        }
+    return results
+
+
+def environment(nlp) -> Dict[str, Any]:
+    import numpy
+
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "spacy": None,
+        "model": None,
+    }
+    try:
+        import spacy
+
+        env["spacy"] = spacy.__version__
+    except ImportError:
+        pass
+    if nlp is not None:
+        meta = getattr(nlp, "meta", {}) or {}
+        env["model"] = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+        env["pipeline"] = list(nlp.pipe_names)
+    return env
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_slowdown: float) -> List[str]:
+    """Stages (per corpus) more than ``max_slowdown`` times slower than the baseline."""
+    regressions = []
+    for name, corpus in results["corpora"].items():
+        base = baseline.get("corpora", {}).get(name)
+        if not base:
+            continue
+        for stage, timing in corpus["stages"].items():
+            base_timing = base["stages"].get(stage)
+            if not base_timing or not base_timing["seconds"]:
+                continue
+            ratio = timing["seconds"] / base_timing["seconds"]
+            timing["vs_baseline"] = round(ratio, 3)
+            if ratio > max_slowdown:
+                regressions.append(f"{name}/{stage}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def profile(keywords: List[str], nlp, out_dir: Path, label: str, top: int = 40) -> None:
+    """End-to-end scoring of one corpus under cProfile and tracemalloc; writes reports to ``out_dir``."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    unique = dedupe_keywords(keywords)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    score_keywords_informational_intent(unique, nlp)
+    profiler.disable()
+    prof_path = out_dir / f"{label}.prof"
+    profiler.dump_stats(str(prof_path))
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+    (out_dir / f"{label}.cprofile.txt").write_text(text.getvalue(), encoding="utf-8")
+
+    tracemalloc.start(25)
+    scores = score_keywords_informational_intent(unique, nlp)
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del scores
+    lines = [
+        f"{len(unique)} unique keywords; traced memory current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB",
+        "",
+        f"Top {top} allocation sites (by size):",
+    ]
+    for stat in snapshot.statistics("lineno")[:top]:
+        lines.append(str(stat))
+    (out_dir / f"{label}.tracemalloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print(f"Profile written to {prof_path} (+ .cprofile.txt, .tracemalloc.txt); peak {peak / 2**20:.1f} MiB",
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark and profile the intent scorer.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Generated corpus sizes")
+    parser.add_argument("--corpus", type=Path, help="Benchmark this corpus (one keyword per line, or a .jsonl fixture) instead")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument("--model", default=os.getenv("SPACY_MODEL", SPACY_MODEL), help="spaCy model")
+    parser.add_argument("--no-spacy", action="store_true", help="Rules only: skip the spaCy stage and model load")
+    parser.add_argument("--out", type=Path, help="Write results as a JSON baseline here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=1.5, help="Fail --compare above this slowdown")
+    parser.add_argument("--profile", help="Profile one corpus instead: a generated size or a corpus file")
+    parser.add_argument("--profile-dir", type=Path, default=Path("profiles"), help="Where profile reports go")
+    args = parser.parse_args()
+
+    nlp = None
+    if not args.no_spacy:
+        import spacy
+
+        nlp = spacy.load(args.model, exclude=SPACY_EXCLUDE)
+
+    if args.profile:
+        if args.profile.isdigit():
+            keywords, label = generate_corpus(int(args.profile), args.seed), f"intent-{args.profile}"
+        else:
+            keywords, label = load_corpus(Path(args.profile)), f"intent-{Path(args.profile).stem}"
+        profile(keywords, nlp, args.profile_dir, label)
+        return 0
+
+    if args.corpus:
+        corpora = {args.corpus.stem: load_corpus(args.corpus)}
+    else:
+        corpora = {str(n): generate_corpus(n, args.seed) for n in map(int, args.sizes.split(","))}
+
+    results: Dict[str, Any] = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(nlp),
+        "batch_size": SPACY_BATCH_SIZE,
+        "repeats": args.repeats,
+        "seed": args.seed,
+        "corpora": {},
+    }
+    for name, keywords in corpora.items():
+        result = bench_corpus(keywords, nlp, args.repeats)
+        results["corpora"][name] = result
+        summary = "  ".join(f"{stage} {t['keywords_per_s']:,.0f}/s" for stage, t in result["stages"].items())
+        print(f"{name:>8} ({result['unique']} unique): {summary}")
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_slowdown)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        status = 1 if regressions else 0
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.out}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Fit the linear informational intent scorer's weights on labelled keywords.
+
+Input files are TSV (``keyword<TAB>label``) or JSONL (``{"keyword": ...,
+"intent"|"label"|"score": ...}``). A label is an intent name (informational is
+the positive class), 0/1, or a 0–100 informational score used as a soft target.
+With --bootstrap the labels are ignored and the current hand-weighted scorer's
+scores are the targets, which gives a first weights file to improve on.
+
+Keywords are turned into the service's feature matrix (app.linear_scorer) and
+an L2-regularised logistic regression is fitted by IRLS. Holdout metrics
+(log loss, accuracy, ROC AUC, mean absolute score error) go into the exported
+weights file next to the weights, keyed by feature name.
+
+    python scripts/train_intent_weights.py data/intent_labels.tsv \\
+        --version 2026-10 --out app/weights/informational-2026-10.json
+    INTENT_WEIGHTS_FILE=app/weights/informational-2026-10.json uvicorn app.main:app
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_ROOT))
+
+from app.config import SPACY_EXCLUDE, SPACY_MODEL  # noqa: E402
+from app.intent_scorer import INTENTS, score_keywords_informational_intent  # noqa: E402
+from app.linear_scorer import FEATURE_INDEX, LinearIntentScorer, feature_matrix  # noqa: E402
+
+
+def parse_label(raw) -> float:
+    """Target in [0, 1]: intent name, 0/1, or a 0–100 score."""
+    if isinstance(raw, str):
+        value = raw.strip().lower()
+        if value in INTENTS:
+            return 1.0 if value == "informational" else 0.0
+        raw = float(value)
+    raw = float(raw)
+    return min(1.0, max(0.0, raw / 100.0 if raw > 1.0 else raw))
+
+
+def load_examples(paths: List[Path], need_labels: bool = True) -> Tuple[List[str], List[float]]:
+    """Unique keywords (first label wins) and their targets; targets are empty without labels."""
+    seen = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip():
+                    continue
+                if path.suffix == ".jsonl":
+                    item = json.loads(line)
+                    keyword = item["keyword"]
+                    label = next((item[k] for k in ("intent", "label", "score") if k in item), None)
+                else:
+                    keyword, _, label = line.partition("\t")
+                    label = label or None
+                keyword = keyword.strip()
+                if not keyword or keyword in seen:
+                    continue
+                if need_labels:
+                    if label is None:
+                        raise ValueError(f"{path}: no label for {keyword!r} (use --bootstrap to train without labels)")
+                    seen[keyword] = parse_label(label)
+                else:
+                    seen[keyword] = 0.0
+    keywords = list(seen)
+    return keywords, [seen[k] for k in keywords] if need_labels else []
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float, iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """L2-regularised logistic regression (soft targets allowed) by IRLS; the bias is not penalised."""
+    X = X.astype(np.float64)
+    w = np.zeros(X.shape[1])
+    penalty = np.full(X.shape[1], l2)
+    penalty[FEATURE_INDEX["bias"]] = 0.0
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(X @ w)))
+        gradient = X.T @ (p - y) + penalty * w
+        hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    return w
+
+
+def roc_auc(y_true: np.ndarray, scores: np.ndarray) -> float:
+    """ROC AUC of binarised targets (>= 0.5) by the rank-sum formula; nan if one class is missing."""
+    positive = y_true >= 0.5
+    n_pos, n_neg = int(positive.sum()), int((~positive).sum())
+    if not n_pos or not n_neg:
+        return float("nan")
+    # 1-based ranks, averaged over tied scores
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+    return float((ranks[positive].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def evaluate(X: np.ndarray, y: np.ndarray, w: np.ndarray) -> dict:
+    p = np.clip(1.0 / (1.0 + np.exp(-(X.astype(np.float64) @ w))), 1e-7, 1 - 1e-7)
+    auc = roc_auc(y, p)
+    return {
+        "examples": int(len(y)),
+        "log_loss": round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4),
+        "accuracy": round(float(np.mean((p >= 0.5) == (y >= 0.5))), 4),
+        "roc_auc": None if np.isnan(auc) else round(auc, 4),
+        "mean_abs_score_error": round(float(np.mean(np.abs(p - y)) * 100), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit linear informational intent weights.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("data", type=Path, nargs="+", help="Labelled keyword files (.tsv or .jsonl)")
+    parser.add_argument("--bootstrap", action="store_true", help="Use the hand-weighted scorer's scores as targets")
+    parser.add_argument("--model", default=os.getenv("SPACY_MODEL", SPACY_MODEL), help="spaCy model for POS features")
+    parser.add_argument("--no-spacy", action="store_true", help="Skip POS features (their weights stay 0)")
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 penalty")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fraction held out for metrics")
+    parser.add_argument("--seed", type=int, default=42, help="Holdout split seed")
+    parser.add_argument("--version", default=time.strftime("%Y%m%d"), help="Version recorded in the weights file")
+    parser.add_argument("--out", type=Path, help="Weights file (default app/weights/informational-<version>.json)")
+    args = parser.parse_args()
+
+    nlp = None
+    if not args.no_spacy:
+        import spacy
+
+        nlp = spacy.load(args.model, exclude=SPACY_EXCLUDE)
+
+    keywords, targets = load_examples(args.data, need_labels=not args.bootstrap)
+    if args.bootstrap:
+        targets = [s / 100.0 for s in score_keywords_informational_intent(keywords, nlp)]
+    print(f"{len(keywords)} keywords from {', '.join(map(str, args.data))}", file=sys.stderr)
+
+    X = feature_matrix(keywords, nlp)
+    y = np.asarray(targets, dtype=np.float64)
+    order = np.random.default_rng(args.seed).permutation(len(keywords))
+    n_holdout = int(len(keywords) * args.holdout)
+    test, train = order[:n_holdout], order[n_holdout:]
+
+    w = fit_logistic(X[train], y[train], args.l2)
+    metrics = {"train": evaluate(X[train], y[train], w)}
+    if n_holdout:
+        metrics["holdout"] = evaluate(X[test], y[test], w)
+    for split, values in metrics.items():
+        print(f"{split:>8}: {values}", file=sys.stderr)
+
+    scorer = LinearIntentScorer(
+        w,
+        args.version,
+        meta={
+            "version": args.version,
+            "intent": "informational",
+            "spacy_model": None if nlp is None else f"{nlp.meta.get('lang')}_{nlp.meta.get('name')}-{nlp.meta.get('version')}",
+            "targets": "bootstrap" if args.bootstrap else "labels",
+            "data": [p.name for p in args.data],
+            "l2": args.l2,
+            "metrics": metrics,
+        },
+    )
+    out = args.out or SERVICE_ROOT / "app" / "weights" / f"informational-{args.version}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(scorer.to_dict(), indent=1) + "\n", encoding="utf-8")
+    print(f"Weights written to {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from app.intent_scorer import (
+    INFORMATIONAL_PHRASES,
+    _expand_phrase,
+    _score_informational_markers,
+    classify_keywords,
+    find_informational_markers,
+    scan_intent_terms,
+    score_keyword_informational_intent,
+    score_keywords_informational_intent,
+    score_keywords_intents,
+    scorer_version,
+)
+
+GOLDEN = Path(__file__).parent / "fixtures" / "informational_scores_golden.jsonl"
+
+
+def _golden():
+    with open(GOLDEN, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_scores_match_golden_file():
+    # Generated with the per-marker substring loop and per-phrase re.search
+    # implementation (keyword, marker score, rule-only informational score).
+    rows = _golden()
+    assert len(rows) > 5000
+    for keyword, marker_score, score in rows:
+        # Marker scores are float sums in set iteration order; allow for that.
+        assert _score_informational_markers(keyword) == pytest.approx(marker_score, abs=1e-9), keyword
+        assert score_keyword_informational_intent(keyword, None) == score, keyword
+
+
+def test_phrase_variants_are_exactly_what_the_patterns_match():
+    for pattern in INFORMATIONAL_PHRASES:
+        variants = _expand_phrase(pattern)
+        for variant in variants:
+            assert re.fullmatch(pattern, variant)
+    assert _expand_phrase(r"\btypes? of\b") == ["types of", "type of"]
+    assert _expand_phrase(r"\bwhich (is|are|one)\b") == ["which is", "which are", "which one"]
+
+
+def test_finds_overlapping_markers_and_bounded_phrases_in_one_scan():
+    markers, phrases = find_informational_markers("learning how to learn about types of tips")
+    assert markers["learning"] == 0
+    assert markers["learn"] == 0
+    assert markers["how to"] == 9
+    assert markers["tips"] == 37
+    hit = {INFORMATIONAL_PHRASES[i] for i in phrases}
+    assert hit == {r"\bhow to\b", r"\blearn (about|how)\b", r"\btypes? of\b"}
+
+    # Markers are substrings; phrases need word boundaries on both sides.
+    markers, phrases = find_informational_markers("relearning howtos waypoint to")
+    assert set(markers) == {"learn", "learning"}
+    assert markers["learn"] == 2
+    assert not phrases
+
+
+def test_multi_intent_scores_keep_the_informational_score():
+    keywords = [row[0].strip() for row in _golden()[:2000] if row[0].strip()]
+    intents = score_keywords_intents(keywords, None)
+    assert [s["informational"] for s in intents] == score_keywords_informational_intent(keywords, None)
+
+
+@pytest.mark.parametrize(
+    "keyword, label",
+    [
+        ("how to learn python", "informational"),
+        ("what is seo", "informational"),
+        ("best running shoes 2024", "commercial"),
+        ("nike vs adidas review", "commercial"),
+        ("buy iphone 15", "transactional"),
+        ("cheap flights near me", "transactional"),
+        ("netflix login", "navigational"),
+        ("amazon.com", "navigational"),
+        ("zebra", "informational"),
+    ],
+)
+def test_classify_labels_without_spacy(keyword, label):
+    [(k, got, scores)] = classify_keywords([keyword], None)
+    assert (k, got) == (keyword, label)
+    assert set(scores) == {"informational", "commercial", "transactional", "navigational"}
+
+
+def test_terms_need_word_boundaries():
+    _, phrases = scan_intent_terms("appliance bestseller")
+    assert "navigational" not in phrases and "commercial" not in phrases
+    _, phrases = scan_intent_terms("banking app login")
+    assert set(phrases["navigational"]) == {"app", "login"}
+
+
+def test_fast_mode_rescales_rule_scores_without_spacy():
+    keywords = [row[0] for row in _golden()[:500]]
+    rules_only = score_keywords_informational_intent(keywords, None)
+    fast = score_keywords_informational_intent(keywords, object(), mode="fast")
+    for full_score, fast_score in zip(rules_only, fast):
+        assert fast_score == pytest.approx(min(100.0, full_score / 0.8), abs=0.02)
+    assert max(fast) <= 100.0
+    assert scorer_version(None, mode="fast") != scorer_version(None)
+    with pytest.raises(ValueError):
+        score_keywords_informational_intent(keywords, None, mode="slow")
@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.linear_scorer import FEATURE_INDEX, FEATURE_NAMES, WEIGHTS_FORMAT, LinearIntentScorer, feature_matrix
+
+
+def _active(row):
+    return {FEATURE_NAMES[i]: float(v) for i, v in enumerate(row) if v}
+
+
+def test_feature_matrix_flags():
+    X = feature_matrix(["How to learn Python?", "buy iphone 15", "netflix.com login"])
+    assert X.shape == (3, len(FEATURE_NAMES)) and X.dtype == np.float32
+    assert _active(X[0]) == {
+        "bias": 1.0,
+        "question_first:how": 1.0,
+        "question_words": pytest.approx(1 / 3),
+        "question_mark": 1.0,
+        "words:3-5": 1.0,
+        "marker:how to": 1.0,
+        "marker:learn": 1.0,
+        "marker_start": 1.0,
+        "phrase:\\bhow to\\b": 1.0,
+    }
+    assert _active(X[1]) == {"bias": 1.0, "words:3-5": 1.0, "transactional_terms": 1.0, "digit": 1.0}
+    assert _active(X[2])["navigational_terms"] == 1.0
+    assert not X[:, FEATURE_INDEX["pos:root_verb"]:].any()
+
+
+def test_scores_are_one_logistic_matvec():
+    weights = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+    weights[FEATURE_INDEX["bias"]] = -2.0
+    weights[FEATURE_INDEX["question_first:how"]] = 3.0
+    weights[FEATURE_INDEX["marker:learn"]] = 1.0
+    scorer = LinearIntentScorer(weights, "t")
+    keywords = ["how to learn python", "buy iphone 15"]
+    assert scorer.score_keywords(keywords, None) == pytest.approx(
+        [100 / (1 + np.exp(-2.0)), 100 / (1 + np.exp(2.0))], abs=0.01
+    )
+
+
+def test_weights_file_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    scorer = LinearIntentScorer(rng.normal(size=len(FEATURE_NAMES)).astype(np.float32), "v1", {"version": "v1"})
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps(scorer.to_dict()))
+    loaded = LinearIntentScorer.from_file(str(path))
+    assert loaded.version.startswith("v1-")
+    assert np.allclose(loaded.weights, scorer.weights, atol=1e-6)
+
+    data = scorer.to_dict()
+    del data["features"]["digit"]
+    assert LinearIntentScorer.from_dict(data).weights[FEATURE_INDEX["digit"]] == 0.0
+    data["features"]["marker:nonexistent"] = 1.0
+    with pytest.raises(ValueError):
+        LinearIntentScorer.from_dict(data)
+    with pytest.raises(ValueError):
+        LinearIntentScorer.from_dict({"format": WEIGHTS_FORMAT + 1, "features": {}})
+
+
+def test_version_covers_feature_extraction_source(monkeypatch):
+    import app.linear_scorer as linear_scorer
+
+    data = LinearIntentScorer(np.zeros(len(FEATURE_NAMES), dtype=np.float32), "v1", {"version": "v1"}).to_dict()
+    before = LinearIntentScorer.from_dict(data).version
+    monkeypatch.setattr(linear_scorer, "_SOURCE_DIGEST", "changed")
+    assert LinearIntentScorer.from_dict(data).version != before
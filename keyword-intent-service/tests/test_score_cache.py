@@ -0,0 +1,83 @@
+import asyncio
+
+from app.score_cache import ScoreCache
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value, ex))
+
+    def mset(self, mapping):
+        self.ops.extend((k, v, None) for k, v in mapping.items())
+
+    async def execute(self):
+        for key, value, ex in self.ops:
+            self.store.data[key] = value.encode()
+            self.store.ttls[key] = ex
+        self.store.executes += 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.mgets = 0
+        self.executes = 0
+
+    async def mget(self, keys):
+        self.mgets += 1
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_scores_only_misses_and_counts_hits():
+    cache = ScoreCache("v1", max_size=10)
+    calls = []
+
+    async def score(keywords):
+        calls.append(list(keywords))
+        return [float(len(k)) for k in keywords]
+
+    assert asyncio.run(cache.score_many(["a", "bb"], score)) == ([1.0, 2.0], 0)
+    assert asyncio.run(cache.score_many(["bb", "ccc", "a"], score)) == ([2.0, 3.0, 1.0], 2)
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert cache.snapshot()["hit_ratio"] == round(2 / 5, 4)
+
+
+def test_lru_is_bounded():
+    cache = ScoreCache("v1", max_size=2)
+    asyncio.run(cache.set_many({"a": 1.0, "b": 2.0}))
+    asyncio.run(cache.get_many(["a"]))
+    asyncio.run(cache.set_many({"c": 3.0}))
+    assert asyncio.run(cache.get_many(["a", "b", "c"])) == {"a": 1.0, "c": 3.0}
+
+
+def test_redis_is_shared_and_versioned():
+    redis = FakeRedis()
+    writer = ScoreCache("v1", max_size=10, redis_client=redis, ttl=60)
+
+    async def score(keywords):
+        return [42.5, 3.0]
+
+    async def fail(keywords):
+        raise AssertionError("cached scores were recomputed")
+
+    asyncio.run(writer.score_many(["what is seo", "buy shoes"], score))
+    assert redis.executes == 1
+    assert set(redis.ttls.values()) == {60}
+
+    reader = ScoreCache("v1", max_size=10, redis_client=redis)
+    assert asyncio.run(reader.score_many(["buy shoes", "what is seo"], fail)) == ([3.0, 42.5], 2)
+    assert reader.redis_hits == 2 and redis.mgets == 2
+    # Now served from the reader's LRU without another round trip.
+    asyncio.run(reader.get_many(["buy shoes"]))
+    assert redis.mgets == 2
+
+    other_version = ScoreCache("v2", max_size=10, redis_client=redis)
+    assert asyncio.run(other_version.get_many(["buy shoes"])) == {}
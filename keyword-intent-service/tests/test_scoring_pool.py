@@ -0,0 +1,66 @@
+import asyncio
+import os
+import signal
+
+from app.intent_scorer import score_keywords_informational_intent, score_keywords_intents
+from app.scoring_pool import ScoringPool, cpu_quota, pool_size
+
+
+def _cgroup(tmp_path, files):
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return str(tmp_path)
+
+
+def test_cpu_quota_from_cgroup_v2(tmp_path):
+    root = _cgroup(tmp_path, {"cpu.max": "250000 100000\n"})
+    assert cpu_quota(root) == 2.5
+    assert pool_size(0, root) == 2
+    assert pool_size(3, root) == 3
+
+
+def test_cpu_quota_from_cgroup_v1(tmp_path):
+    root = _cgroup(tmp_path, {"cpu/cpu.cfs_quota_us": "400000\n", "cpu/cpu.cfs_period_us": "100000\n"})
+    assert cpu_quota(root) == 4.0
+
+
+def test_cpu_quota_never_below_one(tmp_path):
+    root = _cgroup(tmp_path, {"cpu.max": "50000 100000\n"})
+    assert pool_size(0, root) == 1
+
+
+def test_unlimited_quota_falls_back_to_affinity(tmp_path):
+    root = _cgroup(tmp_path, {"cpu.max": "max 100000\n", "cpu/cpu.cfs_quota_us": "-1\n"})
+    assert cpu_quota(root) >= 1.0
+
+
+def test_pooled_scores_match_in_process():
+    keywords = [f"how to {verb} {noun}" for verb in ("learn", "buy", "fix") for noun in ("python", "seo", "bikes")]
+    keywords += ["netflix login", "best running shoes 2024", "what is a guide"]
+    pool = ScoringPool(2, None, [], min_keywords=4, min_shard=3)
+    try:
+        assert pool.should_shard(len(keywords))
+        assert not pool.should_shard(3)
+        assert len(pool.shards(keywords)) == 2
+        assert asyncio.run(pool.score("informational", keywords, 64)) == score_keywords_informational_intent(keywords, None)
+        assert asyncio.run(pool.score("intents", keywords, 64)) == score_keywords_intents(keywords, None)
+        assert pool.snapshot()["sharded_batches"] == 2
+    finally:
+        pool.shutdown()
+
+
+def test_broken_pool_is_dropped(monkeypatch):
+    import app.scoring_pool as scoring_pool
+
+    pool = ScoringPool(2, None, [], min_keywords=4, min_shard=3)
+    monkeypatch.setattr(scoring_pool, "_scoring_pool", pool)
+    try:
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        assert asyncio.run(pool.score("informational", ["how to learn python"] * 6, 64)) is None
+        assert pool.broken and pool.snapshot()["failures"] == 1
+        assert scoring_pool.get_scoring_pool() is None
+    finally:
+        pool.shutdown()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import random
+
+from app.intent_scorer import select_top
+from app.stream_rank import KeywordDeduper, TopN, iter_keywords
+
+
+def _collect(chunks, ndjson=True, **kwargs):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [k async for k in iter_keywords(stream(), ndjson=ndjson, **kwargs)]
+
+    return asyncio.run(run())
+
+
+def test_iter_keywords_across_chunk_boundaries():
+    lines = [json.dumps("what is seo"), json.dumps({"keyword": "how to"}),
+             json.dumps({"keywords": ["a", "b", 3]}), "not json", json.dumps(["c", "d"]), json.dumps("últimas")]
+    body = ("\n".join(lines)).encode()
+    chunks = [body[i:i + 5] for i in range(0, len(body), 5)]
+    assert _collect(chunks) == ["what is seo", "how to", "a", "b", "c", "d", "últimas"]
+    assert _collect([b"one\ntw", b"o\n\nthree"], ndjson=False) == ["one", "two", "three"]
+
+
+def test_top_n_matches_full_sort_including_ties():
+    rng = random.Random(0)
+    scored = [(f"kw {i:05d}", float(rng.choice([0, 12.5, 40, 40, 77.25]))) for i in range(3000)]
+    rng.shuffle(scored)
+    top = TopN(100)
+    for start in range(0, len(scored), 257):
+        top.push_many(scored[start:start + 257])
+    assert top.items() == select_top(scored, 100)
+
+
+def test_deduper_switches_to_bloom_filter():
+    deduper = KeywordDeduper(exact_limit=100, bloom_capacity=10_000, bloom_error_rate=0.001)
+    assert all(deduper.add(f"kw {i}") for i in range(100))
+    assert not deduper.approximate
+    assert not deduper.add("kw 5")
+    new = sum(deduper.add(f"kw {i}") for i in range(100, 5000))
+    assert deduper.approximate
+    assert new >= 4890
+    assert not any(deduper.add(f"kw {i}") for i in range(5000))
+
+
+def test_iter_keywords_skips_over_long_lines():
+    body = b"ok\n" + b"x" * 50 + b"\nfine\n" + b"y" * 30
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    assert _collect(chunks, ndjson=False, max_line_bytes=20) == ["ok", "fine"]
+    assert _collect([b"a" * 40 + b"\nb\n" + b"c" * 40 + b"\nd"], ndjson=False, max_line_bytes=20) == ["b", "d"]
+
+
+def test_bloom_filter_grows_in_stages():
+    deduper = KeywordDeduper(exact_limit=10, bloom_capacity=0, bloom_error_rate=0.001)
+    assert all(deduper.add(f"kw {i}") for i in range(11))
+    first = deduper.bloom_bytes
+    assert deduper.approximate and first < 1024
+    new = sum(deduper.add(f"kw {i}") for i in range(11, 500))
+    assert new >= 485
+    assert len(deduper._blooms) > 2 and deduper.bloom_bytes > first
+    assert not any(deduper.add(f"kw {i}") for i in range(500))